@@ -0,0 +1,93 @@
+"""
+Microbenchmark for bearer-token verification.
+---------------------------------------------
+Serves a stub JWKS on localhost and times one verification per request for:
+
+    uv run python -m benchmarks.auth_bench [--requests N]
+
+- legacy:       a PyJWKClient per request (JWKS fetch + RSA check), as before
+- new token:    ClerkTokenVerifier with cached keys (RSA check only)
+- cached token: ClerkTokenVerifier on a token it has already verified
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from src.services.clerk_auth import ClerkTokenVerifier
+
+KID = "bench-key"
+
+
+def serve_jwks(private_key) -> ThreadingHTTPServer:
+    jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    body = json.dumps({"keys": [{**jwk, "kid": KID, "use": "sig", "alg": "RS256"}]}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def legacy_verify(jwks_url: str, token: str) -> dict:
+    """The per-request verification this replaced, kept for comparison."""
+    signing_key = jwt.PyJWKClient(jwks_url).get_signing_key_from_jwt(token)
+    return jwt.decode(token, signing_key.key, algorithms=["RS256"], options={"verify_exp": True})
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500, help="verifications per run")
+    args = parser.parse_args()
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    server = serve_jwks(private_key)
+    jwks_url = f"http://127.0.0.1:{server.server_port}/.well-known/jwks.json"
+    exp = int(time.time()) + 3600
+    tokens = [
+        jwt.encode({"sub": f"user_{i}", "exp": exp}, private_key, algorithm="RS256", headers={"kid": KID})
+        for i in range(args.requests)
+    ]
+
+    start = time.perf_counter()
+    for token in tokens:
+        legacy_verify(jwks_url, token)
+    legacy = (time.perf_counter() - start) / args.requests
+
+    verifier = ClerkTokenVerifier(jwks_url)
+    await verifier.start()
+    start = time.perf_counter()
+    for token in tokens:
+        await verifier.verify(token)
+    new_token = (time.perf_counter() - start) / args.requests
+
+    start = time.perf_counter()
+    for token in tokens:
+        await verifier.verify(token)
+    cached_token = (time.perf_counter() - start) / args.requests
+    await verifier.stop()
+    server.shutdown()
+
+    print(f"{'path':<14}{'us/request':>12}{'speedup':>10}")
+    for name, seconds in (("legacy", legacy), ("new token", new_token), ("cached token", cached_token)):
+        print(f"{name:<14}{seconds * 1e6:>12.1f}{legacy / seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,413 @@
+"""
+End-to-end load test against a stub OpenAI server.
+--------------------------------------------------
+Starts benchmarks.stub_openai and the API (uvicorn, pointed at the stub
+through OPENAI_BASE_URL), then drives each scenario at a fixed concurrency
+against the bundled templates:
+
+    upload         POST /upload            (a text resume)
+    process_html   POST /process_html      (resume + template)
+    modify         POST /modify-resume
+    preview_pdf    POST /preview-pdf-bytes
+    generate_pdf   POST /generate-pdf
+
+and reports p50/p95/p99 latency, requests per second, errors, and the API
+process tree's CPU time and peak RSS (Linux /proc). Inputs are made unique
+per request so caches miss; --repeat-inputs measures the cached path.
+
+    uv run python -m benchmarks.load_bench --requests 200 --concurrency 16
+    uv run python -m benchmarks.load_bench --save main            # benchmarks/baselines/main.json
+    uv run python -m benchmarks.load_bench --compare main         # exits 1 on a regression
+
+--app-url skips starting the API (and resource sampling unless --app-pid).
+The PDF scenarios need WeasyPrint's system libraries, as in the Docker image.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.stub_openai import PROFILES, SAMPLE_TEXT
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TEMPLATES_DIR = BACKEND_DIR / "templates"
+BASELINES_DIR = Path(__file__).resolve().parent / "baselines"
+
+MODIFY_PROMPTS = [
+    "Make the section headings slightly larger",
+    "What skills should I add for a staff engineer role?",
+    "Change my email to jane.doe@example.org",
+    "Fix overlapping text in the header",
+]
+
+# Keys compared against a baseline; True when larger is worse
+COMPARED = {"p50_ms": True, "p95_ms": True, "p99_ms": True, "rps": False}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def load_templates() -> Dict[str, str]:
+    return {path.stem: path.read_text(encoding="utf-8") for path in sorted(TEMPLATES_DIR.glob("*.html"))}
+
+
+# ----------------------------------------------------------------------
+# Scenarios: request number -> httpx.request kwargs
+# ----------------------------------------------------------------------
+def build_scenarios(templates: Dict[str, str], unique: bool) -> Dict[str, Callable[[int], dict]]:
+    ids = list(templates)
+
+    def resume(i: int) -> bytes:
+        return (SAMPLE_TEXT + (f"\nReference: {i}\n" if unique else "")).encode("utf-8")
+
+    def html(i: int) -> str:
+        content = templates[ids[i % len(ids)]]
+        return content + f"\n<!-- load-bench {i} -->" if unique else content
+
+    return {
+        "upload": lambda i: {
+            "method": "POST", "url": "/upload",
+            "files": {"file": (f"resume-{i}.txt", resume(i), "text/plain")},
+        },
+        "process_html": lambda i: {
+            "method": "POST", "url": "/process_html",
+            "files": {"file": (f"resume-{i}.txt", resume(i), "text/plain")},
+            "data": {"template_id": ids[i % len(ids)]},
+        },
+        "modify": lambda i: {
+            "method": "POST", "url": "/modify-resume",
+            "json": {
+                "html_code": templates[ids[i % len(ids)]],
+                "prompt": MODIFY_PROMPTS[i % len(MODIFY_PROMPTS)] + (f" (request {i})" if unique else ""),
+                "history": [],
+            },
+        },
+        "preview_pdf": lambda i: {"method": "POST", "url": "/preview-pdf-bytes", "data": {"html_content": html(i)}},
+        "generate_pdf": lambda i: {"method": "POST", "url": "/generate-pdf", "data": {"html_content": html(i)}},
+    }
+
+
+# ----------------------------------------------------------------------
+# Resource sampling (the API process and its render workers)
+# ----------------------------------------------------------------------
+def _process_tree(root: int) -> List[int]:
+    children: Dict[int, List[int]] = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            # The command name may contain spaces; the fields after ")" are fixed
+            ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def _cpu_and_rss(pids: List[int]) -> tuple[Dict[int, float], int]:
+    """CPU seconds per live process, and their total RSS in bytes."""
+    ticks = os.sysconf("SC_CLK_TCK")
+    page = os.sysconf("SC_PAGE_SIZE")
+    cpu, rss = {}, 0
+    for pid in pids:
+        try:
+            fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        # utime, stime (fields 14 and 15 of stat) and rss pages (field 24)
+        cpu[pid] = (int(fields[11]) + int(fields[12])) / ticks
+        rss += int(fields[21]) * page
+    return cpu, rss
+
+
+class ResourceSampler:
+    def __init__(self, pid: Optional[int], interval: float = 0.1):
+        self.pid = pid if pid and Path("/proc").exists() else None
+        self.interval = interval
+        self.peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+        self._cpu_start = 0.0
+        # Last CPU time seen per pid; render workers that were recycled keep theirs
+        self._cpu: Dict[int, float] = {}
+
+    def _sample(self) -> float:
+        cpu, rss = _cpu_and_rss(_process_tree(self.pid))
+        self._cpu.update(cpu)
+        self.peak_rss = max(self.peak_rss, rss)
+        return sum(self._cpu.values())
+
+    async def _loop(self):
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.pid is None:
+            return
+        self.peak_rss = 0
+        self._cpu_start = self._sample()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> dict:
+        if self._task is None:
+            return {"cpu_seconds": None, "peak_rss_mb": None}
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        cpu = self._sample() - self._cpu_start
+        return {"cpu_seconds": round(cpu, 3), "peak_rss_mb": round(self.peak_rss / 2**20, 1)}
+
+
+# ----------------------------------------------------------------------
+# Running
+# ----------------------------------------------------------------------
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, build: Callable[[int], dict], requests: int, concurrency: int,
+    sampler: ResourceSampler,
+) -> dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await client.request(**build(i))
+                ok = response.status_code < 400
+                reason = str(response.status_code)
+            except httpx.HTTPError as e:
+                ok, reason = False, type(e).__name__
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors[reason] = errors.get(reason, 0) + 1
+
+    sampler.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    resources = await sampler.stop()
+
+    latencies.sort()
+    ms = lambda value: round(value * 1000, 1) if value is not None else None
+    result = {
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "mean_ms": ms(statistics.fmean(latencies)) if latencies else None,
+        **resources,
+    }
+    if resources["cpu_seconds"] is not None and elapsed:
+        result["cpu_percent"] = round(resources["cpu_seconds"] / elapsed * 100, 1)
+    return result
+
+
+async def wait_until_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+            await asyncio.sleep(0.2)
+
+
+def start_servers(args, log_file) -> tuple[List[subprocess.Popen], str, Optional[int]]:
+    """Starts the stub (and the API unless --app-url); returns (processes, api url, api pid)."""
+    processes = []
+    stub_port = free_port()
+    stub_cmd = [
+        sys.executable, "-m", "benchmarks.stub_openai", "--port", str(stub_port), "--profile", args.profile,
+    ]
+    processes.append(subprocess.Popen(stub_cmd, cwd=BACKEND_DIR, stdout=log_file, stderr=subprocess.STDOUT))
+
+    if args.app_url:
+        return processes, args.app_url.rstrip("/"), args.app_pid
+
+    app_port = free_port()
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        "OPENAI_API_KEY": "stub",
+        # Without CLERK_JWKS_URL, DEBUG lets requests through unauthenticated
+        "DEBUG": "true",
+        "CLERK_JWKS_URL": "",
+        # Every request comes from one user; per-user limits would measure the limiter
+        "ADMISSION_BACKEND": os.environ.get("ADMISSION_BACKEND", "none"),
+    }
+    app_cmd = [
+        sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(app_port),
+        "--log-level", "warning", "--no-access-log",
+    ]
+    app = subprocess.Popen(app_cmd, cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    processes.append(app)
+    return processes, f"http://127.0.0.1:{app_port}", app.pid
+
+
+async def run(args) -> dict:
+    templates = load_templates()
+    scenarios = build_scenarios(templates, unique=not args.repeat_inputs)
+    selected = args.scenarios or list(scenarios)
+
+    log_path = Path(tempfile.gettempdir()) / "load_bench.log"
+    with open(log_path, "w") as log_file:
+        processes, base_url, app_pid = start_servers(args, log_file)
+        try:
+            await wait_until_ready(f"{base_url}/")
+            sampler = ResourceSampler(app_pid)
+            results = {}
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(
+                base_url=base_url, timeout=args.timeout, limits=limits,
+                headers={"Authorization": f"Bearer {args.token}"},
+            ) as client:
+                for name in selected:
+                    if args.warmup:
+                        await run_scenario(client, scenarios[name], args.warmup, args.concurrency, ResourceSampler(None))
+                    results[name] = await run_scenario(
+                        client, scenarios[name], args.requests, args.concurrency, sampler
+                    )
+                    print_result(name, results[name])
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+    print(f"Server logs: {log_path}")
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "profile": args.profile,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "repeat_inputs": args.repeat_inputs,
+        },
+        "scenarios": results,
+    }
+
+
+# ----------------------------------------------------------------------
+# Reporting and baselines
+# ----------------------------------------------------------------------
+def print_result(name: str, result: dict):
+    errors = ", ".join(f"{reason}×{count}" for reason, count in result["errors"].items()) or "none"
+    resources = ""
+    if result["cpu_seconds"] is not None:
+        resources = (
+            f" | cpu {result['cpu_seconds']}s ({result.get('cpu_percent')}%)"
+            f" | peak rss {result['peak_rss_mb']} MB"
+        )
+    print(
+        f"{name:<13} {result['ok']}/{result['requests']} ok | {result['rps']} rps | "
+        f"p50 {result['p50_ms']} ms | p95 {result['p95_ms']} ms | p99 {result['p99_ms']} ms"
+        f"{resources} | errors: {errors}"
+    )
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[str]:
+    """Prints the change per scenario; returns the regressions beyond `threshold` (a fraction)."""
+    regressions = []
+    if baseline["meta"].get("profile") != report["meta"]["profile"]:
+        print(f"⚠️ Baseline used profile {baseline['meta'].get('profile')!r}; numbers are not comparable")
+    for name, result in report["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        changes = []
+        for key, larger_is_worse in COMPARED.items():
+            old, new = before.get(key), result.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            changes.append(f"{key} {old} → {new} ({change:+.0%})")
+            if (change if larger_is_worse else -change) > threshold:
+                regressions.append(f"{name} {key}: {old} → {new} ({change:+.0%})")
+        print(f"{name:<13} " + " | ".join(changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("-n", "--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests before each scenario")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="fast", help="stub OpenAI latency profile")
+    parser.add_argument("--repeat-inputs", action="store_true", help="send identical inputs (cache hits)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-request timeout in seconds")
+    parser.add_argument("--app-url", help="use an already running API instead of starting one")
+    parser.add_argument("--app-pid", type=int, help="with --app-url: the API's pid, for CPU/RSS sampling")
+    parser.add_argument("--token", default="load-bench", help="bearer token sent with every request")
+    parser.add_argument("--save", metavar="NAME", help="write the report to benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against benchmarks/baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=0.2, help="regression threshold (fraction)")
+    args = parser.parse_args()
+
+    known = set(build_scenarios({"_": ""}, False))
+    unknown = [name for name in args.scenarios if name not in known]
+    if unknown:
+        parser.error(f"unknown scenarios {unknown}; choose from {sorted(known)}")
+
+    report = asyncio.run(run(args))
+
+    if args.save:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR / f"{args.save}.json"
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Saved baseline {path}")
+
+    if args.compare:
+        baseline = json.loads((BASELINES_DIR / f"{args.compare}.json").read_text())
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cold versus warm PDF render latency.
+------------------------------------
+Renders every bundled template in this process three ways:
+
+    cold     a fresh FontConfiguration, and linked stylesheets and fonts
+             downloaded again, per render (how every render worked before
+             the shared render context)
+    first    the first render through a new worker render context
+    warm     later renders through the same context
+
+    uv run python -m benchmarks.render_bench [--repeat N]
+
+Needs WeasyPrint's system libraries (Pango), as in the Docker image.
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from src.config import settings
+from src.services.pdf_preprocess import preprocess_html_for_pdf
+from src.services.pdf_renderer import _RenderContext
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+
+def render_cold(html_content: str) -> float:
+    from weasyprint import HTML
+    from weasyprint.text.fonts import FontConfiguration
+
+    started = time.perf_counter()
+    HTML(string=html_content).write_pdf(font_config=FontConfiguration())
+    return time.perf_counter() - started
+
+
+def render_with(context: _RenderContext, html_content: str) -> float:
+    from weasyprint import HTML
+
+    started = time.perf_counter()
+    HTML(string=html_content, url_fetcher=context.url_fetcher).write_pdf(font_config=context.font_config)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="renders per template and mode")
+    args = parser.parse_args()
+
+    documents = {
+        path.stem: preprocess_html_for_pdf(path.read_text(encoding="utf-8"))
+        for path in sorted(TEMPLATES_DIR.glob("*.html"))
+    }
+
+    started = time.perf_counter()
+    context = _RenderContext(settings.PDF_STYLESHEET_CACHE_SIZE)
+    print(f"render context created in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    print(f"{'template':<14}{'cold ms':>10}{'first ms':>10}{'warm ms':>10}{'speedup':>10}")
+    for name, document in documents.items():
+        cold = statistics.median(render_cold(document) for _ in range(args.repeat)) * 1000
+        first = render_with(context, document) * 1000
+        warm = statistics.median(render_with(context, document) for _ in range(args.repeat)) * 1000
+        print(f"{name:<14}{cold:>10.0f}{first:>10.0f}{warm:>10.0f}{cold / warm:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
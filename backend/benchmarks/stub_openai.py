@@ -0,0 +1,328 @@
+"""
+Local stand-in for the OpenAI API.
+----------------------------------
+Answers the calls the agents make (files.create / files.delete,
+responses.create / responses.parse, chat.completions.create, streamed or
+not) with plausible content and a configurable latency, so the service can
+be load-tested without paying for or waiting on real model calls.
+
+    uv run python -m benchmarks.stub_openai --port 9100 --profile realistic
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=stub uv run uvicorn src.main:app
+
+Latency is `first_token` seconds, then output at `tokens_per_second`
+(streamed responses pace their chunks the same way). Answers:
+
+    responses, json_schema format   a fixed ResumeData document
+    responses, template in prompt   the template, unchanged ("filled")
+    responses, otherwise            plain resume text (extraction)
+    chat, advice prompt             plain-text advice
+    chat, patch-mode prompt         {"reply", "edits": []}
+    chat, json_object               {"reply", "modified_code": the input HTML}
+    chat, otherwise                 the input HTML (merge)
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+import uuid
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    first_token: float  # seconds before the first output token
+    tokens_per_second: float  # output rate after that
+    upload: float  # seconds per files.create
+
+
+PROFILES = {
+    "instant": LatencyProfile(0.0, 1e9, 0.0),
+    "fast": LatencyProfile(0.05, 2000, 0.01),
+    "realistic": LatencyProfile(0.6, 90, 0.3),
+    "slow": LatencyProfile(2.0, 30, 1.0),
+}
+
+# Output is streamed in ticks of this many seconds
+STREAM_TICK = 0.02
+
+SAMPLE_TEXT = """Jane Doe
+Senior Software Engineer | jane@example.com | +1 555 0100 | San Francisco, CA
+
+EXPERIENCE
+Acme Corp, Senior Software Engineer, 2020 - Present
+- Led the migration of the billing platform to an event-driven architecture
+- Cut p95 API latency by 40% through caching and query tuning
+
+Globex, Software Engineer, 2016 - 2020
+- Built the internal deployment pipeline used by 200 engineers
+
+EDUCATION
+State University, B.S. Computer Science, 2012 - 2016
+
+SKILLS
+Python, Go, PostgreSQL, Kubernetes, Terraform
+"""
+
+SAMPLE_RESUME = {
+    "contact": {
+        "name": "Jane Doe", "headline": "Senior Software Engineer", "email": "jane@example.com",
+        "phone": "+1 555 0100", "location": "San Francisco, CA",
+        "links": [{"label": "GitHub", "url": "https://github.com/janedoe"}],
+    },
+    "summary": "Backend engineer focused on reliable, fast distributed systems.",
+    "experience": [
+        {"title": "Acme Corp", "subtitle": "Senior Software Engineer", "location": "San Francisco, CA",
+         "date": "2020 - Present", "detail": None,
+         "bullets": ["Led the migration of the billing platform to an event-driven architecture",
+                     "Cut p95 API latency by 40% through caching and query tuning"]},
+        {"title": "Globex", "subtitle": "Software Engineer", "location": "Remote", "date": "2016 - 2020",
+         "detail": None, "bullets": ["Built the internal deployment pipeline used by 200 engineers"]},
+    ],
+    "education": [
+        {"title": "State University", "subtitle": "B.S. Computer Science", "location": None,
+         "date": "2012 - 2016", "detail": None, "bullets": []},
+    ],
+    "projects": [],
+    "skills": [
+        {"category": "Languages", "items": ["Python", "Go"]},
+        {"category": "Infrastructure", "items": ["PostgreSQL", "Kubernetes", "Terraform"]},
+    ],
+    "extra_sections": [],
+}
+
+_TEMPLATE_RE = re.compile(r"```html\n(.*?)\n```", re.DOTALL)
+_HTML_RE = re.compile(r"(<!DOCTYPE html.*?</html>|<html.*?</html>)", re.DOTALL | re.IGNORECASE)
+
+
+def _tokens(text: str) -> int:
+    return max(1, (len(text) + 3) // 4)
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+def _input_text(value) -> str:
+    """Every text part of a Responses `input` or a Chat `messages` list, joined."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return "\n".join(_input_text(item) for item in value)
+    if isinstance(value, dict):
+        return "\n".join(_input_text(value[key]) for key in ("content", "text") if key in value)
+    return ""
+
+
+class StubOpenAI:
+    def __init__(self, profile: LatencyProfile):
+        self.profile = profile
+        self.calls = {"files": 0, "responses": 0, "chat": 0}
+
+    def generation_time(self, text: str) -> float:
+        return self.profile.first_token + _tokens(text) / self.profile.tokens_per_second
+
+    async def paced(self, text: str):
+        """Yields `text` in chunks at the profile's token rate."""
+        await asyncio.sleep(self.profile.first_token)
+        chars_per_tick = max(1, int(self.profile.tokens_per_second * 4 * STREAM_TICK))
+        for start in range(0, len(text), chars_per_tick):
+            yield text[start:start + chars_per_tick]
+            await asyncio.sleep(min(STREAM_TICK, _tokens(text) / self.profile.tokens_per_second))
+
+    # ------------------------------------------------------------------
+    # Responses API
+    # ------------------------------------------------------------------
+    @staticmethod
+    def response_text(body: dict) -> str:
+        text_format = (body.get("text") or {}).get("format") or {}
+        if text_format.get("type") == "json_schema":
+            return json.dumps(SAMPLE_RESUME)
+        match = _TEMPLATE_RE.search(_input_text(body.get("input")))
+        if match:
+            return match.group(1)
+        return SAMPLE_TEXT
+
+    @staticmethod
+    def response_object(body: dict, response_id: str, text: str, prompt_tokens: int) -> dict:
+        return {
+            "id": response_id,
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model"),
+            "status": "completed",
+            "output": [{
+                "type": "message",
+                "id": _new_id("msg"),
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": prompt_tokens,
+                "output_tokens": _tokens(text),
+                "total_tokens": prompt_tokens + _tokens(text),
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens_details": {"reasoning_tokens": 0},
+            },
+        }
+
+    async def responses(self, body: dict, prompt_tokens: int):
+        self.calls["responses"] += 1
+        text = self.response_text(body)
+        response_id = _new_id("resp")
+        if not body.get("stream"):
+            await asyncio.sleep(self.generation_time(text))
+            return self.response_object(body, response_id, text, prompt_tokens)
+
+        async def events():
+            sequence = 0
+
+            def event(payload: dict) -> str:
+                nonlocal sequence
+                sequence += 1
+                payload["sequence_number"] = sequence
+                return f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n"
+
+            created = self.response_object(body, response_id, "", prompt_tokens)
+            created["status"] = "in_progress"
+            yield event({"type": "response.created", "response": created})
+            item_id = _new_id("msg")
+            async for chunk in self.paced(text):
+                yield event({
+                    "type": "response.output_text.delta", "item_id": item_id,
+                    "output_index": 0, "content_index": 0, "delta": chunk,
+                })
+            yield event({
+                "type": "response.completed",
+                "response": self.response_object(body, response_id, text, prompt_tokens),
+            })
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # ------------------------------------------------------------------
+    # Chat Completions
+    # ------------------------------------------------------------------
+    @staticmethod
+    def chat_text(body: dict) -> str:
+        messages = body.get("messages") or []
+        system = "\n".join(_input_text(m) for m in messages if m.get("role") == "system")
+        user = "\n".join(_input_text(m) for m in messages if m.get("role") != "system")
+        match = _HTML_RE.search(user)
+        html_code = match.group(1) if match else "<html><body></body></html>"
+
+        if "asking for advice" in system:
+            return "Lead each bullet with its result, and add a short skills summary near the top."
+        if "TARGETED EDITS" in system:
+            return json.dumps({"reply": "Here is some advice; no changes were needed.", "edits": []})
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            return json.dumps({"reply": "I've updated your resume.", "modified_code": html_code})
+        return html_code
+
+    async def chat(self, body: dict, prompt_tokens: int):
+        self.calls["chat"] += 1
+        text = self.chat_text(body)
+        completion_id = _new_id("chatcmpl")
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": _tokens(text),
+            "total_tokens": prompt_tokens + _tokens(text),
+        }
+        if not body.get("stream"):
+            await asyncio.sleep(self.generation_time(text))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }
+
+        def chunk(choices: list, **extra) -> str:
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created,
+                "model": body.get("model"), "choices": choices, **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            async for piece in self.paced(text):
+                yield chunk([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+            yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk([], usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def create_app(profile: LatencyProfile) -> FastAPI:
+    app = FastAPI(title="Stub OpenAI")
+    stub = app.state.stub = StubOpenAI(profile)
+
+    @app.post("/v1/files")
+    async def create_file(file: UploadFile = File(...), purpose: str = Form(...)):
+        stub.calls["files"] += 1
+        size = len(await file.read())
+        await asyncio.sleep(profile.upload)
+        return {
+            "id": _new_id("file"), "object": "file", "bytes": size, "created_at": int(time.time()),
+            "filename": file.filename, "purpose": purpose, "status": "processed",
+        }
+
+    @app.delete("/v1/files/{file_id}")
+    async def delete_file(file_id: str):
+        return {"id": file_id, "object": "file", "deleted": True}
+
+    @app.post("/v1/responses")
+    async def create_response(request: Request):
+        raw = await request.body()
+        return await stub.responses(json.loads(raw), _tokens(raw.decode("utf-8", "replace")))
+
+    @app.post("/v1/chat/completions")
+    async def create_chat_completion(request: Request):
+        raw = await request.body()
+        return await stub.chat(json.loads(raw), _tokens(raw.decode("utf-8", "replace")))
+
+    @app.get("/stats")
+    async def stats():
+        return stub.calls
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument("--first-token", type=float, help="override the profile's seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, help="override the profile's output rate")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    profile = LatencyProfile(
+        args.first_token if args.first_token is not None else profile.first_token,
+        args.tokens_per_second or profile.tokens_per_second,
+        profile.upload,
+    )
+    print(f"Stub OpenAI on http://{args.host}:{args.port}/v1 ({profile})")
+    uvicorn.run(create_app(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
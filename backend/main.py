@@ -1,5 +1,60 @@
+"""
+Command-line batch conversion.
+------------------------------
+Runs the same pipeline as POST /batch/process-html without the HTTP server:
+
+    uv run python main.py resumes/*.pdf --template classic --output batch.zip
+
+One NDJSON line is printed per resume as it finishes, then a `done` line;
+every output (HTML, PDF, results.ndjson) is written to the zip. Logs go to
+stderr. Exits non-zero when any resume failed.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from src.config import settings
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert many resumes with one template.")
+    parser.add_argument("files", nargs="+", type=Path, help="resume files (.pdf, .docx, .txt, ...)")
+    parser.add_argument("-t", "--template", default="classic", help="template id (default: classic)")
+    parser.add_argument("-o", "--output", type=Path, default=Path("batch.zip"), help="zip to write")
+    parser.add_argument("--no-pdf", action="store_true", help="only produce HTML")
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=settings.BATCH_CONCURRENCY,
+        help=f"resumes processed at once (default: {settings.BATCH_CONCURRENCY})",
+    )
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> int:
+    # The app's lifespan provides the agents and PDF pool; no job consumers needed
+    settings.JOB_INPROCESS_WORKERS = 0
+    from src.main import app, lifespan, batch_runner
+
+    missing = [str(path) for path in args.files if not path.is_file()]
+    if missing:
+        print(f"No such file: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    items = [(path.name, path.read_bytes()) for path in args.files]
+
+    async with lifespan(app):
+        runner = batch_runner(args.template, render_pdf=not args.no_pdf, concurrency=args.concurrency)
+        async for item in runner.run(items):
+            print(json.dumps({"event": "item", **item}), flush=True)
+        args.output.write_bytes(runner.archive())
+
+    summary = runner.summary()
+    print(json.dumps({"event": "done", **summary, "archive": str(args.output)}), flush=True)
+    return 1 if summary["failed"] else 0
+
+
 def main():
-    print("Hello from backend!")
+    sys.exit(asyncio.run(run(parse_args())))
 
 
 if __name__ == "__main__":
@@ -1,64 +1,125 @@
 import time
+import hashlib
 import logging
+from typing import Optional
 from openai import AsyncOpenAI
 from ..config import settings  # your config file
+from ..services.file_registry import OpenAIFileRegistry
+from ..services.local_extractors import extract_locally
+from ..services.extraction_cache import ExtractionCache
+from ..services.metrics import record_usage, stage_timer
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Bump whenever the extraction prompt or the local parsers change output,
+# so cached results from the old pipeline are not served.
+EXTRACTOR_VERSION = "2"
+
 
 class DocumentExtractor:
     """
-    Ultra-fast document extractor using OpenAI Responses API.
-    Supports: PDF, DOCX, PPTX, XLSX, TXT, Images.
+    Ultra-fast document extractor.
+    Text-based formats (TXT, CSV, DOCX, PPTX, XLSX, text-layer PDFs) are parsed
+    locally; everything else (scanned PDFs, DOC, images) goes through the
+    OpenAI Responses API.
     """
 
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = "gpt-4o"  # must be gpt-4o or gpt-4.1 for direct file ingestion
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        file_registry: OpenAIFileRegistry,
+        cache: Optional[ExtractionCache] = None,
+        model: str = settings.EXTRACTOR_MODEL,  # must be gpt-4o or gpt-4.1 for direct file ingestion
+        timeout: float = settings.EXTRACTOR_TIMEOUT,
+    ):
+        self.client = client
+        self.file_registry = file_registry
+        self.cache = cache
+        self.model = model
+        self.timeout = timeout
 
     # ------------------------------------------------------------------
     # MAIN: Extract from in-memory file bytes
     # ------------------------------------------------------------------
-    async def extract_from_bytes(self, file_bytes: bytes, filename: str):
+    async def extract_from_bytes(self, file_bytes: bytes, filename: str, digest: Optional[str] = None):
+        # Ingested uploads arrive with their sha256 already computed
+        digest = digest or hashlib.sha256(file_bytes).hexdigest()
+        cache_key = None
+
+        if self.cache is not None:
+            cache_key = self.cache.key(digest, EXTRACTOR_VERSION, self.model)
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"🗄️ Extraction cache hit for {filename} (originally {cached['method']})")
+                return {
+                    "success": True,
+                    "extracted_data": cached["extracted_data"],
+                    "method": "cache",
+                    "execution_time": cached["execution_time"],
+                }
+
+        result = await self._extract(file_bytes, filename, digest)
+
+        if cache_key is not None and result.get("success"):
+            await self.cache.set(cache_key, result)
+        return result
+
+    async def _extract(self, file_bytes: bytes, filename: str, digest: str) -> dict:
         start_total = time.time()
 
         try:
             # ----------------------------------------------------------
-            # STEP 1 — Upload file to OpenAI (in memory)
+            # STEP 0 — Local fast path (no upload, no LLM)
+            # ----------------------------------------------------------
+            if settings.LOCAL_EXTRACTION_ENABLED:
+                local = await extract_locally(file_bytes, filename)
+                if local is not None:
+                    extracted_text, method = local
+                    total_time = time.time() - start_total
+                    logger.info(f"⚡ Extracted {filename} locally ({method}) in {total_time:.2f}s")
+                    return {
+                        "success": True,
+                        "extracted_data": extracted_text,
+                        "method": method,
+                        "execution_time": total_time,
+                    }
+
+            # ----------------------------------------------------------
+            # STEP 1 — Upload file to OpenAI (reused if already uploaded)
             # ----------------------------------------------------------
-            upload = await self.client.files.create(
-                file=(filename, file_bytes),
-                purpose="assistants"
+            file_id = await self.file_registry.get_or_upload(
+                self.client, filename, file_bytes, digest
             )
-            file_id = upload.id
-            logger.info(f"📤 Uploaded file {filename} (file_id={file_id})")
 
             # ----------------------------------------------------------
             # STEP 2 — Call Responses API (supports file ingestion)
             # ----------------------------------------------------------
-            logger.info("🤖 Calling gpt-4o for document extraction...")
-
-            response = await self.client.responses.create(
-                model=self.model,
-                input=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "input_file", "file_id": file_id},  # Changed from "file" to "input_file"
-                            {
-                                "type": "input_text",  # Changed from "text" to "input_text"
-                                "text": (
-                                    "Extract all textual content from this document. "
-                                    "Preserve reading order. Output clean plain text only. "
-                                    "No JSON, no markdown, no commentary."
-                                ),
-                            },
-                        ],
-                    }
-                ],
-                max_output_tokens=8000
-            )
+            logger.info(f"🤖 Calling {self.model} for document extraction...")
+
+            async with stage_timer("llm_extract"):
+                response = await self.client.responses.create(
+                    model=self.model,
+                    input=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {"type": "input_file", "file_id": file_id},  # Changed from "file" to "input_file"
+                                {
+                                    "type": "input_text",  # Changed from "text" to "input_text"
+                                    "text": (
+                                        "Extract all textual content from this document. "
+                                        "Preserve reading order. Output clean plain text only. "
+                                        "No JSON, no markdown, no commentary."
+                                    ),
+                                },
+                            ],
+                        }
+                    ],
+                    max_output_tokens=8000,
+                    timeout=self.timeout
+                )
+            record_usage(self.model, getattr(response, "usage", None))
 
             extracted_text = response.output_text
 
@@ -3,6 +3,8 @@ import logging
 import html
 from openai import AsyncOpenAI  # Changed import
 from ..config import settings
+from ..services.continuation import continue_chat, html_is_complete
+from ..services.metrics import record_usage, stage_timer
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -14,16 +16,20 @@ class HtmlResumeConverter:
     to generate valid code, while performing basic cleanup on the result.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model_name: str = settings.CONVERTER_MODEL,
+        timeout: float = settings.CONVERTER_TIMEOUT,
+    ):
         logger.info("Initializing HtmlResumeConverter with OpenAI Direct API...")
         
-        # Initialize the Async Client
-        self.client = AsyncOpenAI(
-            api_key=settings.OPENAI_API_KEY
-        )
+        # Shared, application-scoped client (see services/llm_client.py)
+        self.client = client
         
         # Define the model (You can change this to "gpt-4-turbo" or "gpt-3.5-turbo" if needed)
-        self.model_name = "gpt-4.1"
+        self.model_name = model_name
+        self.timeout = timeout
 
         # Store System prompt as a class attribute to be used in the API call
         self.system_prompt = """
@@ -63,10 +69,11 @@ TASK:
         """
         Basic check to ensure the LLM didn't truncate the file.
         """
-        if "</html>" not in html_content:
+        if not html_is_complete(html_content):
             logger.warning("HTML output appears truncated (missing </html>).")
         return html_content
 
+    @stage_timer("sanitize")
     def sanitize_html_merged(self, merged: str) -> str:
         """
         Pipeline to clean up the LLM output.
@@ -122,14 +129,20 @@ IMPORTANT: Return ONLY the raw HTML code. No explanations.
             ]
 
             # Call OpenAI Chat Completion
-            response = await self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=0,  # Low temperature for more deterministic code generation
-            )
+            async with stage_timer("llm_convert"):
+                response = await self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=0,  # Low temperature for more deterministic code generation
+                    timeout=self.timeout,
+                )
+            record_usage(self.model_name, getattr(response, "usage", None))
             
-            # Extract content
-            llm_output = response.choices[0].message.content
+            # Extract content, asking for the rest if the document was cut off
+            llm_output, _ = await continue_chat(
+                self.client, messages, response, agent="convert", model=self.model_name,
+                is_complete=html_is_complete, temperature=0, timeout=self.timeout,
+            )
             
             # Initial cleanup
             merged = await self.strip_fenced_code(llm_output)
@@ -1,14 +1,20 @@
 import logging
 import time
-from pathlib import Path
+from typing import AsyncIterator
 
-from fastapi import UploadFile
 from openai import AsyncOpenAI
 
 from ..config import settings
+from ..services.continuation import continue_response, stream_response_continuations
+from ..services.file_registry import OpenAIFileRegistry
+from ..services.metrics import observe_stage, record_usage, stage_timer
+from ..services.template_registry import TemplateRegistry
+from ..services.uploads import Upload
 
 logger = logging.getLogger(__name__)
 
+MAX_OUTPUT_TOKENS = 8000
+
 class UnifiedResumeProcessor:
     """
     MERGED EXTRACTOR & CONVERTER (File Upload Version)
@@ -17,86 +23,106 @@ class UnifiedResumeProcessor:
     and generate HTML in a SINGLE API call.
     Replaces Vision/Image logic with File ID logic.
     """
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = "gpt-4o-mini" 
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        file_registry: OpenAIFileRegistry,
+        templates: TemplateRegistry,
+        model: str = settings.UNIFIED_MODEL,
+        timeout: float = settings.UNIFIED_TIMEOUT,
+    ):
+        self.client = client
+        self.file_registry = file_registry
+        self.templates = templates
+        self.model = model
+        self.timeout = timeout
+
+    async def _build_input(self, upload: Upload, template_id: str) -> list:
+        """Uploads the resume and builds the Responses API input. Raises FileNotFoundError."""
+        # --- STEP 1: UPLOAD FILE TO OPENAI ---
+        # We upload the raw file bytes directly, exactly like DocumentExtractor
+        file_id = await self.file_registry.get_or_upload(
+            self.client, upload.filename, upload.data, upload.digest
+        )
+
+        # --- STEP 2: LOAD TEMPLATE ---
+        # Served from memory; unknown ids fall back to the default template
+        template = self.templates.resolve(template_id)
+        if template is None:
+            raise FileNotFoundError(f"Template {template_id} not found")
+
+        html_template_str = template.content
+
+        # --- STEP 3: BUILD PROMPT ---
+        # We merge the extraction and HTML filling into one prompt
+
+        system_instruction = """
+        You are an Expert Resume Engineer.
+
+        TASK:
+        1. Read the attached resume file.
+        2. Extract all relevant data (Experience, Education, Skills, Contact).
+        3. Populate the HTML Template provided below with this data.
 
-    async def process(self, file: UploadFile, template_id: str, templates_dir: Path) -> dict:
+        CRITICAL RULES:
+        - **Preserve Layout:** Do NOT change the CSS or structure of the HTML.
+        - **Smart Fill:** Replace placeholder text with real extracted data.
+        - **Output:** Return ONLY the raw valid HTML code. No markdown fences.
+        """
+
+        # Construct the user text prompt containing the template
+        user_text_prompt = (
+            f"{system_instruction}\n\n"
+            "Here is the target HTML Template:\n"
+            "```html\n" +
+            html_template_str +
+            "\n```\n\n"
+            "INSTRUCTIONS: Fill this template using the data from the attached file. Return only the final HTML."
+        )
+
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "input_file", "file_id": file_id},
+                    {"type": "input_text", "text": user_text_prompt}
+                ],
+            }
+        ]
+
+    @staticmethod
+    def _clean_output(generated_html: str) -> str:
+        # Simple cleanup in case the AI added markdown fences
+        return generated_html.replace("```html", "").replace("```", "").strip()
+
+    async def process(self, upload: Upload, template_id: str) -> dict:
         try:
-            logger.info(f"🚀 Starting Unified Process (File Upload) for {file.filename}")
-
-            # --- STEP 1: UPLOAD FILE TO OPENAI ---
-            # We upload the raw file bytes directly, exactly like DocumentExtractor
-            file_content = await file.read()
-            
-            upload = await self.client.files.create(
-                file=(file.filename, file_content),
-                purpose="assistants"
-            )
-            file_id = upload.id
-            logger.info(f"📤 Uploaded file to OpenAI (file_id={file_id})")
-
-            # --- STEP 2: LOAD TEMPLATE ---
-            # Locate Template
-            template_path = templates_dir / f"{template_id}.html"
-            if not template_path.exists():
-                template_path = templates_dir / template_id
-                if not template_path.exists():
-                     template_path = templates_dir / "classic.html"
-            
-            if not template_path.exists():
-                return {"success": False, "error": f"Template {template_id} not found"}
-
-            with open(template_path, "r", encoding="utf-8") as f:
-                html_template_str = f.read()
-
-            # --- STEP 3: CALL RESPONSES API ---
-            # We merge the extraction and HTML filling into one prompt
-            
-            system_instruction = """
-            You are an Expert Resume Engineer.
-            
-            TASK:
-            1. Read the attached resume file.
-            2. Extract all relevant data (Experience, Education, Skills, Contact).
-            3. Populate the HTML Template provided below with this data.
-            
-            CRITICAL RULES:
-            - **Preserve Layout:** Do NOT change the CSS or structure of the HTML.
-            - **Smart Fill:** Replace placeholder text with real extracted data.
-            - **Output:** Return ONLY the raw valid HTML code. No markdown fences.
-            """
-
-            # Construct the user text prompt containing the template
-            user_text_prompt = (
-                f"{system_instruction}\n\n"
-                "Here is the target HTML Template:\n"
-                "```html\n" + 
-                html_template_str + 
-                "\n```\n\n"
-                "INSTRUCTIONS: Fill this template using the data from the attached file. Return only the final HTML."
-            )
+            logger.info(f"🚀 Starting Unified Process (File Upload) for {upload.filename}")
 
+            try:
+                input_messages = await self._build_input(upload, template_id)
+            except FileNotFoundError as e:
+                return {"success": False, "error": str(e)}
+
+            # --- STEP 4: CALL RESPONSES API ---
             # Use the responses.create pattern from your DocumentExtractor
-            response = await self.client.responses.create(
-                model=self.model,
-                input=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "input_file", "file_id": file_id},
-                            {"type": "input_text", "text": user_text_prompt}
-                        ],
-                    }
-                ],
-                max_output_tokens=8000
+            async with stage_timer("llm_fill"):
+                response = await self.client.responses.create(
+                    model=self.model,
+                    input=input_messages,
+                    max_output_tokens=MAX_OUTPUT_TOKENS,
+                    timeout=self.timeout
+                )
+            record_usage(self.model, getattr(response, "usage", None))
+
+            # --- STEP 5: FINISH A CUT-OFF DOCUMENT ---
+            output_text, _ = await continue_response(
+                self.client, response, agent="fill", model=self.model,
+                max_output_tokens=MAX_OUTPUT_TOKENS, timeout=self.timeout,
             )
 
-            # --- STEP 4: CLEANUP ---
-            generated_html = response.output_text
-            
-            # Simple cleanup in case the AI added markdown fences
-            generated_html = generated_html.replace("```html", "").replace("```", "").strip()
+            # --- STEP 6: CLEANUP ---
+            generated_html = self._clean_output(output_text)
 
             return {"success": True, "html_code": generated_html}
 
@@ -104,5 +130,59 @@ class UnifiedResumeProcessor:
             logger.error(f"Unified Process Failed: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
 
-# Singleton instance
-unified_processor = UnifiedResumeProcessor()
\ No newline at end of file
+    async def process_stream(
+        self, upload: Upload, template_id: str
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Streaming variant of `process`.
+        Yields ("delta", {"html": chunk}) as tokens arrive, then exactly one
+        ("done", {...same shape as process()...}) or ("error", {"error": ...}).
+        """
+        start = time.time()
+        try:
+            logger.info(f"🚀 Starting Unified Process (streaming) for {upload.filename}")
+
+            try:
+                input_messages = await self._build_input(upload, template_id)
+            except FileNotFoundError as e:
+                yield "error", {"success": False, "error": str(e)}
+                return
+
+            chunks = []
+            first_token_at = None
+            final_response = None
+            stream = await self.client.responses.create(
+                model=self.model,
+                input=input_messages,
+                max_output_tokens=MAX_OUTPUT_TOKENS,
+                timeout=self.timeout,
+                stream=True
+            )
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    if first_token_at is None:
+                        first_token_at = time.time() - start
+                        logger.info(f"⚡ First token after {first_token_at:.2f}s")
+                        observe_stage("llm_fill_first_token", first_token_at)
+                    chunks.append(event.delta)
+                    yield "delta", {"html": event.delta}
+                elif event.type in ("response.completed", "response.incomplete"):
+                    final_response = event.response
+                    record_usage(self.model, getattr(event.response, "usage", None))
+                elif event.type in ("response.failed", "response.error", "error"):
+                    raise RuntimeError(f"Streaming response failed: {event}")
+            observe_stage("llm_fill_stream", time.time() - start)
+
+            if final_response is not None:
+                async for chunk in stream_response_continuations(
+                    self.client, final_response, "".join(chunks), agent="fill", model=self.model,
+                    max_output_tokens=MAX_OUTPUT_TOKENS, timeout=self.timeout,
+                ):
+                    chunks.append(chunk)
+                    yield "delta", {"html": chunk}
+
+            yield "done", {"success": True, "html_code": self._clean_output("".join(chunks))}
+
+        except Exception as e:
+            logger.error(f"Unified Process (streaming) Failed: {e}", exc_info=True)
+            yield "error", {"success": False, "error": str(e)}
@@ -3,22 +3,47 @@ from ..config import settings
 import re
 import logging
 import json
+import time
 import asyncio
-from typing import List, Dict 
+from typing import AsyncIterator, List, Dict, Optional
+from ..services.json_stream import JsonStringFieldStreamer
+from ..services.html_patch import PatchError, apply_edits
+from ..services.tokens import estimate_tokens
+from ..services.modify_context import ModifyContextBuilder
+from ..services.modify_cache import ModifyResponseCache
+from ..services.modify_router import ModifyRouter, Route
+from ..services.continuation import continue_chat, stream_chat_continuations
+from ..services.metrics import observe_stage, record_usage, stage_timer
 
 logger = logging.getLogger(__name__)
 
 class HtmlModifier:
-    def __init__(self):
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        cache: Optional[ModifyResponseCache] = None,
+        model_name: str = settings.MODIFIER_MODEL,
+        timeout: float = settings.MODIFIER_TIMEOUT,
+        mode: str = settings.MODIFIER_MODE,
+        context_builder: Optional[ModifyContextBuilder] = None,
+        router: Optional[ModifyRouter] = None,
+    ):
         logger.info("Initializing HtmlModifier with OpenAI Direct API...")
         
-        self.client = AsyncOpenAI(
-            api_key=settings.OPENAI_API_KEY
-        )
+        # Shared, application-scoped client (see services/llm_client.py)
+        self.client = client
+        self.cache = cache
         
         # GPT-4o is recommended for large HTML manipulation tasks
-        # self.model_name = "gpt-3.5-turbo"
-        self.model_name = "gpt-4.1"
+        self.model_name = model_name
+        self.timeout = timeout
+        # "patch": model returns targeted edits applied locally; "full": whole document
+        self.mode = mode
+        # Fits history and extracted resume text into the token budget
+        self.context_builder = context_builder or ModifyContextBuilder(model=model_name)
+        # Sends each prompt to the cheapest adequate model and output mode;
+        # without one every request uses model_name and mode
+        self.router = router
 
         # System prompt stored as class attribute
         self.system_prompt = """
@@ -49,6 +74,56 @@ Example response format:
   "reply": "I've updated your email address to the new one.",
   "modified_code": "<!DOCTYPE html><html>...</html>"
 }
+"""
+
+        # Patch mode: the model describes edits instead of echoing the document
+        self.patch_system_prompt = """
+You are an expert HTML & Inline CSS resume modifier and conversational assistant.
+You change a user's HTML resume by describing TARGETED EDITS. Never return the whole document.
+
+OUTPUT: a single JSON object with two keys:
+- "reply": conversational text for the user.
+- "edits": a list of edit objects, applied in order. Use [] when no change is needed (e.g. advice questions).
+
+EDIT OPERATIONS:
+- {"op": "replace_text", "find": "<exact substring of the current code>", "replace": "<new substring>"}
+- {"op": "replace_element", "target": TARGET, "html": "<new outer HTML>"}
+- {"op": "replace_inner", "target": TARGET, "html": "<new inner HTML>"}
+- {"op": "set_attribute", "target": TARGET, "name": "style", "value": "<full new attribute value>"}
+- {"op": "insert_before" | "insert_after", "target": TARGET, "html": "<HTML to insert>"}
+- {"op": "remove", "target": TARGET}
+
+TARGET is exactly one of:
+- {"id": "element-id"}
+- {"selector": "simple CSS selector"}  (tag, .class, #id, [attr=value], descendant and '>' combinators)
+- {"text": "exact text inside the element"}  (the innermost element containing it)
+Add "all": true to a TARGET to edit every match; otherwise it must match exactly one element.
+
+RULES:
+1. "find" and "text" anchors must be copied EXACTLY from the current code and be unique in it.
+2. Prefer the smallest edit that does the job (e.g. replace_text for an email address,
+   or a replace_text inside the <style> block for font/spacing changes).
+3. Preserve existing inline styles and structure unless asked to redesign. Do not break the HTML.
+4. Make ONLY the changes requested.
+
+Example response:
+{
+  "reply": "I've updated your email address.",
+  "edits": [{"op": "replace_text", "find": "old@mail.com", "replace": "new@mail.com"}]
+}
+"""
+
+        # Advice mode: questions about the resume, answered without touching it
+        self.advice_system_prompt = """
+You are an expert resume reviewer and career coach, talking with a user about their HTML resume.
+The user is asking for advice, not for changes: answer their question about the resume's content,
+wording or layout with specific, actionable suggestions that refer to what the resume actually says.
+
+RULES:
+1. Reply in plain conversational text (short paragraphs or bullet points). No JSON, no code fences.
+2. Never return or rewrite the HTML code. If a suggestion needs an example, quote only the short
+   passage it concerns.
+3. Be concise; the user can ask you to apply any of the suggestions afterwards.
 """
 
     async def strip_fenced_code(self, text):
@@ -57,110 +132,353 @@ Example response format:
         text = re.sub(r"\n```$", "", text)
         return text.strip()
 
-    async def modify_html(self, html_code: str, prompt: str, history: List[Dict[str, str]] = None) -> dict:
-        logger.info(f"🔄 Modifying HTML code with prompt: {prompt[:100]}...")
-        
+    def _build_messages(
+        self,
+        html_code: str,
+        prompt: str,
+        history: List[Dict[str, str]] = None,
+        mode: str = "full",
+        extracted_data: Optional[str] = None,
+    ) -> list:
+        system_prompt = {
+            "patch": self.patch_system_prompt,
+            "advice": self.advice_system_prompt,
+        }.get(mode, self.system_prompt)
+        context = self.context_builder.build(
+            system_prompt=system_prompt,
+            html_code=html_code,
+            prompt=prompt,
+            history=history,
+            extracted_data=extracted_data,
+        )
+        logger.info(f"🧮 Modify context tokens: {context.breakdown}")
+
         # Build conversation history context
-        history_text = ""
-        if history:
-            history_text = "Here is the conversation history that provides context for the request:\n"
-            for msg in history[-5:]:  # Only last 5 messages to avoid token limits
-                history_text += f"[{msg.role.upper()}]: {msg.content}\n"
-            history_text += "\n"
+        history_text = context.history_text
 
-        try:
-            # Construct the full user message
-            user_message_content = f"""
-Here is the current HTML code you must modify (or return unchanged):
+        # Original resume content the current HTML doesn't show (e.g. skipped by the template)
+        extracted_text = ""
+        if context.extracted_text:
+            extracted_text = f"CONTEXT FROM ORIGINAL RESUME (content not in the code above):\n{context.extracted_text}\n\n"
+
+        if mode == "patch":
+            output_instruction = 'Respond ONLY with a JSON object containing "reply" (conversational text) and "edits" (list of edits).'
+        elif mode == "advice":
+            output_instruction = "Respond with your advice as plain text. Do not return any HTML code."
+        else:
+            output_instruction = 'Respond ONLY with a JSON object containing "reply" (conversational text) and "modified_code" (valid HTML).'
+
+        # Construct the full user message
+        user_message_content = f"""
+Here is the current HTML code{" of the resume" if mode == "advice" else " you must modify (or return unchanged)"}:
 
 ===== CODE START =====
 {html_code}
 ===== CODE END =====
 
-{history_text}
+{extracted_text}{history_text}
 
 Here is the user's final and most recent request:
 {prompt}
 
 IMPORTANT:
-Respond ONLY with a JSON object containing "reply" (conversational text) and "modified_code" (valid HTML).
+{output_instruction}
 """
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message_content}
+        ]
+
+    async def _parse_response(self, response_text: str, html_code: str) -> dict:
+        """Turns the raw model output into the modify_html result. Raises JSONDecodeError."""
+        # -------------------------------------------------------
+        # JSON Parsing (Retaining your robust defensive logic)
+        # -------------------------------------------------------
+        
+        # Remove any markdown fences (just in case model ignores json_object enforcement)
+        response_text = re.sub(r'^```json\s*', '', response_text)
+        response_text = re.sub(r'^```\s*', '', response_text)
+        response_text = re.sub(r'\s*```$', '', response_text)
+        response_text = response_text.strip()
+        
+        try:
+            response_json = json.loads(response_text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Standard JSON load failed: {e}. Attempting fallback parsing.")
             
-            logger.info("Sending request to OpenAI API...")
+            # Fallback: Try to extract reply and code separately using Regex
+            reply_match = re.search(r'"reply"\s*:\s*"([^"]*(?:\\.[^"]*)*)"', response_text)
+            code_match = re.search(r'"modified_code"\s*:\s*"([^"]*(?:\\.[^"]*)*)"', response_text, re.DOTALL)
+            
+            if reply_match and code_match:
+                response_json = {
+                    "reply": reply_match.group(1),
+                    "modified_code": code_match.group(1)
+                }
+            else:
+                raise e # Re-raise if fallback fails
+
+        # Extract the keys
+        modified_html = response_json.get("modified_code", html_code)
+        reply_text = response_json.get("reply", "I've processed your request.")
+        
+        # Clean the code content (in case the model wrapped the inner HTML in fences)
+        modified_html = await self.strip_fenced_code(modified_html)
+        
+        # Validate that we got actual HTML back
+        if not modified_html or len(modified_html) < 100:
+            logger.error("Modified HTML is too short or empty")
+            return {
+                "success": False,
+                "error": "AI returned invalid or empty HTML"
+            }
+
+        logger.info(f"✅ Modification complete. Reply: {reply_text[:100]}...")
+        return {
+            "success": True, 
+            "modified_html": modified_html,
+            "reply_text": reply_text
+        }
+
+    async def modify_html(
+        self,
+        html_code: str,
+        prompt: str,
+        history: List[Dict[str, str]] = None,
+        extracted_data: Optional[str] = None,
+    ) -> dict:
+        logger.info(f"🔄 Modifying HTML code with prompt: {prompt[:100]}...")
+        start = time.perf_counter()
+        route = self._route(prompt)
+
+        result = None
+        if self.cache is not None:
+            result = await self.cache.lookup(
+                html_code, prompt, history, extracted_data, route.model, route.mode
+            )
+            if result is not None:
+                logger.info(f"✅ Modification served from cache ({result['cache_hit']}, {self.cache.stats()})")
+
+        if result is None:
+            result = await self._modify(html_code, prompt, history, extracted_data, route)
+            if result["success"] and self.cache is not None:
+                # Under the mode that produced it: a patch request may have fallen back to full
+                await self.cache.store(
+                    html_code, prompt, history, extracted_data, route.model, result["edit_mode"], result
+                )
+        self._observe(route, start, result)
+        return result
+
+    def _route(self, prompt: str) -> Route:
+        if self.router is None:
+            return Route("unrouted", self.model_name, self.mode)
+        return self.router.route(prompt)
+
+    @staticmethod
+    def _observe(route: Route, start: float, result: dict):
+        """Records the request's latency under its request class."""
+        elapsed = time.perf_counter() - start
+        observe_stage(f"modify_{route.request_class}", elapsed, "ok" if result["success"] else "error")
+        logger.info(
+            f"⏱️ {route.request_class} modify request took {elapsed:.2f}s "
+            f"({route.model}, {result.get('edit_mode') or route.mode})"
+        )
+
+    async def _modify(
+        self,
+        html_code: str,
+        prompt: str,
+        history: List[Dict[str, str]] = None,
+        extracted_data: Optional[str] = None,
+        route: Optional[Route] = None,
+    ) -> dict:
+        route = route or self._route(prompt)
+        if route.mode == "advice":
+            return await self._modify_advice(html_code, prompt, history, extracted_data, route.model)
+
+        if route.mode == "patch":
+            try:
+                result = await self._modify_patch(html_code, prompt, history, extracted_data, route.model)
+                if result is not None:
+                    return result
+            except asyncio.TimeoutError:
+                # A second full-document attempt would only time out again
+                logger.error(f"⏱️ AI request timed out after {self.timeout} seconds")
+                return {
+                    "success": False,
+                    "error": "Request timed out. The resume might be too large or the request too complex."
+                }
+            except Exception as e:
+                logger.warning(f"Patch mode failed ({e}); falling back to full regeneration")
+
+        result = await self._modify_full(html_code, prompt, history, extracted_data, route.model)
+        if result["success"]:
+            result.update({"edit_mode": "full", "tokens_saved": 0})
+        return result
+
+    async def _modify_advice(
+        self,
+        html_code: str,
+        prompt: str,
+        history: List[Dict[str, str]] = None,
+        extracted_data: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> dict:
+        """
+        Answers a question about the resume in plain text. The HTML is sent
+        for context but never echoed back, so it comes back unchanged.
+        """
+        model = model or self.model_name
+        try:
+            logger.info(f"Sending advice request to OpenAI API ({model})...")
+            async with stage_timer("llm_modify_advice"):
+                response = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model,
+                        messages=self._build_messages(
+                            html_code, prompt, history, mode="advice", extracted_data=extracted_data
+                        ),
+                        temperature=0.2,
+                    ),
+                    timeout=self.timeout
+                )
+            record_usage(model, getattr(response, "usage", None))
+        except asyncio.TimeoutError:
+            logger.error(f"⏱️ AI request timed out after {self.timeout} seconds")
+            return {
+                "success": False,
+                "error": "Request timed out. The resume might be too large or the request too complex."
+            }
+        except Exception as e:
+            logger.error(f"❌ Advice request failed: {str(e)}", exc_info=True)
+            return {
+                "success": False,
+                "error": f"API communication failed: {str(e)}"
+            }
+
+        return await self._advice_result(
+            html_code, response.choices[0].message.content or "", getattr(response, "usage", None)
+        )
+
+    async def _advice_result(self, html_code: str, reply_text: str, usage) -> dict:
+        reply_text = await self.strip_fenced_code(reply_text)
+        if not reply_text:
+            logger.error("Advice reply is empty")
+            return {"success": False, "error": "AI returned an empty reply"}
+
+        # Compare against a full-document answer, which would have echoed the HTML
+        completion_tokens = usage.completion_tokens if usage else estimate_tokens(reply_text)
+        full_tokens = estimate_tokens(json.dumps({"reply": reply_text, "modified_code": html_code}))
+        logger.info(f"✅ Advice given without regenerating the HTML. Reply: {reply_text[:100]}...")
+        return {
+            "success": True,
+            "modified_html": html_code,
+            "reply_text": reply_text,
+            "edit_mode": "advice",
+            "tokens_saved": max(full_tokens - completion_tokens, 0),
+        }
+
+    async def _modify_patch(
+        self,
+        html_code: str,
+        prompt: str,
+        history: List[Dict[str, str]] = None,
+        extracted_data: Optional[str] = None,
+        model: Optional[str] = None,
+    ):
+        """
+        Asks for targeted edits and applies them locally.
+        Returns None when the edits can't be parsed or applied, so the caller
+        can fall back to full regeneration.
+        """
+        model = model or self.model_name
+        logger.info(f"Sending patch-mode request to OpenAI API ({model})...")
+        async with stage_timer("llm_modify_patch"):
+            response = await asyncio.wait_for(
+                self.client.chat.completions.create(
+                    model=model,
+                    messages=self._build_messages(html_code, prompt, history, mode="patch", extracted_data=extracted_data),
+                    temperature=0.2,
+                    response_format={"type": "json_object"}
+                ),
+                timeout=self.timeout
+            )
+        record_usage(model, getattr(response, "usage", None))
+        response_text = response.choices[0].message.content
+
+        try:
+            response_json = json.loads(await self.strip_fenced_code(response_text))
+            edits = response_json.get("edits") or []
+            reply_text = response_json.get("reply", "I've processed your request.")
+            modified_html = apply_edits(html_code, edits)
+        except (json.JSONDecodeError, AttributeError, PatchError) as e:
+            logger.warning(f"⚠️ Patch rejected, falling back to full regeneration: {e}")
+            return None
+
+        # Compare against what a full-document answer would have cost
+        completion_tokens = (
+            response.usage.completion_tokens if getattr(response, "usage", None) else estimate_tokens(response_text)
+        )
+        full_tokens = estimate_tokens(json.dumps({"reply": reply_text, "modified_code": modified_html}))
+        tokens_saved = max(full_tokens - completion_tokens, 0)
+
+        logger.info(
+            f"✅ Patch applied ({len(edits)} edits, {completion_tokens} output tokens, "
+            f"~{tokens_saved} saved vs full regeneration). Reply: {reply_text[:100]}..."
+        )
+        return {
+            "success": True,
+            "modified_html": modified_html,
+            "reply_text": reply_text,
+            "edit_mode": "patch",
+            "edits_applied": len(edits),
+            "edits": edits,
+            "tokens_saved": tokens_saved,
+        }
+
+    async def _modify_full(
+        self,
+        html_code: str,
+        prompt: str,
+        history: List[Dict[str, str]] = None,
+        extracted_data: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> dict:
+        model = model or self.model_name
+        response_text = ""
+        try:
+            logger.info(f"Sending request to OpenAI API ({model})...")
 
             # Prepare the API call coroutine
             # We use response_format={"type": "json_object"} to enforce valid JSON output
+            messages = self._build_messages(html_code, prompt, history, extracted_data=extracted_data)
             api_coroutine = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_message_content}
-                ],
+                model=model,
+                messages=messages,
                 temperature=0.2,  # Low temperature for stability
                 response_format={"type": "json_object"} 
             )
             
             # Execute with timeout
-            response = await asyncio.wait_for(
-                api_coroutine,
-                timeout=120.0
-            )
+            async with stage_timer("llm_modify_full"):
+                response = await asyncio.wait_for(
+                    api_coroutine,
+                    timeout=self.timeout
+                )
+            record_usage(model, getattr(response, "usage", None))
             
-            # Extract content
-            response_text = response.choices[0].message.content
+            # Extract content; a reply cut off at the token limit is continued
+            # (without json_object mode, which would make the model start a new object)
+            response_text, _ = await continue_chat(
+                self.client, messages, response, agent="modify_full", model=model,
+                temperature=0.2, timeout=self.timeout,
+            )
             logger.info(f"AI response received. Length: {len(response_text)} chars")
 
-            # -------------------------------------------------------
-            # JSON Parsing (Retaining your robust defensive logic)
-            # -------------------------------------------------------
-            
-            # Remove any markdown fences (just in case model ignores json_object enforcement)
-            response_text = re.sub(r'^```json\s*', '', response_text)
-            response_text = re.sub(r'^```\s*', '', response_text)
-            response_text = re.sub(r'\s*```$', '', response_text)
-            response_text = response_text.strip()
-            
-            try:
-                response_json = json.loads(response_text)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Standard JSON load failed: {e}. Attempting fallback parsing.")
-                
-                # Fallback: Try to extract reply and code separately using Regex
-                reply_match = re.search(r'"reply"\s*:\s*"([^"]*(?:\\.[^"]*)*)"', response_text)
-                code_match = re.search(r'"modified_code"\s*:\s*"([^"]*(?:\\.[^"]*)*)"', response_text, re.DOTALL)
-                
-                if reply_match and code_match:
-                    response_json = {
-                        "reply": reply_match.group(1),
-                        "modified_code": code_match.group(1)
-                    }
-                else:
-                    raise e # Re-raise if fallback fails
-
-            # Extract the keys
-            modified_html = response_json.get("modified_code", html_code)
-            reply_text = response_json.get("reply", "I've processed your request.")
-            
-            # Clean the code content (in case the model wrapped the inner HTML in fences)
-            modified_html = await self.strip_fenced_code(modified_html)
-            
-            # Validate that we got actual HTML back
-            if not modified_html or len(modified_html) < 100:
-                logger.error("Modified HTML is too short or empty")
-                return {
-                    "success": False,
-                    "error": "AI returned invalid or empty HTML"
-                }
-
-            logger.info(f"✅ Modification complete. Reply: {reply_text[:100]}...")
-            return {
-                "success": True, 
-                "modified_html": modified_html,
-                "reply_text": reply_text
-            }
+            return await self._parse_response(response_text, html_code)
 
         except asyncio.TimeoutError:
-            logger.error("⏱️ AI request timed out after 120 seconds")
+            logger.error(f"⏱️ AI request timed out after {self.timeout} seconds")
             return {
                 "success": False,
                 "error": "Request timed out. The resume might be too large or the request too complex."
@@ -178,4 +496,179 @@ Respond ONLY with a JSON object containing "reply" (conversational text) and "mo
             return {
                 "success": False,
                 "error": f"API communication failed: {str(e)}"
-            }
\ No newline at end of file
+            }
+
+    async def modify_html_stream(
+        self,
+        html_code: str,
+        prompt: str,
+        history: List[Dict[str, str]] = None,
+        extracted_data: Optional[str] = None,
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Streaming variant of `modify_html`.
+        The model still answers in JSON; the "reply" and "modified_code" string
+        values are decoded as they arrive and relayed as ("reply", {"text"}) and
+        ("delta", {"html"}) events, followed by one ("done", {...modify_html result})
+        or ("error", {"error"}). Advice requests only produce "reply" events.
+        """
+        logger.info(f"🔄 Streaming modification with prompt: {prompt[:100]}...")
+        start = time.perf_counter()
+        route = self._route(prompt)
+        # Streaming has no patch mode: anything but advice is a full-document answer
+        mode = "advice" if route.mode == "advice" else "full"
+
+        if self.cache is not None:
+            cached = await self.cache.lookup(
+                html_code, prompt, history, extracted_data, route.model, mode
+            )
+            if cached is not None:
+                logger.info(f"✅ Streamed modification served from cache ({cached['cache_hit']})")
+                self._observe(route, start, cached)
+                yield "reply", {"text": cached["reply_text"]}
+                yield "done", cached
+                return
+
+        if mode == "advice":
+            events = self._stream_advice(html_code, prompt, history, extracted_data, route.model)
+        else:
+            events = self._stream_full(html_code, prompt, history, extracted_data, route.model)
+        async for event, data in events:
+            if event in ("done", "error"):
+                if event == "done" and self.cache is not None:
+                    # Non-streaming requests for this mode reuse it too
+                    await self.cache.store(
+                        html_code, prompt, history, extracted_data, route.model, mode, data
+                    )
+                self._observe(route, start, data)
+            yield event, data
+
+    async def _stream_advice(
+        self,
+        html_code: str,
+        prompt: str,
+        history: List[Dict[str, str]],
+        extracted_data: Optional[str],
+        model: str,
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """The advice answer is plain text, so every chunk is relayed as a reply event."""
+        chunks = []
+        usage = None
+        try:
+            async with asyncio.timeout(self.timeout), stage_timer("llm_modify_advice_stream"):
+                stream = await self.client.chat.completions.create(
+                    model=model,
+                    messages=self._build_messages(html_code, prompt, history, mode="advice", extracted_data=extracted_data),
+                    temperature=0.2,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        usage = getattr(chunk, "usage", None)
+                        record_usage(model, usage)
+                        continue
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        chunks.append(content)
+                        yield "reply", {"text": content}
+
+            result = await self._advice_result(html_code, "".join(chunks), usage)
+            yield ("done" if result["success"] else "error"), result
+
+        except TimeoutError:
+            logger.error(f"⏱️ Streaming AI request timed out after {self.timeout} seconds")
+            yield "error", {
+                "success": False,
+                "error": "Request timed out. The resume might be too large or the request too complex."
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Streaming advice failed: {str(e)}", exc_info=True)
+            yield "error", {
+                "success": False,
+                "error": f"API communication failed: {str(e)}"
+            }
+
+    async def _stream_full(
+        self,
+        html_code: str,
+        prompt: str,
+        history: List[Dict[str, str]],
+        extracted_data: Optional[str],
+        model: str,
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """
+        The whole document as JSON, with its reply and HTML relayed as they are
+        decoded. An answer cut off at the token limit is continued (like
+        _modify_full) before the final event, and the continuation streams too.
+        """
+        chunks = []
+        streamer = JsonStringFieldStreamer(["reply", "modified_code"])
+        finish_reason = None
+
+        def relay(content: str):
+            chunks.append(content)
+            for field, text in streamer.feed(content):
+                if field == "reply":
+                    yield "reply", {"text": text}
+                else:
+                    yield "delta", {"html": text}
+
+        try:
+            messages = self._build_messages(html_code, prompt, history, extracted_data=extracted_data)
+            async with asyncio.timeout(self.timeout), stage_timer("llm_modify_stream"):
+                stream = await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.2,
+                    response_format={"type": "json_object"},
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        # The final chunk carries only the usage
+                        record_usage(model, getattr(chunk, "usage", None))
+                        continue
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        for event in relay(content):
+                            yield event
+
+            # Without json_object mode, which would make the model start a new object
+            async with asyncio.timeout(self.timeout):
+                continuation = stream_chat_continuations(
+                    self.client, messages, "".join(chunks), finish_reason,
+                    agent="modify_full", model=model, temperature=0.2,
+                )
+                async for content in continuation:
+                    for event in relay(content):
+                        yield event
+
+            result = await self._parse_response("".join(chunks), html_code)
+            if result["success"]:
+                result.update({"edit_mode": "full", "tokens_saved": 0})
+            yield ("done" if result["success"] else "error"), result
+
+        except TimeoutError:
+            logger.error(f"⏱️ Streaming AI request timed out after {self.timeout} seconds")
+            yield "error", {
+                "success": False,
+                "error": "Request timed out. The resume might be too large or the request too complex."
+            }
+
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ Failed to parse streamed JSON: {e}")
+            yield "error", {
+                "success": False,
+                "error": "AI returned invalid JSON format. Please try again."
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Streaming modification failed: {str(e)}", exc_info=True)
+            yield "error", {
+                "success": False,
+                "error": f"API communication failed: {str(e)}"
+            }
@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import time
+from typing import Optional
+
+from openai import AsyncOpenAI
+
+from ..config import settings
+from ..schemas.resume import ResumeData
+from ..services.extraction_cache import ExtractionCache
+from ..services.metrics import record_usage, stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the prompt or the ResumeData schema changes shape,
+# so cached results from the old schema are not served.
+STRUCTURER_VERSION = "resume-schema-1"
+
+
+class ResumeStructurer:
+    """
+    Turns extracted resume text into a typed `ResumeData` (OpenAI structured outputs).
+    Runs once per document; every template is then rendered locally from the
+    result, so switching templates needs no further LLM call.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        cache: Optional[ExtractionCache] = None,
+        model: str = settings.STRUCTURER_MODEL,
+        timeout: float = settings.STRUCTURER_TIMEOUT,
+    ):
+        self.client = client
+        self.cache = cache
+        self.model = model
+        self.timeout = timeout
+
+        self.system_prompt = """
+You are an expert resume parser.
+Convert the resume text into the given JSON schema.
+
+RULES:
+- Copy wording verbatim; do not summarise, embellish or invent anything.
+- Keep dates exactly as written. Use null for anything the resume does not state.
+- Work history goes in `experience`, degrees and schools in `education`,
+  personal/academic projects in `projects`.
+- Group skills the way the resume does; if it has one flat list, use a single group.
+- Everything else (achievements, publications, certifications, positions of
+  responsibility, interests...) goes in `extra_sections`, one per heading.
+"""
+
+    async def structure(self, text: str) -> dict:
+        start = time.time()
+        cache_key = None
+
+        try:
+            if self.cache is not None:
+                digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                cache_key = self.cache.key(digest, STRUCTURER_VERSION, self.model)
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    logger.info("🗄️ Resume schema cache hit")
+                    return {
+                        "success": True,
+                        "resume_data": ResumeData.model_validate(cached["resume_data"]),
+                        "method": "cache",
+                        "execution_time": cached["execution_time"],
+                    }
+
+            logger.info(f"🤖 Calling {self.model} for resume structuring...")
+            async with stage_timer("llm_structure"):
+                response = await self.client.responses.parse(
+                    model=self.model,
+                    input=[
+                        {"role": "system", "content": self.system_prompt},
+                        {"role": "user", "content": text},
+                    ],
+                    text_format=ResumeData,
+                    max_output_tokens=8000,
+                    timeout=self.timeout
+                )
+            record_usage(self.model, getattr(response, "usage", None))
+
+            resume_data = response.output_parsed
+            if resume_data is None:
+                return {"success": False, "error": "Model returned no structured resume"}
+
+            total_time = time.time() - start
+            logger.info(f"🚀 Structuring finished in {total_time:.2f}s")
+
+            if cache_key is not None:
+                await self.cache.set(cache_key, {
+                    "resume_data": resume_data.model_dump(),
+                    "execution_time": total_time,
+                })
+
+            return {
+                "success": True,
+                "resume_data": resume_data,
+                "method": "structured_output",
+                "execution_time": total_time,
+            }
+
+        except Exception as e:
+            logger.exception("❌ Resume structuring failed")
+            return {"success": False, "error": str(e)}
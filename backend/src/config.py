@@ -8,7 +8,136 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     CORS_ORIGINS: Union[List[str], str] = ["*"]
     CLERK_JWKS_URL: Optional[str] = None
+    CLERK_JWKS_TTL: int = 60 * 60  # seconds before cached signing keys are refetched
+    CLERK_TOKEN_CACHE_SIZE: int = 4096  # verified tokens kept in memory
+    CLERK_TOKEN_CACHE_TTL: int = 5 * 60  # upper bound; entries never outlive the token's exp
     OPENAI_API_KEY: Optional[str] = None
+    OPENAI_BASE_URL: Optional[str] = None  # e.g. the benchmark stub server; None uses api.openai.com
+
+    # --- Shared OpenAI HTTP Pool ---
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 60.0  # seconds an idle connection is kept open
+    OPENAI_CONNECT_TIMEOUT: float = 10.0
+    OPENAI_MAX_RETRIES: int = 2
+    OPENAI_HTTP2: bool = True  # only used when the 'h2' package is installed
+
+    # --- OpenAI File Registry ---
+    OPENAI_FILE_REGISTRY_BACKEND: str = "memory"  # "memory" or "redis"
+    OPENAI_FILE_TTL: int = 60 * 60  # seconds an uploaded file is reused before deletion
+    OPENAI_FILE_SWEEP_INTERVAL: float = 5 * 60
+
+    # --- Uploads ---
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024  # larger resumes are rejected with 413 while streaming
+
+    # --- Local (LLM-free) Extraction ---
+    LOCAL_EXTRACTION_ENABLED: bool = True
+    LOCAL_PDF_MIN_CHARS_PER_PAGE: int = 200  # below this a PDF is treated as scanned
+
+    # --- Extraction Cache ---
+    EXTRACTION_CACHE_BACKEND: str = "disk"  # "disk", "redis" or "none"
+    EXTRACTION_CACHE_DIR: str = "cache/extractions"
+    EXTRACTION_CACHE_MAX_BYTES: int = 100 * 1024 * 1024
+    EXTRACTION_CACHE_TTL: int = 30 * 24 * 60 * 60  # seconds, redis backend only
+
+    # --- Per-Agent Model / Timeout ---
+    EXTRACTOR_MODEL: str = "gpt-4o"  # must be gpt-4o or gpt-4.1 for direct file ingestion
+    EXTRACTOR_TIMEOUT: float = 60.0
+    MODIFIER_MODEL: str = "gpt-4.1"
+    MODIFIER_TIMEOUT: float = 120.0
+    MODIFIER_MODE: str = "patch"  # "patch" (targeted edits, full-document fallback) or "full"
+    MODIFIER_CONTEXT_BUDGET: int = 16000  # input tokens per request; HTML and prompt are always sent
+    MODIFIER_HISTORY_SUMMARY_CHARS: int = 200  # older chat turns are shortened to this
+    MODIFIER_ROUTING_ENABLED: bool = True  # classify prompts locally; False sends everything to MODIFIER_MODEL
+    MODIFIER_ADVICE_MODEL: str = "gpt-4.1-mini"  # questions, answered without returning the HTML
+    MODIFIER_EDIT_MODEL: str = "gpt-4.1-mini"  # small literal edits; redesigns use MODIFIER_MODEL
+    CONVERTER_MODEL: str = "gpt-4.1"
+    CONVERTER_TIMEOUT: float = 120.0
+    UNIFIED_MODEL: str = "gpt-4o-mini"
+    UNIFIED_TIMEOUT: float = 120.0
+    STRUCTURER_MODEL: str = "gpt-4o-mini"  # needs structured-output support
+    STRUCTURER_TIMEOUT: float = 60.0
+
+    # --- Modify Response Cache ---
+    MODIFY_CACHE_BACKEND: str = "memory"  # "memory", "redis" or "none"
+    MODIFY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    MODIFY_CACHE_TTL: int = 24 * 60 * 60  # seconds
+
+    # --- Truncation Recovery ---
+    GENERATION_MAX_CONTINUATIONS: int = 2  # follow-up requests for an answer cut off at its token limit
+
+    # --- Structured Rendering ---
+    # Extract a ResumeData schema once, then render Jinja2 templates locally.
+    # Templates without a Jinja2 version still go through the unified LLM fill.
+    STRUCTURED_RENDERING_ENABLED: bool = True
+
+    # --- Template Registry ---
+    TEMPLATE_POLL_INTERVAL: float = 2.0  # seconds between mtime checks; 0 disables reloading
+
+    # --- Template Thumbnails ---
+    THUMBNAIL_DIR: str = "cache/thumbnails"
+    THUMBNAIL_WIDTHS: List[int] = [200, 400, 800]  # pixels
+    THUMBNAIL_FORMATS: List[str] = ["webp", "png"]
+
+    # --- Background Jobs ---
+    JOB_BACKEND: str = "memory"  # "memory" (in-process, dev) or "redis" (shared, multi-node)
+    JOB_INPROCESS_WORKERS: int = 2  # consumers inside the web process; 0 with dedicated workers
+    JOB_WORKER_CONCURRENCY: int = 4  # consumers per `python -m src.worker` process
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF: float = 2.0  # seconds, doubled per attempt
+    JOB_DEFAULT_DEADLINE: float = 5 * 60  # seconds from submission
+    JOB_RESULT_TTL: int = 60 * 60  # seconds a finished job (and its result) is kept
+    JOB_LEASE_SECONDS: float = 30.0  # a job is requeued if its worker stops heartbeating this long
+    JOB_SHUTDOWN_GRACE: float = 25.0  # seconds running jobs get to finish on shutdown
+
+    # --- Batch Processing ---
+    BATCH_MAX_FILES: int = 100  # resumes accepted per /batch/process-html request
+    BATCH_CONCURRENCY: int = 4  # resumes processed at once within one batch
+    BATCH_MAX_RETRIES: int = 3  # per resume, after rate limiting or a full render queue
+    BATCH_RATE_LIMIT_BACKOFF: float = 5.0  # seconds the whole batch pauses on a rate limit, doubled per retry
+
+    # --- PDF Rendering ---
+    PDF_RENDER_WORKERS: int = 2
+    PDF_RENDER_QUEUE_SIZE: int = 8  # jobs allowed to wait on top of the busy workers
+    PDF_RENDER_TIMEOUT: float = 30.0  # seconds
+    PDF_RENDER_MAX_TASKS_PER_WORKER: int = 50  # recycle workers to cap WeasyPrint memory growth
+    PDF_STYLESHEET_CACHE_SIZE: int = 32  # fetched stylesheets and web fonts kept per render worker (by URL)
+
+    # --- Generated Files ---
+    PDF_SPILL_THRESHOLD: int = 16 * 1024 * 1024  # bytes; larger PDFs are sent from a temp file (0 = never)
+    ARTIFACT_MAX_AGE: float = 60 * 60  # seconds before anything left in uploads/ is deleted
+    ARTIFACT_MAX_BYTES: int = 512 * 1024 * 1024  # oldest files are evicted beyond this
+    ARTIFACT_SWEEP_INTERVAL: float = 5 * 60
+
+    # --- Redis ---
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # --- PDF Render Cache ---
+    RENDER_CACHE_BACKEND: str = "memory"  # "memory" or "redis"
+    RENDER_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    RENDER_CACHE_TTL: int = 24 * 60 * 60  # seconds, redis backend only
+
+    # --- Admission Control ---
+    # Token buckets (requests/second with a burst) and in-flight caps, per user
+    # and across all users, for each endpoint class. 0 disables a limit.
+    ADMISSION_BACKEND: str = "memory"  # "memory" (per process), "redis" (shared) or "none"
+    ADMISSION_LEASE_SECONDS: float = 10 * 60  # redis: in-flight slots of a dead process expire after this
+    ADMISSION_LLM_RATE: float = 0.5
+    ADMISSION_LLM_BURST: int = 5
+    ADMISSION_LLM_IN_FLIGHT: int = 2
+    ADMISSION_LLM_GLOBAL_RATE: float = 20.0
+    ADMISSION_LLM_GLOBAL_IN_FLIGHT: int = 64
+    ADMISSION_RENDER_RATE: float = 2.0
+    ADMISSION_RENDER_BURST: int = 10
+    ADMISSION_RENDER_IN_FLIGHT: int = 2
+    ADMISSION_RENDER_GLOBAL_RATE: float = 0
+    ADMISSION_RENDER_GLOBAL_IN_FLIGHT: int = 32
+    ADMISSION_CHEAP_RATE: float = 20.0
+    ADMISSION_CHEAP_BURST: int = 60
+    ADMISSION_CHEAP_IN_FLIGHT: int = 16
+
+    # --- Metrics ---
+    METRICS_ENABLED: bool = True  # Prometheus text format at GET /metrics (per process)
 
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
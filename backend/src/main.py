@@ -1,34 +1,91 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Response, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Response, Depends, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
+from fastapi.responses import FileResponse, JSONResponse, HTMLResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
 from typing import List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import base64
+import json
 import logging
-import aiofiles
-import uuid
-import re
+import time
 import os
+import uuid
 import jwt 
-from jwt import PyJWKClient
 from pathlib import Path
-from io import BytesIO # <--- ADDED for in-memory file conversion
-from weasyprint import HTML
-from weasyprint.text.fonts import FontConfiguration
 
 # --- Internal Imports ---
 from .config import settings
 from .agents.document_extractor import DocumentExtractor
-from .agents.html_extract_and_convert import unified_processor
+from .agents.html_extract_and_convert import UnifiedResumeProcessor
 from .agents.html_modifier import HtmlModifier
+from .agents.resume_structurer import ResumeStructurer
+from .schemas.resume import ResumeData
+from .services.pdf_renderer import pdf_renderer, RenderQueueFullError, RenderTimeoutError
+from .services.pdf_preprocess import preprocess_html_for_pdf
+from .services.render_cache import render_cache
+from .services.redis_client import close_redis
+from .services.clerk_auth import ClerkTokenVerifier
+from .services.llm_client import llm_clients
+from .services.file_registry import file_registry
+from .services.extraction_cache import extraction_cache
+from .services.modify_cache import modify_cache
+from .services.modify_router import modify_router
+from .services.sse import SSE_HEADERS, sse_event, sse_stream
+from .services.template_registry import TemplateRegistry
+from .services.template_renderer import ResumeTemplateRenderer
+from .services.thumbnails import thumbnail_store, MEDIA_TYPES, PREVIEW_NAME
+from .services.artifacts import ArtifactJanitor
+from .services.jobs import job_queue, register_job_handler, TERMINAL, SUCCEEDED
+from .services.batch import BatchRunner
+from .services.uploads import Upload, UploadError, ingest_upload
+from .services.metrics import metrics, stage_timer, RequestMetricsMiddleware
+from .services.admission import admission, AdmissionRejected, retry_after_header, LLM, RENDER, CHEAP
 
 logging.basicConfig(level=logging.DEBUG if settings.DEBUG else logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await template_registry.start()
+    pdf_renderer.start(warm_documents=[t.pdf_html for t in template_registry.list()])
+    await asyncio.to_thread(template_renderer.warm)
+    if clerk_verifier:
+        await clerk_verifier.start()
+
+    # One pooled OpenAI client, injected into every agent
+    llm_clients.start()
+    app.state.extractor = DocumentExtractor(llm_clients.client, file_registry, extraction_cache)
+    app.state.modifier = HtmlModifier(llm_clients.client, modify_cache, router=modify_router)
+    app.state.unified_processor = UnifiedResumeProcessor(llm_clients.client, file_registry, template_registry)
+    app.state.structurer = ResumeStructurer(llm_clients.client, extraction_cache)
+    file_registry.start(llm_clients.client)
+    thumbnail_store.start(template_registry, pdf_renderer)
+    job_queue.start_workers(settings.JOB_INPROCESS_WORKERS)
+    artifact_janitor.start()
+
+    yield
+
+    await artifact_janitor.stop()
+    await job_queue.stop_workers()
+    await thumbnail_store.stop()
+    await file_registry.stop(llm_clients.client)
+    await llm_clients.aclose()
+    if clerk_verifier:
+        await clerk_verifier.stop()
+    await template_registry.stop()
+    pdf_renderer.shutdown()
+    await close_redis()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -39,19 +96,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
 # --- Directories ---
 UPLOAD_DIR = Path("uploads")
 TEMPLATES_UPLOAD_DIR = Path("templates")
 UPLOAD_DIR.mkdir(exist_ok=True)
 TEMPLATES_UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Large responses spill into uploads/; the janitor keeps it bounded
+artifact_janitor = ArtifactJanitor(UPLOAD_DIR)
+
+# Every template held in memory (reloaded when files change on disk)
+template_registry = TemplateRegistry(TEMPLATES_UPLOAD_DIR)
+
+# Local Jinja2 rendering from a ResumeData schema (no LLM involved)
+template_renderer = ResumeTemplateRenderer(template_registry)
+
+# --- Metrics (gauges are read on each scrape of GET /metrics) ---
+def cache_counts() -> dict:
+    """(hits, misses) per cache; caches that are switched off are left out."""
+    counts = {
+        "render": (render_cache.hits, render_cache.misses),
+        "openai_files": (file_registry.hits, file_registry.misses),
+    }
+    if extraction_cache is not None:
+        counts["extraction"] = (extraction_cache.hits, extraction_cache.misses)
+    if modify_cache is not None:
+        # Exact and edit-level hits together
+        counts["modify"] = (sum(modify_cache.hits.values()), modify_cache.misses)
+    return counts
+
+
+def cache_hit_ratios():
+    for cache, (hits, misses) in cache_counts().items():
+        yield {"cache": cache}, hits / (hits + misses) if hits + misses else None
+
+
+async def job_counts():
+    stats = await job_queue.stats()
+    return [({"state": "queued"}, stats["queued"]), ({"state": "running"}, stats["running"])]
+
+
+metrics.gauge(
+    "resumegpt_cache_hits_total", "Cache hits",
+    lambda: [({"cache": cache}, hits) for cache, (hits, _) in cache_counts().items()], "counter"
+)
+metrics.gauge(
+    "resumegpt_cache_misses_total", "Cache misses",
+    lambda: [({"cache": cache}, misses) for cache, (_, misses) in cache_counts().items()], "counter"
+)
+metrics.gauge("resumegpt_cache_hit_ratio", "Hits / lookups since start", cache_hit_ratios)
+metrics.gauge("resumegpt_jobs", "Background jobs waiting to run and running here", job_counts)
+metrics.gauge("resumegpt_pdf_render_pending", "PDF renders queued or running", lambda: pdf_renderer.stats()["pending"])
+metrics.gauge("resumegpt_pdf_render_capacity", "PDF renders accepted before 503s", lambda: pdf_renderer.stats()["capacity"])
+metrics.gauge(
+    "resumegpt_pdf_renders_total", "PDF renders by stylesheet cache state",
+    lambda: [({"kind": kind}, pdf_renderer.stats().get(f"renders_{kind}")) for kind in ("cold", "warm")], "counter"
+)
+metrics.gauge("resumegpt_artifact_bytes", "Bytes held in spilled artifacts", lambda: artifact_janitor.stats()["bytes_held"])
+
 # --- Security Configuration ---
 security = HTTPBearer()
 
 # IMPORTANT: You must add this to your .env or config.py
 CLERK_JWKS_URL = os.environ.get("CLERK_JWKS_URL", getattr(settings, "CLERK_JWKS_URL", ""))
 
-def verify_clerk_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+# Shared across requests so signing keys and verified tokens stay cached
+clerk_verifier = ClerkTokenVerifier(CLERK_JWKS_URL) if CLERK_JWKS_URL else None
+
+async def verify_clerk_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     Middleware: Verifies the Clerk JWT sent in the Authorization header.
     """
@@ -65,16 +180,8 @@ def verify_clerk_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     token = credentials.credentials
     
     try:
-        jwks_client = PyJWKClient(CLERK_JWKS_URL)
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
-        
-        payload = jwt.decode(
-            token,
-            signing_key.key,
-            algorithms=["RS256"],
-            options={"verify_exp": True}
-        )
-        return payload
+        async with stage_timer("auth"):
+            return await clerk_verifier.verify(token)
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
@@ -85,6 +192,43 @@ def verify_clerk_token(credentials: HTTPAuthorizationCredentials = Depends(secur
         logger.error(f"Auth Error: {e}")
         raise HTTPException(status_code=401, detail="Authentication failed")
 
+def admitted(endpoint_class: str):
+    """
+    Dependency: the verified user, once admission control lets the request in.
+    The slot is held until the response (streamed ones included) has been sent.
+    """
+    async def dependency(user: dict = Depends(verify_clerk_token)):
+        if admission is None:
+            yield user
+            return
+        try:
+            granted = await admission.acquire(endpoint_class, user.get("sub"))
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Please retry shortly.",
+                headers={"Retry-After": retry_after_header(e.retry_after)}
+            )
+        try:
+            yield user
+        finally:
+            await admission.release(granted)
+
+    return dependency
+
+# --- Agent Dependencies ---
+def get_extractor(request: Request) -> DocumentExtractor:
+    return request.app.state.extractor
+
+def get_modifier(request: Request) -> HtmlModifier:
+    return request.app.state.modifier
+
+def get_unified_processor(request: Request) -> UnifiedResumeProcessor:
+    return request.app.state.unified_processor
+
+def get_structurer(request: Request) -> ResumeStructurer:
+    return request.app.state.structurer
+
 # --- Models ---
 class ChatMessage(BaseModel):
     role: str = Field(..., description="user or ai")
@@ -96,38 +240,228 @@ class ModifyRequest(BaseModel):
     history: List[ChatMessage] = Field(default_factory=list)
     extracted_data: Optional[str] = None # <--- ADDED: Allow frontend to send context
 
+class RenderTemplateRequest(BaseModel):
+    template_id: str
+    resume_data: ResumeData
+
 # --- Helper Functions ---
-def preprocess_html_for_pdf(html_content: str) -> str:
-    unsupported_properties = [
-        r'backdrop-filter\s*:\s*[^;]+;',
-        r'transform\s*:\s*translate[^;]+;',
-        r'filter\s*:\s*blur[^;]+;',
-        r'clip-path\s*:\s*[^;]+;',
-        r'mix-blend-mode\s*:\s*[^;]+;',
-    ]
-    
-    for prop in unsupported_properties:
-        html_content = re.sub(prop, '', html_content, flags=re.IGNORECASE)
-    
-    print_css = """
-    <style>
-        @page { size: A4; margin: 0; }
-        body { margin: 0; padding: 0; -webkit-print-color-adjust: exact; print-color-adjust: exact; }
-        * { box-sizing: border-box; }
-    </style>
+async def render_pdf_bytes(processed_html: str) -> bytes:
+    """Renders in the PDF worker pool, turning back-pressure into HTTP errors."""
+    try:
+        return await pdf_renderer.render(processed_html)
+    except RenderQueueFullError as e:
+        logger.warning(f"⏳ {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="PDF renderer is busy. Please retry shortly.",
+            headers={"Retry-After": "2"}
+        )
+    except RenderTimeoutError as e:
+        logger.error(f"⏱️ {e}")
+        raise HTTPException(status_code=504, detail="PDF rendering timed out")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Checks an If-None-Match header (list, weak validators or '*') against an ETag."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+async def render_pdf_cached(processed_html: str, digest: Optional[str] = None) -> tuple[bytes, str, bool]:
+    """Returns (pdf_bytes, etag, was_cached), rendering only on a cache miss."""
+    digest = digest or render_cache.digest(processed_html)
+    pdf_bytes, cached = await render_cache.get_or_render(
+        digest, lambda: render_pdf_bytes(processed_html)
+    )
+    return pdf_bytes, f'"{digest}"', cached
+
+async def ingest(file: UploadFile) -> Upload:
+    """Reads an upload once (size-limited, hashed, type-sniffed), turning rejections into HTTP errors."""
+    try:
+        async with stage_timer("upload_read"):
+            return await ingest_upload(file)
+    except UploadError as e:
+        logger.warning(f"🚫 Rejected upload {file.filename}: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+def preprocess_for_pdf(html_content: str) -> str:
+    with stage_timer("html_preprocess"):
+        return preprocess_html_for_pdf(html_content)
+
+
+async def prepare_upload_for_processing(
+    upload: Upload, extractor: DocumentExtractor
+) -> tuple[Optional[Upload], Optional[str]]:
+    """Returns (upload_for_unified_processor, error)."""
+    # OpenAI's API does not accept Word documents. We intercept them (by
+    # content, not extension), extract the text and pass it on as a .txt
+    # upload instead; the original bytes are dropped with the old Upload.
+    if upload.kind in ("docx", "doc"):
+        logger.info(f"📄 Intercepted {upload.kind}: Converting {upload.filename} to .txt for AI...")
+        try:
+            result = await extractor.extract_from_bytes(upload.data, upload.filename, upload.digest)
+
+            if not result.get("success"):
+                return None, f"Extraction failed: {result.get('error')}"
+
+            text_bytes = result["extracted_data"].encode("utf-8")
+            upload = Upload.from_bytes(Path(upload.filename).stem + ".txt", text_bytes)
+
+        except Exception as e:
+            logger.error(f"Error pre-processing docx: {e}")
+            return None, f"Failed to convert docx: {str(e)}"
+    return upload, None
+
+
+def use_structured_rendering(template_id: str) -> bool:
+    return settings.STRUCTURED_RENDERING_ENABLED and template_renderer.supports(template_id)
+
+
+async def process_structured(
+    upload: Upload, template_id: str, extractor: DocumentExtractor, structurer: ResumeStructurer
+) -> dict:
     """
+    Two-stage pipeline: extract text (local or LLM, cached), structure it into
+    ResumeData (one LLM call, cached), then render the template locally.
+    """
+    extraction = await extractor.extract_from_bytes(upload.data, upload.filename, upload.digest)
+    if not extraction.get("success"):
+        return {"success": False, "error": f"Extraction failed: {extraction.get('error')}"}
+
+    structured = await structurer.structure(extraction["extracted_data"])
+    if not structured.get("success"):
+        return {"success": False, "error": f"Structuring failed: {structured.get('error')}"}
+
+    resume_data = structured["resume_data"]
+    return {
+        "success": True,
+        "html_code": template_renderer.render(template_id, resume_data),
+        "extracted_data": extraction["extracted_data"],
+        "resume_data": resume_data.model_dump(),
+    }
+
+
+async def run_process_html(
+    upload: Upload,
+    template_id: str,
+    extractor: DocumentExtractor,
+    unified_processor: UnifiedResumeProcessor,
+    structurer: ResumeStructurer
+) -> dict:
+    """Shared by /process_html and the process_html job."""
+    if use_structured_rendering(template_id):
+        result = await process_structured(upload, template_id, extractor, structurer)
+        if result["success"]:
+            return result
+        logger.warning(f"Structured pipeline failed, falling back to unified fill: {result['error']}")
+
+    upload, error = await prepare_upload_for_processing(upload, extractor)
+    if error:
+        return {"success": False, "error": error}
+
+    result = await unified_processor.process(upload, template_id)
     
-    if '</head>' in html_content:
-        html_content = html_content.replace('</head>', f'{print_css}</head>')
-    elif '<body>' in html_content:
-        html_content = html_content.replace('<body>', f'<body>{print_css}')
-    else:
-        html_content = print_css + html_content
-    
-    return html_content
+    if not result["success"]:
+        return {"success": False, "error": result["error"]}
+        
+    return {
+        "success": True,
+        "html_code": result["html_code"],
+        "extracted_data": result.get("extracted_data", "") # <--- ADDED: Return raw data
+    }
+
+
+async def run_modify_resume(req: "ModifyRequest", modifier: HtmlModifier) -> dict:
+    """Shared by /modify-resume and the modify_resume job."""
+    # extracted_data lets the model see content the template skipped; the
+    # modifier trims it (and the history) to the context budget
+    result = await modifier.modify_html(
+        html_code=req.html_code,
+        prompt=req.prompt,
+        history=req.history,
+        extracted_data=req.extracted_data
+    )
+
+    if not result["success"]:
+        return {"success": False, "error": result.get("error")}
+
+    return {
+        "success": True, 
+        "html_code": result["modified_html"],
+        "reply_text": result["reply_text"],
+        "edit_mode": result.get("edit_mode"),
+        "tokens_saved": result.get("tokens_saved", 0),
+        "cache_hit": result.get("cache_hit")
+    }
+
+
+async def render_batch_pdf(html_code: str) -> bytes:
+    """Like render_pdf_cached, but lets RenderQueueFullError through so the batch can retry."""
+    processed_html = preprocess_for_pdf(html_code)
+    pdf_bytes, _ = await render_cache.get_or_render(
+        render_cache.digest(processed_html), lambda: pdf_renderer.render(processed_html)
+    )
+    return pdf_bytes
+
+
+async def admit_batch_item(user_id: str):
+    """An LLM admission for one batch item, waiting (not failing) while the user is at their limit."""
+    while True:
+        try:
+            return await admission.acquire(LLM, user_id)
+        except AdmissionRejected as e:
+            await asyncio.sleep(e.retry_after)
+
+
+def batch_runner(
+    template_id: str,
+    render_pdf: bool = True,
+    concurrency: int = settings.BATCH_CONCURRENCY,
+    user_id: Optional[str] = None,
+) -> BatchRunner:
+    """
+    Shared by /batch/process-html and the command-line batch (backend/main.py).
+    With a `user_id`, every item is admitted as an LLM request of that user,
+    so a batch runs no more resumes at once than their in-flight limit.
+    """
+    async def process(filename: str, data: bytes) -> dict:
+        try:
+            upload = Upload.from_bytes(filename, data)
+        except UploadError as e:
+            return {"success": False, "error": str(e)}
+        granted = await admit_batch_item(user_id) if admission and user_id else None
+        try:
+            return await run_process_html(
+                upload, template_id,
+                app.state.extractor, app.state.unified_processor, app.state.structurer
+            )
+        finally:
+            if granted is not None:
+                await admission.release(granted)
+
+    return BatchRunner(process, render_batch_pdf if render_pdf else None, concurrency=concurrency)
+
+
+async def single_sse_event(event: str, data: dict):
+    yield sse_event(event, data)
 
 # --- Routes ---
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        """Prometheus scrape endpoint (values are for this process only)."""
+        return Response(await metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/")
 async def root():
     return {"app": settings.APP_NAME, "status": "ready", "mode": "HTML/CSS", "auth": "Enabled"}
@@ -136,21 +470,17 @@ async def root():
 @app.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
-    user: dict = Depends(verify_clerk_token)
+    user: dict = Depends(admitted(LLM)),
+    extractor: DocumentExtractor = Depends(get_extractor)
 ):
     """Extract text from uploaded file."""
     logger.info(f"📄 Upload request: {file.filename} by user {user.get('sub')}")
 
-    allowed_ext = {".pdf", ".docx", ".doc", ".txt", ".pptx", ".xlsx", ".csv"}
-    ext = Path(file.filename).suffix.lower()
-
-    if ext not in allowed_ext:
-        raise HTTPException(status_code=400, detail="Unsupported file format")
+    # Size-limited and sniffed from its content (415 for unsupported types)
+    upload = await ingest(file)
 
     try:
-        file_bytes = await file.read()
-        extractor = DocumentExtractor()
-        result = await extractor.extract_from_bytes(file_bytes, file.filename)
+        result = await extractor.extract_from_bytes(upload.data, upload.filename, upload.digest)
 
         if not result.get("success"):
             raise HTTPException(status_code=500, detail=result.get("error"))
@@ -171,76 +501,85 @@ async def upload_file(
 async def process_html(
     file: UploadFile = File(...),
     template_id: str = Form(...),
-    user: dict = Depends(verify_clerk_token)
+    user: dict = Depends(admitted(LLM)),
+    extractor: DocumentExtractor = Depends(get_extractor),
+    unified_processor: UnifiedResumeProcessor = Depends(get_unified_processor),
+    structurer: ResumeStructurer = Depends(get_structurer)
 ):
     """UNIFIED ENDPOINT: Takes Resume + Template ID -> Returns Filled HTML."""
     logger.info(f"⚙️ Processing HTML for user {user.get('sub')}")
 
-    # --- FIX START: Handle .docx files for OpenAI ---
-    # OpenAI's API does not accept .docx. We intercept them, extract text, 
-    # and pass it as a .txt file instead.
-    filename = file.filename.lower()
-    if filename.endswith((".docx", ".doc")):
-        logger.info(f"📄 Intercepted .docx: Converting {filename} to .txt for AI...")
-        try:
-            # 1. Read the file
-            file_bytes = await file.read()
-            
-            # 2. Extract text using DocumentExtractor
-            extractor = DocumentExtractor()
-            result = await extractor.extract_from_bytes(file_bytes, file.filename)
-            
-            if not result.get("success"):
-                return {"success": False, "error": f"Extraction failed: {result.get('error')}"}
-            
-            text_content = result["extracted_data"]
-            
-            # 3. Create a mock .txt file in memory
-            # We wrap the text in a BytesIO object so it acts like a file
-            new_file_obj = BytesIO(text_content.encode("utf-8"))
-            
-            # 4. Create a new UploadFile object with .txt extension
-            # This tricks the unified_processor into thinking it received a text file
-            new_filename = Path(file.filename).stem + ".txt"
-            file = UploadFile(file=new_file_obj, filename=new_filename)
-            
-        except Exception as e:
-            logger.error(f"Error pre-processing docx: {e}")
-            return {"success": False, "error": f"Failed to convert docx: {str(e)}"}
-    # --- FIX END ---
+    upload = await ingest(file)
+    return await run_process_html(upload, template_id, extractor, unified_processor, structurer)
 
-    result = await unified_processor.process(file, template_id, TEMPLATES_UPLOAD_DIR)
-    
-    if not result["success"]:
-        return {"success": False, "error": result["error"]}
-        
-    return {
-        "success": True,
-        "html_code": result["html_code"],
-        "extracted_data": result.get("extracted_data", "") # <--- ADDED: Return raw data
-    }
+
+@app.post("/process_html/stream")
+async def process_html_stream(
+    file: UploadFile = File(...),
+    template_id: str = Form(...),
+    user: dict = Depends(admitted(LLM)),
+    extractor: DocumentExtractor = Depends(get_extractor),
+    unified_processor: UnifiedResumeProcessor = Depends(get_unified_processor),
+    structurer: ResumeStructurer = Depends(get_structurer)
+):
+    """
+    Streaming /process_html. Server-Sent Events:
+    `delta` {"html"} chunks as generated, then one `done` {"success", "html_code"}
+    or `error` {"error"}.
+    Templates with a structured version are rendered locally and answer with
+    a single `done` event (which also carries `resume_data`).
+    """
+    logger.info(f"⚙️ Streaming HTML processing for user {user.get('sub')}")
+
+    # In memory, so it outlives the request's UploadFile (closed when this handler returns)
+    upload = await ingest(file)
+    if use_structured_rendering(template_id):
+        result = await process_structured(upload, template_id, extractor, structurer)
+        if result["success"]:
+            return StreamingResponse(
+                single_sse_event("done", result), media_type="text/event-stream", headers=SSE_HEADERS
+            )
+        logger.warning(f"Structured pipeline failed, falling back to unified fill: {result['error']}")
+
+    upload, error = await prepare_upload_for_processing(upload, extractor)
+    if error:
+        body = single_sse_event("error", {"success": False, "error": error})
+    else:
+        body = sse_stream(unified_processor.process_stream(upload, template_id))
+
+    return StreamingResponse(body, media_type="text/event-stream", headers=SSE_HEADERS)
 
 
 @app.post("/generate-pdf")
 async def generate_pdf(
     html_content: str = Form(...),
-    user: dict = Depends(verify_clerk_token)
+    user: dict = Depends(admitted(RENDER))
 ):
     """Converts HTML string to PDF using WeasyPrint."""
     try:
-        output_filename = f"resume-{uuid.uuid4().hex[:8]}.pdf"
-        output_path = UPLOAD_DIR / output_filename
+        processed_html = preprocess_for_pdf(html_content)
+        pdf_bytes, etag, _ = await render_pdf_cached(processed_html)
+
+        # Served straight from memory; only unusually large files go to disk,
+        # and those are deleted as soon as the response has been sent.
+        threshold = settings.PDF_SPILL_THRESHOLD
+        if threshold and len(pdf_bytes) > threshold:
+            output_path = await artifact_janitor.spill(pdf_bytes, ".pdf")
+            return FileResponse(
+                path=output_path,
+                filename="resume.pdf",
+                media_type="application/pdf",
+                headers={"ETag": etag},
+                background=BackgroundTask(artifact_janitor.discard, output_path)
+            )
 
-        processed_html = preprocess_html_for_pdf(html_content)
-        font_config = FontConfiguration()
-        
-        HTML(string=processed_html).write_pdf(output_path, font_config=font_config)
-        
-        return FileResponse(
-            path=output_path,
-            filename="resume.pdf",
-            media_type="application/pdf"
+        return Response(
+            content=pdf_bytes,
+            media_type="application/pdf",
+            headers={"Content-Disposition": 'attachment; filename="resume.pdf"', "ETag": etag}
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"PDF Generation Error: {e}", exc_info=True)
         raise HTTPException(500, detail=f"PDF Generation failed: {str(e)}")
@@ -249,31 +588,17 @@ async def generate_pdf(
 @app.post("/modify-resume")
 async def modify_resume(
     req: ModifyRequest,
-    user: dict = Depends(verify_clerk_token)
+    user: dict = Depends(admitted(LLM)),
+    modifier: HtmlModifier = Depends(get_modifier)
 ):
     """AI Chat to modify the HTML code."""
     logger.info(f"🔄 Modify request from user {user.get('sub')}")
     
     try:
-        # Include extracted data in the prompt context if available
-        # This ensures the LLM knows about content that might have been skipped in the initial template
-        enhanced_prompt = req.prompt
-        if req.extracted_data:
-            enhanced_prompt = f"CONTEXT FROM ORIGINAL RESUME:\n{req.extracted_data}\n\nUSER REQUEST:\n{req.prompt}"
-
-        modifier = HtmlModifier()
-        result = await modifier.modify_html(
-            html_code=req.html_code,
-            prompt=enhanced_prompt, # <--- CHANGED: Send context-aware prompt
-            history=req.history
-        )
+        result = await run_modify_resume(req, modifier)
         
         if result["success"]:
-            return {
-                "success": True, 
-                "html_code": result["modified_html"],
-                "reply_text": result["reply_text"]
-            }
+            return result
         else:
             raise HTTPException(500, detail=result.get("error"))
     
@@ -282,38 +607,162 @@ async def modify_resume(
         raise HTTPException(500, detail=f"Modification failed: {str(e)}")
 
 
+@app.post("/modify-resume/stream")
+async def modify_resume_stream(
+    req: ModifyRequest,
+    user: dict = Depends(admitted(LLM)),
+    modifier: HtmlModifier = Depends(get_modifier)
+):
+    """
+    Streaming /modify-resume. Server-Sent Events:
+    `reply` {"text"} and `delta` {"html"} chunks as generated, then one
+    `done` {"success", "html_code", "reply_text"} or `error` {"error"}.
+    """
+    logger.info(f"🔄 Streaming modify request from user {user.get('sub')}")
+
+    async def events():
+        async for event, data in modifier.modify_html_stream(
+            html_code=req.html_code,
+            prompt=req.prompt,
+            history=req.history,
+            extracted_data=req.extracted_data
+        ):
+            if event == "done":
+                # Same shape as the non-streaming endpoint
+                data = {"success": True, "html_code": data["modified_html"], "reply_text": data["reply_text"]}
+            yield event, data
+
+    return StreamingResponse(sse_stream(events()), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @app.get("/templates")
 async def list_templates(
-    user: dict = Depends(verify_clerk_token)
+    request: Request,
+    user: dict = Depends(admitted(CHEAP))
 ):
-    """Lists available HTML templates."""
+    """Lists available HTML templates (from memory; ETag changes whenever any template does)."""
+    etag = template_registry.etag
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
     templates = []
-    for file_path in TEMPLATES_UPLOAD_DIR.glob("*.html"):
+    for template in template_registry.list():
         templates.append({
-            "id": file_path.stem, 
-            "name": file_path.stem.replace("_", " ").title(),
-            "filename": file_path.name
+            "id": template.id,
+            "name": template.name,
+            "filename": template.filename,
+            "structured": template_renderer.supports(template.id),
+            "hash": template.digest,
+            # Versioned by content hash, so browsers may cache them forever
+            "thumbnail_url": f"/templates/{template.id}/thumbnail?v={template.digest[:16]}",
+            "preview_url": f"/templates/{template.id}/preview?v={template.digest[:16]}"
         })
-    return {"templates": templates}
+    return JSONResponse({"templates": templates}, headers=headers)
+
+
+async def serve_template_preview(
+    request: Request, template_id: str, name: str, version: Optional[str]
+) -> Response:
+    """Serves a pre-rendered preview file, with long-lived caching for hash-versioned URLs."""
+    template = template_registry.get(template_id)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    etag = f'"{template.digest}-{name}"'
+    if version and template.digest.startswith(version):
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "public, no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        content = await thumbnail_store.get(template, pdf_renderer, name)
+    except RenderQueueFullError:
+        raise HTTPException(status_code=503, detail="Preview is being rendered. Please retry shortly.", headers={"Retry-After": "2"})
+    except RenderTimeoutError:
+        raise HTTPException(status_code=504, detail="Preview rendering timed out")
+    if content is None:
+        raise HTTPException(status_code=404, detail="Preview not available")
+
+    return Response(content=content, media_type=MEDIA_TYPES[name.rsplit(".", 1)[1]], headers=headers)
+
+
+# Thumbnails are used directly as <img src>, which can't carry a bearer
+# token, and only ever show the bundled templates, so they are public.
+@app.get("/templates/{template_id}/thumbnail")
+async def template_thumbnail(
+    template_id: str,
+    request: Request,
+    width: Optional[int] = None,
+    format: str = "webp",
+    v: Optional[str] = None
+):
+    """First-page thumbnail of a template. `width` snaps to the nearest pre-rendered size."""
+    if format not in thumbnail_store.formats:
+        raise HTTPException(status_code=400, detail=f"format must be one of {thumbnail_store.formats}")
+    name = f"{thumbnail_store.pick_width(width)}.{format}"
+    return await serve_template_preview(request, template_id, name, v)
+
+
+@app.get("/templates/{template_id}/preview")
+async def template_preview_pdf(
+    template_id: str,
+    request: Request,
+    v: Optional[str] = None
+):
+    """The template rendered to PDF as-is."""
+    return await serve_template_preview(request, template_id, PREVIEW_NAME, v)
+
+
+@app.post("/render-template")
+async def render_template(
+    req: RenderTemplateRequest,
+    user: dict = Depends(admitted(CHEAP))
+):
+    """Renders a template from `resume_data` (as returned by /process_html). No LLM call."""
+    if not template_renderer.supports(req.template_id):
+        raise HTTPException(status_code=404, detail="Template has no structured version")
+
+    return {
+        "success": True,
+        "html_code": template_renderer.render(req.template_id, req.resume_data)
+    }
 
 
 @app.post("/preview-pdf-bytes")
 async def preview_pdf_bytes(
+    request: Request,
     html_content: str = Form(...),
-    user: dict = Depends(verify_clerk_token)
+    user: dict = Depends(admitted(RENDER))
 ):
     """Generates PDF but returns raw bytes for preview."""
     try:
-        processed_html = preprocess_html_for_pdf(html_content)
-        font_config = FontConfiguration()
-        
-        pdf_bytes = HTML(string=processed_html).write_pdf(font_config=font_config)
+        processed_html = preprocess_for_pdf(html_content)
+
+        # The ETag is the digest of the processed HTML, so a client that
+        # already holds this render can skip the body entirely.
+        digest = render_cache.digest(processed_html)
+        etag = f'"{digest}"'
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        pdf_bytes, etag, cached = await render_pdf_cached(processed_html, digest)
         
         return Response(
             content=pdf_bytes,
             media_type="application/pdf",
-            headers={"Content-Disposition": "inline; filename=preview.pdf"}
+            headers={
+                "Content-Disposition": "inline; filename=preview.pdf",
+                "ETag": etag,
+                "Cache-Control": "private, no-cache",
+                "X-Render-Cache": "hit" if cached else "miss",
+            }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"PDF Preview Error: {e}", exc_info=True)
         raise HTTPException(500, detail=f"PDF Preview generation failed: {str(e)}")
@@ -322,15 +771,238 @@ async def preview_pdf_bytes(
 @app.get("/templates/get-raw-code")
 async def get_raw_template_code(
     filename: str,
-    user: dict = Depends(verify_clerk_token)
+    request: Request,
+    user: dict = Depends(admitted(CHEAP))
 ):
     """Returns the rendered HTML of a template for preview."""
-    file_path = TEMPLATES_UPLOAD_DIR / filename
+    template = template_registry.get(filename)
     
-    if not file_path.exists():
+    if template is None:
         raise HTTPException(status_code=404, detail="Template not found")
-        
-    async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
-        content = await f.read()
+
+    headers = {"ETag": template.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), template.etag):
+        return Response(status_code=304, headers=headers)
     
-    return HTMLResponse(content=content)
\ No newline at end of file
+    return HTMLResponse(content=template.content, headers=headers)
+
+
+# --- Background Jobs ---
+# Same work as the inline endpoints above, executed by job workers (in this
+# process, or `python -m src.worker` processes when JOB_BACKEND=redis).
+
+@register_job_handler("process_html")
+async def process_html_job(job: dict) -> dict:
+    payload = job["payload"]
+    # Already checked when the job was submitted
+    upload = Upload.from_bytes(payload["filename"], base64.b64decode(payload["file"]))
+    result = await run_process_html(
+        upload, payload["template_id"],
+        app.state.extractor, app.state.unified_processor, app.state.structurer
+    )
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return result
+
+
+@register_job_handler("modify_resume")
+async def modify_resume_job(job: dict) -> dict:
+    result = await run_modify_resume(ModifyRequest.model_validate(job["payload"]), app.state.modifier)
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return result
+
+
+@register_job_handler("generate_pdf")
+async def generate_pdf_job(job: dict) -> dict:
+    processed_html = preprocess_for_pdf(job["payload"]["html_content"])
+    pdf_bytes, etag, _ = await render_pdf_cached(processed_html)
+    await job_queue.put_blob(job["id"], pdf_bytes)
+    return {"success": True, "etag": etag, "size": len(pdf_bytes)}
+
+
+def job_view(job: dict) -> dict:
+    view = job_queue.public_view(job)
+    view["status_url"] = f"/jobs/{job['id']}"
+    view["events_url"] = f"/jobs/{job['id']}/events"
+    if job["kind"] == "generate_pdf":
+        view["result_url"] = f"/jobs/{job['id']}/result"
+    return view
+
+
+async def submit_job(kind: str, payload: dict, user: dict, idempotency_key: Optional[str]) -> JSONResponse:
+    job, created = await job_queue.submit(kind, payload, owner=user.get("sub"), idempotency_key=idempotency_key)
+    # 202 for a new job; 200 when the idempotency key returned an existing one
+    return JSONResponse(job_view(job), status_code=202 if created else 200)
+
+
+async def get_owned_job(job_id: str, user: dict) -> dict:
+    job = await job_queue.get(job_id)
+    if job is None or job.get("owner") != user.get("sub"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/jobs/process-html", status_code=202)
+async def submit_process_html_job(
+    file: UploadFile = File(...),
+    template_id: str = Form(...),
+    idempotency_key: Optional[str] = Header(None),
+    user: dict = Depends(admitted(LLM))
+):
+    """Queues /process_html work. Poll `status_url` or stream `events_url`."""
+    upload = await ingest(file)
+    payload = {
+        "filename": upload.filename,
+        "file": base64.b64encode(upload.data).decode("ascii"),
+        "template_id": template_id,
+    }
+    return await submit_job("process_html", payload, user, idempotency_key)
+
+
+@app.post("/jobs/modify-resume", status_code=202)
+async def submit_modify_resume_job(
+    req: ModifyRequest,
+    idempotency_key: Optional[str] = Header(None),
+    user: dict = Depends(admitted(LLM))
+):
+    """Queues /modify-resume work."""
+    return await submit_job("modify_resume", req.model_dump(), user, idempotency_key)
+
+
+@app.post("/jobs/generate-pdf", status_code=202)
+async def submit_generate_pdf_job(
+    html_content: str = Form(...),
+    idempotency_key: Optional[str] = Header(None),
+    user: dict = Depends(admitted(RENDER))
+):
+    """Queues a PDF render; the file is served from `result_url` once it succeeds."""
+    return await submit_job("generate_pdf", {"html_content": html_content}, user, idempotency_key)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    user: dict = Depends(admitted(CHEAP))
+):
+    """Job status, plus `result` once it has succeeded or `error` once it has failed."""
+    return job_view(await get_owned_job(job_id, user))
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    user: dict = Depends(admitted(CHEAP))
+):
+    """
+    Server-Sent Events: `status` {"status", "attempts"} on every change, then
+    one `done` (the job view, including `result`) or `error` {"error"}.
+    """
+    job = await get_owned_job(job_id, user)
+
+    async def events():
+        last = None
+        last_sent = time.time()
+        current = job
+        while True:
+            state = (current["status"], current["attempts"])
+            if state != last:
+                last, last_sent = state, time.time()
+                yield sse_event("status", {"status": state[0], "attempts": state[1]})
+            if current["status"] in TERMINAL:
+                if current["status"] == SUCCEEDED:
+                    yield sse_event("done", job_view(current))
+                else:
+                    yield sse_event("error", {"success": False, "error": current["error"]})
+                return
+            if time.time() - last_sent > 15:
+                # Comment line: keeps idle proxies from closing the stream
+                last_sent = time.time()
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(0.5)
+            current = await job_queue.get(job_id)
+            if current is None:
+                yield sse_event("error", {"success": False, "error": "Job expired"})
+                return
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    user: dict = Depends(admitted(CHEAP))
+):
+    """The rendered PDF of a succeeded generate_pdf job."""
+    job = await get_owned_job(job_id, user)
+    if job["status"] != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    if job["kind"] != "generate_pdf":
+        return job["result"]
+
+    pdf_bytes = await job_queue.get_blob(job_id)
+    if pdf_bytes is None:
+        raise HTTPException(status_code=404, detail="Result expired")
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": "attachment; filename=resume.pdf", "ETag": job["result"]["etag"]}
+    )
+
+
+# --- Batch Processing ---
+
+def batch_archive_key(user: dict, batch_id: str) -> str:
+    # Stored beside job results; the owner is part of the key
+    return f"batch:{user.get('sub')}:{batch_id}"
+
+
+@app.post("/batch/process-html")
+async def batch_process_html(
+    files: List[UploadFile] = File(...),
+    template_id: str = Form(...),
+    render_pdf: bool = Form(True),
+    user: dict = Depends(admitted(CHEAP))
+):
+    """
+    Converts many resumes with one template. Streams NDJSON as resumes finish:
+    one `item` line each {"index", "filename", "success", "html_file",
+    "pdf_file" | "error", "attempts", "elapsed"}, then a `done` line with the
+    totals and `archive_url`, a zip of every output. Each resume takes an LLM
+    admission of its own while it is processed.
+    """
+    if len(files) > settings.BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_FILES} files per batch")
+
+    logger.info(f"📦 Batch of {len(files)} resumes ({template_id}) for user {user.get('sub')}")
+    # The uploads are closed once this handler returns, so read them now
+    uploads = [await ingest(file) for file in files]
+    items = [(upload.filename, upload.data) for upload in uploads]
+    batch_id = uuid.uuid4().hex
+    runner = batch_runner(template_id, render_pdf, user_id=user.get("sub"))
+
+    async def lines():
+        async for item in runner.run(items):
+            yield json.dumps({"event": "item", **item}) + "\n"
+        await job_queue.put_blob(batch_archive_key(user, batch_id), runner.archive())
+        done = {"event": "done", "batch_id": batch_id, **runner.summary()}
+        done["archive_url"] = f"/batch/{batch_id}/archive"
+        yield json.dumps(done) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/batch/{batch_id}/archive")
+async def get_batch_archive(
+    batch_id: str,
+    user: dict = Depends(admitted(CHEAP))
+):
+    """The zip produced by a finished batch (kept for JOB_RESULT_TTL)."""
+    archive = await job_queue.get_blob(batch_archive_key(user, batch_id))
+    if archive is None:
+        raise HTTPException(status_code=404, detail="Archive not found")
+    return Response(
+        content=archive,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="batch-{batch_id}.zip"'}
+    )
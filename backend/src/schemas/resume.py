@@ -0,0 +1,53 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+# NOTE: these models double as the OpenAI structured-output schema (strict mode),
+# so every field is either required, Optional with a None default, or a list.
+# Keep descriptions short: they are sent to the model on every extraction.
+
+
+class Link(BaseModel):
+    label: str = Field(..., description="Display text, e.g. 'GitHub' or 'linkedin.com/in/jane'")
+    url: str
+
+
+class Contact(BaseModel):
+    name: str
+    headline: Optional[str] = Field(None, description="Current title or one-line professional headline")
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    location: Optional[str] = None
+    links: List[Link] = Field(default_factory=list)
+
+
+class Entry(BaseModel):
+    """One job, degree, project or position."""
+    title: str = Field(..., description="Company, institution, project or organisation name")
+    subtitle: Optional[str] = Field(None, description="Role, degree or short description")
+    location: Optional[str] = None
+    date: Optional[str] = Field(None, description="Date range exactly as written, e.g. 'May 2021 – Present'")
+    detail: Optional[str] = Field(None, description="Grade/GPA, guide, team size or similar one-line detail")
+    bullets: List[str] = Field(default_factory=list)
+
+
+class SkillGroup(BaseModel):
+    category: str
+    items: List[str] = Field(default_factory=list)
+
+
+class Section(BaseModel):
+    """Any other section (achievements, publications, certifications, hobbies...)."""
+    title: str
+    entries: List[Entry] = Field(default_factory=list)
+    bullets: List[str] = Field(default_factory=list)
+
+
+class ResumeData(BaseModel):
+    contact: Contact
+    summary: Optional[str] = None
+    experience: List[Entry] = Field(default_factory=list)
+    education: List[Entry] = Field(default_factory=list)
+    projects: List[Entry] = Field(default_factory=list)
+    skills: List[SkillGroup] = Field(default_factory=list)
+    extra_sections: List[Section] = Field(default_factory=list)
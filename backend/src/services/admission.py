@@ -0,0 +1,287 @@
+import logging
+import math
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from ..config import settings
+from .metrics import metrics
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Endpoint classes: what a request costs us
+LLM = "llm"  # OpenAI calls (and our rate limit with them)
+RENDER = "render"  # WeasyPrint work in the render pool
+CHEAP = "cheap"  # in-memory reads, local template rendering
+
+# Seconds a client is told to wait when a concurrency cap (not a rate) is hit
+IN_FLIGHT_RETRY_AFTER = 1
+
+ADMISSIONS = metrics.counter(
+    "resumegpt_admission_total", "Admission decisions per endpoint class", ["endpoint_class", "outcome"]
+)
+
+
+@dataclass(frozen=True)
+class ClassLimits:
+    """Per-user and global limits for one endpoint class; 0 disables a limit."""
+    rate: float  # requests per second, per user
+    burst: int  # per-user bucket size
+    in_flight: int  # concurrent requests per user
+    global_rate: float = 0
+    global_in_flight: int = 0
+
+    @property
+    def global_burst(self) -> float:
+        # Two seconds of traffic at the global rate
+        return max(self.global_rate * 2, 1)
+
+
+def limits_from_settings() -> Dict[str, ClassLimits]:
+    return {
+        LLM: ClassLimits(
+            settings.ADMISSION_LLM_RATE, settings.ADMISSION_LLM_BURST, settings.ADMISSION_LLM_IN_FLIGHT,
+            settings.ADMISSION_LLM_GLOBAL_RATE, settings.ADMISSION_LLM_GLOBAL_IN_FLIGHT,
+        ),
+        RENDER: ClassLimits(
+            settings.ADMISSION_RENDER_RATE, settings.ADMISSION_RENDER_BURST, settings.ADMISSION_RENDER_IN_FLIGHT,
+            settings.ADMISSION_RENDER_GLOBAL_RATE, settings.ADMISSION_RENDER_GLOBAL_IN_FLIGHT,
+        ),
+        CHEAP: ClassLimits(
+            settings.ADMISSION_CHEAP_RATE, settings.ADMISSION_CHEAP_BURST, settings.ADMISSION_CHEAP_IN_FLIGHT,
+        ),
+    }
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class MemoryAdmissionBackend:
+    """Buckets and in-flight counts local to this process (limits apply per worker process)."""
+
+    # Idle buckets are dropped once there are this many
+    PRUNE_AT = 10_000
+
+    def __init__(self):
+        # key -> (tokens, updated_at, seconds an empty bucket takes to refill)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    def _prune(self, now: float):
+        # A bucket that has refilled completely is the same as no bucket; each
+        # refills on its own class's terms
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < v[2]}
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Takes one token; returns 0 when admitted, otherwise seconds until a token is available."""
+        now = time.monotonic()
+        tokens, updated_at, _ = self._buckets.get(key, (burst, now, 0))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now, burst / rate)
+            if len(self._buckets) > self.PRUNE_AT:
+                self._prune(now)
+            return 0.0
+        self._buckets[key] = (tokens, now, burst / rate)
+        return (1 - tokens) / rate
+
+    async def acquire(self, key: str, limit: int, ticket: str) -> bool:
+        count = self._in_flight.get(key, 0)
+        if count >= limit:
+            return False
+        self._in_flight[key] = count + 1
+        return True
+
+    async def release(self, key: str, ticket: str):
+        count = self._in_flight.get(key, 0) - 1
+        if count > 0:
+            self._in_flight[key] = count
+        else:
+            self._in_flight.pop(key, None)
+
+
+class RedisAdmissionBackend:
+    """
+    Limits shared by every web process.
+    -----------------------------------
+    - bucket hash    resumegpt:admit:bucket:<key>    (tokens, updated_at)
+    - in-flight zset resumegpt:admit:flight:<key>    (ticket -> lease expiry)
+    Both are updated by Lua scripts so concurrent requests can't overshoot.
+    In-flight tickets carry a lease, so a process that dies mid-request
+    doesn't hold its slots forever.
+    """
+
+    PREFIX = "resumegpt:admit:"
+
+    TAKE_SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(state[1]) or burst
+    local updated_at = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+    return tostring(wait)
+    """
+
+    ACQUIRE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[4])
+    redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[3])))
+    return 1
+    """
+
+    def __init__(self, lease_seconds: float = settings.ADMISSION_LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        wait = await get_redis().eval(self.TAKE_SCRIPT, 1, f"{self.PREFIX}bucket:{key}", rate, burst, time.time())
+        return float(wait)
+
+    async def acquire(self, key: str, limit: int, ticket: str) -> bool:
+        admitted = await get_redis().eval(
+            self.ACQUIRE_SCRIPT, 1, f"{self.PREFIX}flight:{key}", time.time(), limit, self.lease_seconds, ticket
+        )
+        return bool(admitted)
+
+    async def release(self, key: str, ticket: str):
+        await get_redis().zrem(f"{self.PREFIX}flight:{key}", ticket)
+
+
+@dataclass
+class Admission:
+    """Slots held by an admitted request; hand back to AdmissionController.release()."""
+    endpoint_class: str
+    ticket: str
+    keys: List[str]
+
+
+class AdmissionController:
+    """
+    Per-user and global admission control.
+    --------------------------------------
+    Each endpoint class has a token bucket per user and one shared by all
+    users (requests per second, with a burst), plus in-flight caps per user
+    and overall. Concurrency caps are checked first so a request turned
+    away for being one too many doesn't also spend a token. Rejections raise
+    AdmissionRejected with the seconds to wait; if the backend itself fails,
+    requests are let through rather than turned away.
+    """
+
+    def __init__(self, backend, limits: Dict[str, ClassLimits]):
+        self.backend = backend
+        self.limits = limits
+        self.in_flight: Dict[str, int] = {name: 0 for name in limits}
+
+    async def _acquire_slots(self, endpoint_class: str, user_id: str, ticket: str) -> List[str]:
+        limits = self.limits[endpoint_class]
+        caps = [
+            (f"{endpoint_class}:user:{user_id}", limits.in_flight, "in_flight_user"),
+            (f"{endpoint_class}:global", limits.global_in_flight, "in_flight_global"),
+        ]
+        held = []
+        try:
+            for key, limit, reason in caps:
+                if not limit:
+                    continue
+                if not await self.backend.acquire(key, limit, ticket):
+                    raise AdmissionRejected(reason, IN_FLIGHT_RETRY_AFTER)
+                held.append(key)
+        except BaseException:
+            # Rejected, or the backend failed part way: hand back what was taken
+            await self._release_keys(held, ticket)
+            raise
+        return held
+
+    async def _release_keys(self, keys: List[str], ticket: str):
+        for key in keys:
+            try:
+                await self.backend.release(key, ticket)
+            except Exception as e:
+                # The lease expires on its own
+                logger.warning(f"Admission release failed: {e}")
+
+    async def _take_tokens(self, endpoint_class: str, user_id: str):
+        limits = self.limits[endpoint_class]
+        buckets = [
+            (f"{endpoint_class}:user:{user_id}", limits.rate, limits.burst, "rate_limited_user"),
+            (f"{endpoint_class}:global", limits.global_rate, limits.global_burst, "rate_limited_global"),
+        ]
+        for key, rate, burst, reason in buckets:
+            if not rate:
+                continue
+            wait = await self.backend.take(key, rate, burst)
+            if wait > 0:
+                raise AdmissionRejected(reason, wait)
+
+    async def acquire(self, endpoint_class: str, user_id: str) -> Admission:
+        ticket = uuid.uuid4().hex
+        try:
+            held = await self._acquire_slots(endpoint_class, user_id, ticket)
+            try:
+                await self._take_tokens(endpoint_class, user_id)
+            except BaseException:
+                await self._release_keys(held, ticket)
+                raise
+        except AdmissionRejected as e:
+            ADMISSIONS.inc(endpoint_class=endpoint_class, outcome=e.reason)
+            logger.info(f"🚦 Rejected {endpoint_class} request from {user_id}: {e.reason}, retry in {e.retry_after:.1f}s")
+            raise
+        except Exception as e:
+            logger.warning(f"Admission backend failed, letting the request through: {e}")
+            ADMISSIONS.inc(endpoint_class=endpoint_class, outcome="backend_error")
+            held = []
+
+        ADMISSIONS.inc(endpoint_class=endpoint_class, outcome="admitted")
+        self.in_flight[endpoint_class] += 1
+        return Admission(endpoint_class, ticket, held)
+
+    async def release(self, admission: Admission):
+        self.in_flight[admission.endpoint_class] -= 1
+        await self._release_keys(admission.keys, admission.ticket)
+
+    def stats(self) -> dict:
+        return {f"in_flight_{name}": count for name, count in self.in_flight.items()}
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+def build_admission_controller() -> Optional[AdmissionController]:
+    backend_name = settings.ADMISSION_BACKEND
+    if backend_name == "redis":
+        backend = RedisAdmissionBackend()
+    elif backend_name == "memory":
+        backend = MemoryAdmissionBackend()
+    else:
+        return None
+    logger.info(f"🚦 Admission control backend: {backend_name}")
+    controller = AdmissionController(backend, limits_from_settings())
+    metrics.gauge(
+        "resumegpt_admission_in_flight", "Admitted requests being handled here, per endpoint class",
+        lambda: [({"endpoint_class": name}, count) for name, count in controller.in_flight.items()]
+    )
+    return controller
+
+
+# Singleton instance (None when disabled)
+admission = build_admission_controller()
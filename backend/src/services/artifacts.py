@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactJanitor:
+    """
+    Owner of on-disk render artifacts (uploads/).
+    ----------------------------------------------
+    Generated files are normally served from memory; only responses above the
+    spill threshold touch disk, and those are deleted once sent. The janitor
+    also sweeps the directory periodically, removing anything older than
+    `max_age` and then the oldest files until the total is under `max_bytes`,
+    so crashed downloads or legacy files can't fill the disk.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_age: float = settings.ARTIFACT_MAX_AGE,
+        max_bytes: int = settings.ARTIFACT_MAX_BYTES,
+        interval: float = settings.ARTIFACT_SWEEP_INTERVAL,
+    ):
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.bytes_held = 0
+        self.files_held = 0
+        self.removed = 0
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def stats(self) -> dict:
+        return {"bytes_held": self.bytes_held, "files_held": self.files_held, "removed": self.removed}
+
+    # ------------------------------------------------------------------
+    # Spill files
+    # ------------------------------------------------------------------
+    async def spill(self, data: bytes, suffix: str = "") -> Path:
+        """Writes `data` to a fresh file in the artifact directory; pair with discard()."""
+        path = self.directory / f"spill-{uuid.uuid4().hex}{suffix}"
+        async with aiofiles.open(path, "wb") as f:
+            await f.write(data)
+        self.bytes_held += len(data)
+        self.files_held += 1
+        return path
+
+    def discard(self, path: Path):
+        """Deletes a spilled file once its response has been sent."""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        self.bytes_held = max(0, self.bytes_held - size)
+        self.files_held = max(0, self.files_held - 1)
+
+    # ------------------------------------------------------------------
+    # Sweeping
+    # ------------------------------------------------------------------
+    def _sweep(self) -> int:
+        entries = []
+        for path in self.directory.iterdir():
+            try:
+                if path.is_file():
+                    entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        entries.sort(key=lambda e: e[1].st_mtime)
+
+        cutoff = time.time() - self.max_age
+        total = sum(stat.st_size for _, stat in entries)
+        kept = len(entries)
+        removed = 0
+        for path, stat in entries:
+            # Oldest first: drop while expired or while still over budget
+            if stat.st_mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+            kept -= 1
+
+        self.bytes_held, self.files_held = total, kept
+        self.removed += removed
+        return removed
+
+    async def sweep(self) -> int:
+        removed = await asyncio.to_thread(self._sweep)
+        if removed:
+            logger.info(f"🧹 Removed {removed} artifacts from {self.directory} ({self.stats()})")
+        return removed
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.warning(f"Artifact sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._sweeper is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
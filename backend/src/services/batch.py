@@ -0,0 +1,150 @@
+import asyncio
+import io
+import json
+import logging
+import time
+import zipfile
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from ..config import settings
+from .pdf_renderer import RenderQueueFullError
+
+logger = logging.getLogger(__name__)
+
+# (filename, raw bytes) -> the /process_html result dict
+ProcessFunc = Callable[[str, bytes], Awaitable[dict]]
+# filled HTML -> PDF bytes
+RenderFunc = Callable[[str], Awaitable[bytes]]
+
+
+class RateLimitedError(Exception):
+    """An item hit the provider's rate limit; the batch backs off and retries it."""
+
+
+def is_rate_limit_error(error: Optional[str]) -> bool:
+    """Agents report failures as strings; OpenAI's 429s read 'Error code: 429 ... rate_limit_exceeded'."""
+    message = (error or "").lower()
+    return "error code: 429" in message or "rate_limit" in message or "rate limit" in message
+
+
+class BatchRunner:
+    """
+    Converts many resumes with one template.
+    ----------------------------------------
+    Items run `concurrency` at a time. A rate-limited item pauses the whole
+    batch (new attempts wait until the backoff has passed) and is retried,
+    as is a PDF render rejected by a full render queue. Results are yielded
+    as items finish, and every output goes into a zip archive:
+
+        001-<name>.html, 001-<name>.pdf, ..., results.ndjson
+    """
+
+    def __init__(
+        self,
+        process: ProcessFunc,
+        render: Optional[RenderFunc] = None,
+        concurrency: int = settings.BATCH_CONCURRENCY,
+        max_retries: int = settings.BATCH_MAX_RETRIES,
+        backoff: float = settings.BATCH_RATE_LIMIT_BACKOFF,
+    ):
+        self.process = process
+        self.render = render
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._resume_at = 0.0
+        self._buffer = io.BytesIO()
+        self._archive = zipfile.ZipFile(self._buffer, "w", compression=zipfile.ZIP_DEFLATED)
+        self._results: List[dict] = []
+
+    async def _wait_for_backoff(self):
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _back_off(self, attempt: int, reason: str):
+        delay = self.backoff * (2 ** attempt)
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        logger.warning(f"⏳ Batch backing off {delay:.1f}s ({reason})")
+
+    async def _attempt(self, filename: str, data: bytes) -> Tuple[dict, Optional[bytes]]:
+        result = await self.process(filename, data)
+        if not result.get("success"):
+            if is_rate_limit_error(result.get("error")):
+                raise RateLimitedError(result["error"])
+            return result, None
+        if self.render is None:
+            return result, None
+        try:
+            return result, await self.render(result["html_code"])
+        except RenderQueueFullError as e:
+            raise RateLimitedError(str(e))
+
+    async def _run_item(self, index: int, filename: str, data: bytes) -> dict:
+        started = time.perf_counter()
+        item = {"index": index, "filename": filename, "success": False, "attempts": 0}
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_backoff()
+            item["attempts"] = attempt + 1
+            try:
+                result, pdf_bytes = await self._attempt(filename, data)
+            except RateLimitedError as e:
+                item["error"] = str(e)
+                if attempt < self.max_retries:
+                    self._back_off(attempt, f"{filename}: {e}")
+                continue
+            except Exception as e:
+                logger.exception(f"Batch item {filename} failed")
+                item["error"] = str(e)
+                break
+
+            if not result.get("success"):
+                item["error"] = result.get("error")
+                break
+
+            stem = f"{index:03d}-{Path(filename).stem}"
+            item.update(success=True, html_file=f"{stem}.html")
+            item.pop("error", None)
+            self._archive.writestr(item["html_file"], result["html_code"])
+            if pdf_bytes is not None:
+                item["pdf_file"] = f"{stem}.pdf"
+                # PDFs are already compressed
+                self._archive.writestr(item["pdf_file"], pdf_bytes, compress_type=zipfile.ZIP_STORED)
+            break
+
+        item["elapsed"] = round(time.perf_counter() - started, 3)
+        self._results.append(item)
+        return item
+
+    async def run(self, items: List[Tuple[str, bytes]]) -> AsyncIterator[dict]:
+        """Yields one result dict per (filename, bytes) item, in completion order."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(index: int, filename: str, data: bytes) -> dict:
+            async with semaphore:
+                return await self._run_item(index, filename, data)
+
+        tasks = [
+            asyncio.create_task(bounded(index, filename, data))
+            for index, (filename, data) in enumerate(items, start=1)
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # The consumer went away (e.g. the client disconnected): stop the rest
+            for task in tasks:
+                task.cancel()
+
+    def summary(self) -> dict:
+        succeeded = sum(1 for item in self._results if item["success"])
+        return {"total": len(self._results), "succeeded": succeeded, "failed": len(self._results) - succeeded}
+
+    def archive(self) -> bytes:
+        """Closes the archive (adding results.ndjson) and returns the zip bytes."""
+        if self._archive.fp is not None:
+            manifest = "".join(json.dumps(item) + "\n" for item in sorted(self._results, key=lambda i: i["index"]))
+            self._archive.writestr("results.ndjson", manifest)
+            self._archive.close()
+        return self._buffer.getvalue()
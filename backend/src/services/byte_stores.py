@@ -0,0 +1,193 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryLRUStore:
+    """In-process LRU of byte values, bounded by total bytes held."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+        self._entries[key] = value
+        self._size += len(value)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+
+class RedisLRUStore:
+    """
+    Redis-backed byte store shared by every worker.
+    -----------------------------------------------
+    - values        resumegpt:<namespace>:<key>          (expire `ttl` after the last read or write)
+    - lru zset      resumegpt:<namespace>:lru            (key -> last access)
+    - sizes hash    resumegpt:<namespace>:sizes          (key -> bytes counted for it)
+    - total         resumegpt:<namespace>:total_bytes
+    Writes, the size delta and eviction run in one Lua script, so overwrites
+    replace a key's bytes instead of adding to them and concurrent writers
+    can't overshoot. Entries idle for longer than the TTL have expired on
+    their own; each write first subtracts those from the total.
+    """
+
+    # Expired entries reconciled per write, so one call never scans the whole set
+    RECONCILE_BATCH = 100
+
+    SET_SCRIPT = """
+    local prefix, member, value = ARGV[1], ARGV[2], ARGV[3]
+    local ttl, now, max_bytes = tonumber(ARGV[4]), tonumber(ARGV[5]), tonumber(ARGV[6])
+    local function forget(m)
+        local size = tonumber(redis.call('HGET', KEYS[2], m)) or 0
+        redis.call('ZREM', KEYS[1], m)
+        redis.call('HDEL', KEYS[2], m)
+        redis.call('DEL', prefix .. m)
+        return redis.call('DECRBY', KEYS[3], size)
+    end
+
+    for _, m in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now - ttl, 'LIMIT', 0, ARGV[7])) do
+        forget(m)
+    end
+
+    local old = tonumber(redis.call('HGET', KEYS[2], member)) or 0
+    redis.call('SET', prefix .. member, value, 'EX', ttl)
+    redis.call('ZADD', KEYS[1], now, member)
+    redis.call('HSET', KEYS[2], member, #value)
+    local total = redis.call('INCRBY', KEYS[3], #value - old)
+    while total > max_bytes do
+        local oldest = redis.call('ZRANGE', KEYS[1], 0, 0)
+        if #oldest == 0 then
+            redis.call('SET', KEYS[3], 0)
+            return 0
+        end
+        total = forget(oldest[1])
+    end
+    return total
+    """
+
+    GET_SCRIPT = """
+    local value = redis.call('GET', ARGV[1] .. ARGV[2])
+    if value then
+        redis.call('EXPIRE', ARGV[1] .. ARGV[2], ARGV[3])
+        redis.call('ZADD', KEYS[1], ARGV[4], ARGV[2])
+    end
+    return value
+    """
+
+    def __init__(self, namespace: str, max_bytes: int, ttl: int):
+        self.prefix = f"resumegpt:{namespace}:"
+        self.lru_key = f"resumegpt:{namespace}:lru"
+        self.sizes_key = f"resumegpt:{namespace}:sizes"
+        self.size_key = f"resumegpt:{namespace}:total_bytes"
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await get_redis().eval(self.GET_SCRIPT, 1, self.lru_key, self.prefix, key, self.ttl, time.time())
+
+    async def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        await get_redis().eval(
+            self.SET_SCRIPT, 3, self.lru_key, self.sizes_key, self.size_key,
+            self.prefix, key, value, self.ttl, time.time(), self.max_bytes, self.RECONCILE_BATCH,
+        )
+
+class DiskLRUStore:
+    """
+    One file per entry under `directory`; file mtime is the LRU clock.
+    Safe to share between processes: writes are atomic renames and eviction
+    always re-measures the directory rather than trusting a local counter.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.bin"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            async with aiofiles.open(path, "rb") as f:
+                value = await f.read()
+            await asyncio.to_thread(os.utime, path)
+        except FileNotFoundError:
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+        async with aiofiles.open(tmp, "wb") as f:
+            await f.write(value)
+        os.replace(tmp, path)
+
+        if self._size is None:
+            self._size = await asyncio.to_thread(self._measure)
+        else:
+            self._size += len(value)
+        if self._size > self.max_bytes:
+            self._size = await asyncio.to_thread(self._evict)
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        entries = []
+        for path in self.directory.glob("*.bin"):
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _measure(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def _evict(self) -> int:
+        entries = sorted(self._entries(), key=lambda e: e[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        # Evict down to 90% so we don't rescan on every subsequent write
+        target = int(self.max_bytes * 0.9)
+        for path, stat in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= stat.st_size
+            except FileNotFoundError:
+                pass
+        logger.info(f"🧹 {self.directory} trimmed to {total} bytes")
+        return total
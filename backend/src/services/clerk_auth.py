@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import httpx
+import jwt
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Don't let a stream of tokens with made-up `kid`s turn into a JWKS fetch each.
+UNKNOWN_KID_REFETCH_INTERVAL = 30.0
+
+
+class ClerkTokenVerifier:
+    """
+    Process-wide Clerk JWT verifier.
+    ---------------------------------
+    - Signing keys are cached by `kid` and refreshed in the background before
+      they go stale, so requests never wait on the JWKS endpoint in steady state.
+    - An unknown `kid` (key rotation) triggers at most one refetch per interval.
+    - If the JWKS endpoint is down once the keys are stale, the stale keys keep
+      verifying tokens (retried at the same interval); only a token whose `kid`
+      was never loaded fails.
+    - Verified payloads are kept in a small LRU until the token's `exp`, so
+      repeated calls with the same bearer token skip the RSA check entirely.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        keys_ttl: int = settings.CLERK_JWKS_TTL,
+        token_cache_size: int = settings.CLERK_TOKEN_CACHE_SIZE,
+        token_cache_ttl: int = settings.CLERK_TOKEN_CACHE_TTL,
+    ):
+        self.jwks_url = jwks_url
+        self.keys_ttl = keys_ttl
+        self.token_cache_size = token_cache_size
+        self.token_cache_ttl = token_cache_ttl
+
+        self._keys: Dict[str, Any] = {}
+        self._keys_fetched_at = 0.0
+        self._last_forced_refresh = 0.0
+        self._stale_retry_at = 0.0
+        self._lock = asyncio.Lock()
+        self._tokens: "OrderedDict[str, tuple[dict, float]]" = OrderedDict()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def start(self):
+        self._http = httpx.AsyncClient(timeout=5.0)
+        try:
+            await self.refresh_keys()
+        except Exception as e:
+            # Not fatal: the first request will retry the fetch.
+            logger.error(f"Initial JWKS fetch failed: {e}")
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._http:
+            await self._http.aclose()
+            self._http = None
+
+    async def _refresh_loop(self):
+        # Refresh at half the TTL so keys are never observed as stale.
+        interval = max(self.keys_ttl / 2, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh_keys()
+            except Exception as e:
+                logger.warning(f"Background JWKS refresh failed, keeping cached keys: {e}")
+
+    # ------------------------------------------------------------------
+    # Signing keys
+    # ------------------------------------------------------------------
+    async def refresh_keys(self):
+        async with self._lock:
+            client = self._http or httpx.AsyncClient(timeout=5.0)
+            try:
+                response = await client.get(self.jwks_url)
+                response.raise_for_status()
+                jwks = response.json()
+            finally:
+                if client is not self._http:
+                    await client.aclose()
+
+            keys = {}
+            for jwk in jwks.get("keys", []):
+                if jwk.get("use", "sig") != "sig" or "kid" not in jwk:
+                    continue
+                try:
+                    keys[jwk["kid"]] = jwt.PyJWK(jwk).key
+                except jwt.PyJWKError as e:
+                    logger.warning(f"Skipping unusable JWK {jwk.get('kid')}: {e}")
+
+            self._keys = keys
+            self._keys_fetched_at = time.monotonic()
+            logger.info(f"🔑 Loaded {len(keys)} Clerk signing keys")
+
+    async def _get_signing_key(self, kid: Optional[str]):
+        now = time.monotonic()
+        if now - self._keys_fetched_at > self.keys_ttl and now >= self._stale_retry_at:
+            try:
+                await self.refresh_keys()
+            except Exception as e:
+                # Clerk rotates keys rarely; an outage shouldn't log everyone out
+                self._stale_retry_at = now + UNKNOWN_KID_REFETCH_INTERVAL
+                logger.warning(f"JWKS refresh failed, keeping {len(self._keys)} stale keys: {e}")
+
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        now = time.monotonic()
+        if now - self._last_forced_refresh > UNKNOWN_KID_REFETCH_INTERVAL:
+            self._last_forced_refresh = now
+            logger.info(f"Unknown kid {kid!r}, refetching JWKS")
+            await self.refresh_keys()
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unable to find a signing key that matches: {kid!r}")
+        return key
+
+    # ------------------------------------------------------------------
+    # Verification
+    # ------------------------------------------------------------------
+    async def verify(self, token: str) -> dict:
+        now = time.time()
+
+        cached = self._tokens.get(token)
+        if cached is not None:
+            payload, expires_at = cached
+            if expires_at > now:
+                self._tokens.move_to_end(token)
+                return payload
+            del self._tokens[token]
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        signing_key = await self._get_signing_key(kid)
+
+        payload = jwt.decode(
+            token,
+            signing_key,
+            algorithms=["RS256"],
+            options={"verify_exp": True}
+        )
+
+        expires_at = now + self.token_cache_ttl
+        if "exp" in payload:
+            expires_at = min(expires_at, float(payload["exp"]))
+        self._tokens[token] = (payload, expires_at)
+        if len(self._tokens) > self.token_cache_size:
+            self._tokens.popitem(last=False)
+
+        return payload
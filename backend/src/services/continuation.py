@@ -0,0 +1,335 @@
+import logging
+import re
+from typing import AsyncIterator, Callable, List, Optional
+
+from openai import AsyncOpenAI
+
+from ..config import settings
+from .metrics import metrics, record_usage, stage_timer
+
+logger = logging.getLogger(__name__)
+
+TRUNCATIONS = metrics.counter(
+    "resumegpt_generation_truncations_total", "Model outputs that came back incomplete", ["agent", "reason"]
+)
+CONTINUATIONS = metrics.counter(
+    "resumegpt_generation_continuations_total", "Continuation requests after a truncation", ["agent", "outcome"]
+)
+
+# Overlap shorter than this between the cut and the continuation is taken as coincidence
+MIN_OVERLAP = 8
+# How far back a continuation may restart (and so repeat) the text it continues
+MAX_OVERLAP = 400
+# Text before the cut quoted in the continuation prompt
+ANCHOR_CHARS = 200
+
+_HTML_END_RE = re.compile(r"</html\s*>\s*(```)?\s*$", re.IGNORECASE)
+_LEADING_FENCE_RE = re.compile(r"^\s*```[a-zA-Z0-9_+-]*\s*\n")
+
+Check = Callable[[str], bool]
+
+
+def html_is_complete(html_code: str) -> bool:
+    """Whether the document runs to its closing </html> (a code fence after it is fine)."""
+    return bool(_HTML_END_RE.search(html_code))
+
+
+def truncation_reason(finish_reason: Optional[str], text: str, is_complete: Optional[Check]) -> Optional[str]:
+    """
+    Why `text` needs a continuation, or None. `finish_reason` is the API's
+    ("length" / "max_output_tokens"); content-filtered output is never continued.
+    """
+    if finish_reason in ("length", "max_output_tokens"):
+        return "max_tokens"
+    if finish_reason == "content_filter":
+        return None
+    if is_complete is not None and text and not is_complete(text):
+        return "malformed"
+    return None
+
+
+def continuation_prompt(partial: str) -> str:
+    return (
+        "Your previous answer was cut off. Continue it exactly where it stopped: output only the "
+        "remaining text, starting with the very next character. Do not repeat anything already "
+        "written, do not start over, and add no explanations or code fences.\n\n"
+        f"Your answer so far ended with:\n{partial[-ANCHOR_CHARS:]}"
+    )
+
+
+def trim_overlap(partial: str, continuation: str) -> str:
+    """The continuation minus a leading code fence and any text it repeats from the end of `partial`."""
+    continuation = _LEADING_FENCE_RE.sub("", continuation, count=1)
+    for size in range(min(MAX_OVERLAP, len(continuation), len(partial)), MIN_OVERLAP - 1, -1):
+        if partial.endswith(continuation[:size]):
+            return continuation[size:]
+    return continuation
+
+
+def _incomplete_reason(response) -> Optional[str]:
+    """The Responses API's finish reason, in the terms truncation_reason() expects."""
+    if getattr(response, "status", None) != "incomplete":
+        return None
+    details = getattr(response, "incomplete_details", None)
+    return getattr(details, "reason", None) or "max_output_tokens"
+
+
+# ----------------------------------------------------------------------
+# Responses API (previous_response_id carries the conversation, so the
+# file and template are not sent again)
+# ----------------------------------------------------------------------
+async def continue_response(
+    client: AsyncOpenAI,
+    response,
+    *,
+    agent: str,
+    model: str,
+    max_output_tokens: int,
+    timeout: float,
+    is_complete: Optional[Check] = html_is_complete,
+    max_continuations: int = settings.GENERATION_MAX_CONTINUATIONS,
+) -> tuple[str, int]:
+    """
+    Returns (full text, continuations used) for a Responses API result,
+    asking for the rest of the answer while it is cut off.
+    """
+    text = response.output_text
+    reason = truncation_reason(_incomplete_reason(response), text, is_complete)
+    if reason is None:
+        return text, 0
+
+    TRUNCATIONS.inc(agent=agent, reason=reason)
+    logger.warning(f"✂️ {agent} output truncated ({reason}, {len(text)} chars); requesting a continuation")
+    used = 0
+    while reason is not None and used < max_continuations:
+        used += 1
+        try:
+            async with stage_timer(f"llm_{agent}_continuation"):
+                response = await client.responses.create(
+                    model=model,
+                    previous_response_id=response.id,
+                    input=[{"role": "user", "content": continuation_prompt(text)}],
+                    max_output_tokens=max_output_tokens,
+                    timeout=timeout,
+                )
+        except Exception as e:
+            CONTINUATIONS.inc(agent=agent, outcome="error")
+            logger.error(f"Continuation {used} for {agent} failed: {e}")
+            break
+        record_usage(model, getattr(response, "usage", None))
+        text += trim_overlap(text, response.output_text)
+        reason = truncation_reason(_incomplete_reason(response), text, is_complete)
+        CONTINUATIONS.inc(agent=agent, outcome="incomplete" if reason else "complete")
+
+    if reason is not None:
+        logger.warning(f"✂️ {agent} output still incomplete after {used} continuations")
+    else:
+        logger.info(f"🧵 {agent} output completed with {used} continuation(s)")
+    return text, used
+
+
+async def stream_response_continuations(
+    client: AsyncOpenAI,
+    response,
+    text: str,
+    *,
+    agent: str,
+    model: str,
+    max_output_tokens: int,
+    timeout: float,
+    is_complete: Optional[Check] = html_is_complete,
+    max_continuations: int = settings.GENERATION_MAX_CONTINUATIONS,
+) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of continue_response(): given the final response
+    of a stream and the text streamed so far, yields the continuation's
+    text as it arrives (the first MAX_OVERLAP characters are held back until
+    any repeated text has been trimmed).
+    """
+    reason = truncation_reason(_incomplete_reason(response), text, is_complete)
+    if reason is None:
+        return
+
+    TRUNCATIONS.inc(agent=agent, reason=reason)
+    logger.warning(f"✂️ {agent} stream truncated ({reason}, {len(text)} chars); streaming a continuation")
+    used = 0
+    while reason is not None and used < max_continuations:
+        used += 1
+        head: List[str] = []
+        trimmed = False
+        final = None
+        try:
+            async with stage_timer(f"llm_{agent}_continuation"):
+                stream = await client.responses.create(
+                    model=model,
+                    previous_response_id=response.id,
+                    input=[{"role": "user", "content": continuation_prompt(text)}],
+                    max_output_tokens=max_output_tokens,
+                    timeout=timeout,
+                    stream=True,
+                )
+                async for event in stream:
+                    if event.type == "response.output_text.delta":
+                        if trimmed:
+                            text += event.delta
+                            yield event.delta
+                            continue
+                        head.append(event.delta)
+                        if sum(map(len, head)) >= MAX_OVERLAP:
+                            chunk = trim_overlap(text, "".join(head))
+                            trimmed = True
+                            text += chunk
+                            yield chunk
+                    elif event.type in ("response.completed", "response.incomplete"):
+                        final = event.response
+                    elif event.type in ("response.failed", "response.error", "error"):
+                        raise RuntimeError(f"Continuation failed: {event}")
+        except Exception as e:
+            CONTINUATIONS.inc(agent=agent, outcome="error")
+            logger.error(f"Continuation {used} for {agent} failed: {e}")
+            return
+
+        if not trimmed and head:
+            chunk = trim_overlap(text, "".join(head))
+            text += chunk
+            yield chunk
+        record_usage(model, getattr(final, "usage", None))
+        response = final or response
+        reason = truncation_reason(_incomplete_reason(final), text, is_complete)
+        CONTINUATIONS.inc(agent=agent, outcome="incomplete" if reason else "complete")
+
+    if reason is not None:
+        logger.warning(f"✂️ {agent} stream still incomplete after {used} continuations")
+
+
+# ----------------------------------------------------------------------
+# Chat Completions (the partial answer is replayed as an assistant turn)
+# ----------------------------------------------------------------------
+async def continue_chat(
+    client: AsyncOpenAI,
+    messages: list,
+    response,
+    *,
+    agent: str,
+    model: str,
+    is_complete: Optional[Check] = None,
+    max_continuations: int = settings.GENERATION_MAX_CONTINUATIONS,
+    **create_kwargs,
+) -> tuple[str, int]:
+    """
+    Returns (full text, continuations used) for a Chat Completions result.
+    `create_kwargs` (temperature, timeout, ...) are passed to each request.
+    """
+    choice = response.choices[0]
+    text = choice.message.content or ""
+    reason = truncation_reason(choice.finish_reason, text, is_complete)
+    if reason is None:
+        return text, 0
+
+    TRUNCATIONS.inc(agent=agent, reason=reason)
+    logger.warning(f"✂️ {agent} output truncated ({reason}, {len(text)} chars); requesting a continuation")
+    used = 0
+    while reason is not None and used < max_continuations:
+        used += 1
+        try:
+            async with stage_timer(f"llm_{agent}_continuation"):
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        *messages,
+                        {"role": "assistant", "content": text},
+                        {"role": "user", "content": continuation_prompt(text)},
+                    ],
+                    **create_kwargs,
+                )
+        except Exception as e:
+            CONTINUATIONS.inc(agent=agent, outcome="error")
+            logger.error(f"Continuation {used} for {agent} failed: {e}")
+            break
+        record_usage(model, getattr(response, "usage", None))
+        choice = response.choices[0]
+        text += trim_overlap(text, choice.message.content or "")
+        reason = truncation_reason(choice.finish_reason, text, is_complete)
+        CONTINUATIONS.inc(agent=agent, outcome="incomplete" if reason else "complete")
+
+    if reason is not None:
+        logger.warning(f"✂️ {agent} output still incomplete after {used} continuations")
+    return text, used
+
+
+async def stream_chat_continuations(
+    client: AsyncOpenAI,
+    messages: list,
+    text: str,
+    finish_reason: Optional[str],
+    *,
+    agent: str,
+    model: str,
+    is_complete: Optional[Check] = None,
+    max_continuations: int = settings.GENERATION_MAX_CONTINUATIONS,
+    **create_kwargs,
+) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of continue_chat(): given the text and finish
+    reason of a streamed answer, yields the continuation's text as it
+    arrives (the first MAX_OVERLAP characters are held back until any
+    repeated text has been trimmed).
+    """
+    reason = truncation_reason(finish_reason, text, is_complete)
+    if reason is None:
+        return
+
+    TRUNCATIONS.inc(agent=agent, reason=reason)
+    logger.warning(f"✂️ {agent} stream truncated ({reason}, {len(text)} chars); streaming a continuation")
+    used = 0
+    while reason is not None and used < max_continuations:
+        used += 1
+        head: List[str] = []
+        trimmed = False
+        finish_reason = None
+        try:
+            async with stage_timer(f"llm_{agent}_continuation"):
+                stream = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        *messages,
+                        {"role": "assistant", "content": text},
+                        {"role": "user", "content": continuation_prompt(text)},
+                    ],
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    **create_kwargs,
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        record_usage(model, getattr(chunk, "usage", None))
+                        continue
+                    choice = chunk.choices[0]
+                    finish_reason = choice.finish_reason or finish_reason
+                    delta = choice.delta.content
+                    if not delta:
+                        continue
+                    if trimmed:
+                        text += delta
+                        yield delta
+                        continue
+                    head.append(delta)
+                    if sum(map(len, head)) >= MAX_OVERLAP:
+                        chunk_text = trim_overlap(text, "".join(head))
+                        trimmed = True
+                        text += chunk_text
+                        yield chunk_text
+        except Exception as e:
+            CONTINUATIONS.inc(agent=agent, outcome="error")
+            logger.error(f"Continuation {used} for {agent} failed: {e}")
+            return
+
+        if not trimmed and head:
+            chunk_text = trim_overlap(text, "".join(head))
+            text += chunk_text
+            yield chunk_text
+        reason = truncation_reason(finish_reason, text, is_complete)
+        CONTINUATIONS.inc(agent=agent, outcome="incomplete" if reason else "complete")
+
+    if reason is not None:
+        logger.warning(f"✂️ {agent} stream still incomplete after {used} continuations")
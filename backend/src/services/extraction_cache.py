@@ -0,0 +1,63 @@
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+from ..config import settings
+from .byte_stores import DiskLRUStore, RedisLRUStore
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    Persistent cache of document extraction results.
+    -------------------------------------------------
+    Keyed by file digest + extractor version + model, so a prompt or parser
+    change (version bump) or a model switch never serves stale text.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(digest: str, extractor_version: str, model: str) -> str:
+        return f"{digest}:{extractor_version}:{model}"
+
+    async def get(self, key: str) -> Optional[dict]:
+        try:
+            raw = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Extraction cache read failed: {e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, result: dict):
+        try:
+            await self.backend.set(key, json.dumps(result).encode("utf-8"))
+        except Exception as e:
+            logger.warning(f"Extraction cache write failed: {e}")
+
+
+def build_extraction_cache() -> Optional[ExtractionCache]:
+    backend_name = settings.EXTRACTION_CACHE_BACKEND
+    if backend_name == "redis":
+        backend = RedisLRUStore(
+            "extract:v1", settings.EXTRACTION_CACHE_MAX_BYTES, settings.EXTRACTION_CACHE_TTL
+        )
+    elif backend_name == "disk":
+        backend = DiskLRUStore(Path(settings.EXTRACTION_CACHE_DIR), settings.EXTRACTION_CACHE_MAX_BYTES)
+    else:
+        return None
+    logger.info(f"🗄️ Extraction cache backend: {backend_name}")
+    return ExtractionCache(backend)
+
+
+# Singleton instance (None when disabled)
+extraction_cache = build_extraction_cache()
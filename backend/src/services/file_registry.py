@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import Dict, List, Optional
+
+from openai import AsyncOpenAI, NotFoundError
+
+from ..config import settings
+from .metrics import stage_timer
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Files stay on OpenAI this long after their registry entry expires, so a
+# request that picked up the id just before expiry can still finish its call.
+DELETE_GRACE_SECONDS = 300
+
+
+class MemoryFileStore:
+    """digest -> (file_id, expires_at), local to this process."""
+
+    # Nobody else knows about these files, so they are deleted on shutdown
+    owns_files = True
+
+    def __init__(self):
+        self._entries: Dict[str, tuple[str, float]] = {}
+        # Files whose digest was re-uploaded after expiry, still awaiting deletion
+        self._replaced: List[tuple[str, float]] = []
+
+    async def get(self, digest: str, ttl: int) -> Optional[str]:
+        entry = self._entries.get(digest)
+        if entry is None or entry[1] <= time.time():
+            return None
+        # Sliding expiry: files in active use are kept alive
+        self._entries[digest] = (entry[0], time.time() + ttl)
+        return entry[0]
+
+    async def put(self, digest: str, file_id: str, ttl: int):
+        previous = self._entries.get(digest)
+        if previous is not None and previous[0] != file_id:
+            self._replaced.append(previous)
+        self._entries[digest] = (file_id, time.time() + ttl)
+
+    async def pop_expired(self, before: float) -> List[str]:
+        expired = [d for d, (_, expires_at) in self._entries.items() if expires_at <= before]
+        file_ids = [self._entries.pop(d)[0] for d in expired]
+        file_ids += [file_id for file_id, expires_at in self._replaced if expires_at <= before]
+        self._replaced = [entry for entry in self._replaced if entry[1] > before]
+        return file_ids
+
+
+class RedisFileStore:
+    """
+    Shared registry: a string key per digest plus a sorted set of file ids
+    scored by expiry, which the sweeper drains.
+    """
+
+    owns_files = False
+
+    PREFIX = "resumegpt:openai_file:"
+    EXPIRY_KEY = "resumegpt:openai_files:expiry"
+
+    async def get(self, digest: str, ttl: int) -> Optional[str]:
+        client = get_redis()
+        file_id = await client.get(self.PREFIX + digest)
+        if file_id is None:
+            return None
+        file_id = file_id.decode()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.expire(self.PREFIX + digest, ttl)
+            pipe.zadd(self.EXPIRY_KEY, {file_id: time.time() + ttl})
+            await pipe.execute()
+        return file_id
+
+    async def put(self, digest: str, file_id: str, ttl: int):
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.set(self.PREFIX + digest, file_id, ex=ttl)
+            pipe.zadd(self.EXPIRY_KEY, {file_id: time.time() + ttl})
+            await pipe.execute()
+
+    async def pop_expired(self, before: float) -> List[str]:
+        client = get_redis()
+        candidates = await client.zrangebyscore(self.EXPIRY_KEY, "-inf", before)
+        claimed = []
+        for member in candidates:
+            # ZREM is the claim: only one sweeper across the fleet gets a 1
+            if await client.zrem(self.EXPIRY_KEY, member):
+                claimed.append(member.decode())
+        return claimed
+
+
+class OpenAIFileRegistry:
+    """
+    Deduplicates OpenAI file uploads.
+    ---------------------------------
+    Uploads are keyed by the SHA-256 of their bytes, so re-sending the same
+    resume (e.g. to try another template) reuses the existing `file_id`.
+    A background sweeper deletes remote files once their entry expires.
+    """
+
+    def __init__(self, store, ttl: int = settings.OPENAI_FILE_TTL):
+        self.store = store
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.deleted = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "deleted": self.deleted}
+
+    async def get_or_upload(
+        self, client: AsyncOpenAI, filename: str, data: bytes, digest: Optional[str] = None
+    ) -> str:
+        digest = digest or hashlib.sha256(data).hexdigest()
+
+        file_id = await self.store.get(digest, self.ttl)
+        if file_id is not None:
+            self.hits += 1
+            logger.info(f"♻️ Reusing uploaded file {file_id} for {filename}")
+            return file_id
+
+        inflight = self._inflight.get(digest)
+        if inflight is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[digest] = future
+        try:
+            async with stage_timer("openai_file_upload"):
+                upload = await client.files.create(file=(filename, data), purpose="assistants")
+            await self.store.put(digest, upload.id, self.ttl)
+            future.set_result(upload.id)
+            logger.info(f"📤 Uploaded file {filename} (file_id={upload.id})")
+            return upload.id
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(digest, None)
+
+    # ------------------------------------------------------------------
+    # Sweeper
+    # ------------------------------------------------------------------
+    async def sweep(self, client: AsyncOpenAI, before: Optional[float] = None) -> int:
+        if before is None:
+            before = time.time() - DELETE_GRACE_SECONDS
+        file_ids = await self.store.pop_expired(before)
+        for file_id in file_ids:
+            try:
+                await client.files.delete(file_id)
+            except NotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to delete OpenAI file {file_id}: {e}")
+                continue
+            self.deleted += 1
+        if file_ids:
+            logger.info(f"🧹 Deleted {len(file_ids)} expired OpenAI files ({self.stats()})")
+        return len(file_ids)
+
+    async def _sweep_loop(self, client: AsyncOpenAI, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep(client)
+            except Exception as e:
+                logger.warning(f"OpenAI file sweep failed: {e}")
+
+    def start(self, client: AsyncOpenAI, interval: float = settings.OPENAI_FILE_SWEEP_INTERVAL):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop(client, interval))
+
+    async def stop(self, client: AsyncOpenAI):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        if self.store.owns_files:
+            await self.sweep(client, before=math.inf)
+
+
+def build_file_registry() -> OpenAIFileRegistry:
+    if settings.OPENAI_FILE_REGISTRY_BACKEND == "redis":
+        return OpenAIFileRegistry(RedisFileStore())
+    return OpenAIFileRegistry(MemoryFileStore())
+
+
+# Singleton instance
+file_registry = build_file_registry()
@@ -0,0 +1,278 @@
+import html
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+EDIT_OPS = {
+    "replace_text", "replace_element", "replace_inner", "set_attribute",
+    "insert_before", "insert_after", "remove",
+}
+
+
+class PatchError(Exception):
+    """Raised when an edit cannot be applied unambiguously."""
+
+
+class Element:
+    __slots__ = ("tag", "attrs", "parent", "start", "inner_start", "inner_end", "end")
+
+    def __init__(self, tag: str, attrs: dict, parent: Optional["Element"], start: int, inner_start: int):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.start = start              # offset of '<'
+        self.inner_start = inner_start  # offset just past the start tag
+        self.inner_end = inner_start    # offset of the end tag's '<'
+        self.end = inner_start          # offset just past the end tag
+
+    @property
+    def classes(self) -> set:
+        return set((self.attrs.get("class") or "").split())
+
+
+class _SpanParser(HTMLParser):
+    """Records source offsets of every element so edits can splice the original string."""
+
+    def __init__(self, source: str):
+        super().__init__(convert_charrefs=True)
+        self.source = source
+        self.elements: List[Element] = []
+        self._stack: List[Element] = []
+        self._line_starts = [0]
+        for match in re.finditer("\n", source):
+            self._line_starts.append(match.end())
+
+    def _offset(self) -> int:
+        line, col = self.getpos()
+        return self._line_starts[line - 1] + col
+
+    def handle_starttag(self, tag, attrs):
+        start = self._offset()
+        inner_start = start + len(self.get_starttag_text())
+        parent = self._stack[-1] if self._stack else None
+        element = Element(tag, {k: (v or "") for k, v in attrs}, parent, start, inner_start)
+        self.elements.append(element)
+        if tag not in VOID_TAGS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        start = self._offset()
+        inner_start = start + len(self.get_starttag_text())
+        parent = self._stack[-1] if self._stack else None
+        self.elements.append(Element(tag, {k: (v or "") for k, v in attrs}, parent, start, inner_start))
+
+    def handle_endtag(self, tag):
+        if not any(e.tag == tag for e in self._stack):
+            return
+        start = self._offset()
+        end = self.source.find(">", start) + 1 or len(self.source)
+        # Elements left open inside this one (e.g. unclosed <li>) close implicitly here
+        while self._stack:
+            element = self._stack.pop()
+            if element.tag == tag:
+                element.inner_end, element.end = start, end
+                break
+            element.inner_end = element.end = start
+
+    def close(self):
+        super().close()
+        for element in self._stack:
+            element.inner_end = element.end = len(self.source)
+        self._stack = []
+
+
+def parse_elements(source: str) -> List[Element]:
+    parser = _SpanParser(source)
+    parser.feed(source)
+    parser.close()
+    return parser.elements
+
+
+# ----------------------------------------------------------------------
+# Selectors: compound tag/#id/.class/[attr=value] with descendant and '>' combinators
+# ----------------------------------------------------------------------
+_COMPOUND_RE = re.compile(
+    r"([a-zA-Z][\w-]*|\*)?((?:#[\w-]+|\.[\w-]+|\[[\w-]+(?:=(?:\"[^\"]*\"|'[^']*'|[^\]]*))?\])*)$"
+)
+_PART_RE = re.compile(r"#([\w-]+)|\.([\w-]+)|\[([\w-]+)(?:=(\"[^\"]*\"|'[^']*'|[^\]]*))?\]")
+
+
+def _parse_compound(text: str) -> dict:
+    match = _COMPOUND_RE.match(text)
+    if not match or not text:
+        raise PatchError(f"Unsupported selector: {text!r}")
+    compound = {"tag": (match.group(1) or "*").lower(), "id": None, "classes": set(), "attrs": []}
+    for id_, cls, attr, value in _PART_RE.findall(match.group(2)):
+        if id_:
+            compound["id"] = id_
+        elif cls:
+            compound["classes"].add(cls)
+        else:
+            compound["attrs"].append((attr.lower(), value.strip("\"'") if value else None))
+    return compound
+
+
+def _matches(element: Element, compound: dict) -> bool:
+    if compound["tag"] != "*" and element.tag != compound["tag"]:
+        return False
+    if compound["id"] is not None and element.attrs.get("id") != compound["id"]:
+        return False
+    if not compound["classes"] <= element.classes:
+        return False
+    for name, value in compound["attrs"]:
+        if name not in element.attrs or (value is not None and element.attrs[name] != value):
+            return False
+    return True
+
+
+def select(elements: List[Element], selector: str) -> List[Element]:
+    tokens = re.sub(r"\s*>\s*", " > ", selector.strip()).split()
+    if not tokens:
+        raise PatchError("Empty selector")
+    steps = []  # [(combinator, compound)] from rightmost to leftmost
+    combinator = None
+    for token in reversed(tokens):
+        if token == ">":
+            combinator = ">"
+            continue
+        steps.append((combinator, _parse_compound(token)))
+        combinator = " "
+
+    def matches_chain(element: Element, index: int) -> bool:
+        if not _matches(element, steps[index][1]):
+            return False
+        if index + 1 == len(steps):
+            return True
+        ancestor = element.parent
+        # The combinator stored on step i+1 says how step i relates to it
+        if steps[index + 1][0] == ">":
+            return ancestor is not None and matches_chain(ancestor, index + 1)
+        while ancestor is not None:
+            if matches_chain(ancestor, index + 1):
+                return True
+            ancestor = ancestor.parent
+        return False
+
+    return [e for e in elements if matches_chain(e, 0)]
+
+
+# ----------------------------------------------------------------------
+# Edit application
+# ----------------------------------------------------------------------
+def _find_unique(source: str, needle: str) -> int:
+    if not needle:
+        raise PatchError("Empty text anchor")
+    first = source.find(needle)
+    if first == -1:
+        raise PatchError(f"Text anchor not found: {needle[:80]!r}")
+    if source.find(needle, first + 1) != -1:
+        raise PatchError(f"Text anchor is ambiguous: {needle[:80]!r}")
+    return first
+
+
+def _resolve_targets(source: str, target: dict) -> List[Element]:
+    if not isinstance(target, dict):
+        raise PatchError("Edit target must be an object")
+    elements = parse_elements(source)
+
+    if target.get("id"):
+        found = [e for e in elements if e.attrs.get("id") == target["id"]]
+    elif target.get("selector"):
+        found = select(elements, target["selector"])
+    elif target.get("text"):
+        # Innermost element whose content contains the (unique) anchor
+        position = _find_unique(source, target["text"])
+        end = position + len(target["text"])
+        containing = [e for e in elements if e.inner_start <= position and end <= e.inner_end]
+        found = [max(containing, key=lambda e: e.inner_start)] if containing else []
+    else:
+        raise PatchError("Edit target needs one of: id, selector, text")
+
+    if not found:
+        raise PatchError(f"No element matches target {target}")
+    if len(found) > 1 and not target.get("all"):
+        raise PatchError(f"Target {target} matches {len(found)} elements; set \"all\": true to edit every match")
+    return found
+
+
+_TAG_NAME_RE = re.compile(r"<[^\s/>]+")
+# One attribute (leading whitespace, name, optional value), a stray '/', or any other stray character
+_ATTR_TOKEN_RE = re.compile(r"""\s*([^\s"'>/=]+)(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+))?|\s*/|\s*[^\s>]""")
+
+
+def _attribute_span(start_tag: str, name: str) -> Optional[tuple]:
+    """Span of the attribute called `name` (with its leading whitespace), walking the tag attribute by attribute."""
+    position = _TAG_NAME_RE.match(start_tag).end()
+    while True:
+        token = _ATTR_TOKEN_RE.match(start_tag, position)
+        if not token or token.end() == position:
+            return None
+        if token.group(1) and token.group(1).lower() == name.lower():
+            return token.span()
+        position = token.end()
+
+
+def _set_attribute(start_tag: str, name: str, value: Optional[str]) -> str:
+    replacement = "" if value is None else f' {name}="{html.escape(value, quote=True)}"'
+    span = _attribute_span(start_tag, name)
+    if span is not None:
+        return start_tag[:span[0]] + replacement + start_tag[span[1]:]
+    if value is None:
+        return start_tag
+    close = "/>" if start_tag.endswith("/>") else ">"
+    return start_tag[: -len(close)].rstrip() + replacement + close
+
+
+def apply_edit(source: str, edit: dict) -> str:
+    op = edit.get("op")
+    if op not in EDIT_OPS:
+        raise PatchError(f"Unknown edit op: {op!r}")
+
+    if op == "replace_text":
+        position = _find_unique(source, edit.get("find", ""))
+        return source[:position] + edit.get("replace", "") + source[position + len(edit["find"]):]
+
+    targets = _resolve_targets(source, edit.get("target"))
+    # Splice from the end so earlier offsets stay valid
+    for element in sorted(targets, key=lambda e: e.start, reverse=True):
+        if op == "replace_element":
+            source = source[:element.start] + edit.get("html", "") + source[element.end:]
+        elif op == "replace_inner":
+            if element.tag in VOID_TAGS:
+                raise PatchError(f"<{element.tag}> has no inner HTML")
+            source = source[:element.inner_start] + edit.get("html", "") + source[element.inner_end:]
+        elif op == "insert_before":
+            source = source[:element.start] + edit.get("html", "") + source[element.start:]
+        elif op == "insert_after":
+            source = source[:element.end] + edit.get("html", "") + source[element.end:]
+        elif op == "remove":
+            source = source[:element.start] + source[element.end:]
+        elif op == "set_attribute":
+            if not edit.get("name"):
+                raise PatchError("set_attribute needs a name")
+            start_tag = source[element.start:element.inner_start]
+            start_tag = _set_attribute(start_tag, edit["name"], edit.get("value"))
+            source = source[:element.start] + start_tag + source[element.inner_start:]
+    return source
+
+
+def apply_edits(source: str, edits: List[dict]) -> str:
+    """Applies edits in order. Raises PatchError if any edit is invalid or ambiguous."""
+    if not isinstance(edits, list):
+        raise PatchError("'edits' must be a list")
+    had_html_close = "</html>" in source.lower()
+    for index, edit in enumerate(edits):
+        if not isinstance(edit, dict):
+            raise PatchError(f"Edit #{index} is not an object")
+        try:
+            source = apply_edit(source, edit)
+        except PatchError as e:
+            raise PatchError(f"Edit #{index} ({edit.get('op')}): {e}") from e
+    if had_html_close and "</html>" not in source.lower():
+        raise PatchError("Edits removed the closing </html> tag")
+    return source
@@ -0,0 +1,461 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from ..config import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+TERMINAL = {SUCCEEDED, FAILED}
+
+# kind -> async handler(job) returning a JSON-serialisable result
+_HANDLERS: Dict[str, Callable[[dict], Awaitable[dict]]] = {}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help (bad input, missing template...)."""
+
+
+def register_job_handler(kind: str):
+    """Registers the coroutine that executes jobs of `kind`."""
+    def decorator(func: Callable[[dict], Awaitable[dict]]):
+        _HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+class MemoryJobBackend:
+    """
+    In-process queue, for development and tests: no Redis needed, but jobs
+    only run on workers inside this process and vanish on restart.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, dict] = {}
+        self._blobs: Dict[str, bytes] = {}
+        self._idempotency: Dict[str, str] = {}
+        self._idempotency_keys: Dict[str, str] = {}  # job id -> its idempotency key
+        self._queue: Optional[asyncio.Queue] = None
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        # Created lazily so it binds to the running loop
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    async def create(self, job: dict, idempotency_key: Optional[str], ttl: int) -> tuple[str, bool]:
+        if idempotency_key is not None:
+            existing = self._idempotency.get(idempotency_key)
+            if existing is not None and existing in self._jobs:
+                return existing, False
+            self._idempotency[idempotency_key] = job["id"]
+            self._idempotency_keys[job["id"]] = idempotency_key
+        self._jobs[job["id"]] = dict(job)
+        return job["id"], True
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def update(self, job_id: str, fields: dict):
+        if job_id in self._jobs:
+            self._jobs[job_id].update(fields)
+
+    async def expire(self, job_id: str, ttl: int):
+        def drop():
+            self._jobs.pop(job_id, None)
+            self._blobs.pop(job_id, None)
+            key = self._idempotency_keys.pop(job_id, None)
+            # Unless a newer job has taken the key over
+            if key is not None and self._idempotency.get(key) == job_id:
+                del self._idempotency[key]
+        asyncio.get_running_loop().call_later(ttl, drop)
+
+    async def enqueue(self, job_id: str, delay: float = 0):
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, job_id)
+        else:
+            self.queue.put_nowait(job_id)
+
+    async def dequeue(self, timeout: float, lease_seconds: float) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def lease(self, job_id: str, seconds: float):
+        pass
+
+    async def release(self, job_id: str):
+        pass
+
+    async def recover(self) -> int:
+        return 0
+
+    async def set_blob(self, job_id: str, data: bytes, ttl: int):
+        self._blobs[job_id] = data
+
+        def drop():
+            # Unless it was overwritten since (the new blob has its own timer)
+            if self._blobs.get(job_id) is data:
+                del self._blobs[job_id]
+        asyncio.get_running_loop().call_later(ttl, drop)
+
+    async def depth(self) -> int:
+        return self.queue.qsize()
+
+    async def get_blob(self, job_id: str) -> Optional[bytes]:
+        return self._blobs.get(job_id)
+
+
+class RedisJobBackend:
+    """
+    Shared queue: any web node can submit, any worker process can execute.
+    ---------------------------------------------------------------------
+    - job hash      resumegpt:job:<id>
+    - ready list    resumegpt:jobs:queue     (LPUSH / popped by DEQUEUE_SCRIPT)
+    - delayed zset  resumegpt:jobs:delayed   (score = run at; retries with backoff)
+    - lease zset    resumegpt:jobs:leases    (score = lease expiry; heartbeated)
+    A job is popped and leased in one script, so there is no moment when a
+    job is on neither the queue nor the lease set. A worker that dies (OOM,
+    redeploy) stops heartbeating, so its jobs are put back on the queue once
+    their lease runs out, even if it died right after popping one.
+    """
+
+    PREFIX = "resumegpt:job:"
+    QUEUE_KEY = "resumegpt:jobs:queue"
+    DELAYED_KEY = "resumegpt:jobs:delayed"
+    LEASES_KEY = "resumegpt:jobs:leases"
+    IDEMPOTENCY_PREFIX = "resumegpt:jobs:idem:"
+
+    # Seconds between polls of an empty queue (a script can't block like BRPOP)
+    POLL_INTERVAL = 0.5
+
+    # Promotes due retries, then pops one job and leases it
+    DEQUEUE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    for _, job_id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, 100)) do
+        redis.call('ZREM', KEYS[2], job_id)
+        redis.call('LPUSH', KEYS[1], job_id)
+    end
+    local job_id = redis.call('RPOP', KEYS[1])
+    if job_id then
+        redis.call('ZADD', KEYS[3], now + tonumber(ARGV[2]), job_id)
+    end
+    return job_id
+    """
+
+    @staticmethod
+    def _encode(fields: dict) -> dict:
+        return {k: json.dumps(v) for k, v in fields.items()}
+
+    async def create(self, job: dict, idempotency_key: Optional[str], ttl: int) -> tuple[str, bool]:
+        client = get_redis()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.PREFIX + job["id"], mapping=self._encode(job))
+            pipe.expire(self.PREFIX + job["id"], ttl)
+            await pipe.execute()
+        if idempotency_key is not None:
+            idem_key = self.IDEMPOTENCY_PREFIX + idempotency_key
+            # SET NX is the claim: concurrent duplicates all resolve to one job
+            if not await client.set(idem_key, job["id"], nx=True, ex=ttl):
+                existing = await client.get(idem_key)
+                if existing is not None and await client.exists(self.PREFIX + existing.decode()):
+                    await client.delete(self.PREFIX + job["id"])
+                    return existing.decode(), False
+                # The original job has expired; this one takes over the key
+                await client.set(idem_key, job["id"], ex=ttl)
+        return job["id"], True
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        raw = await get_redis().hgetall(self.PREFIX + job_id)
+        if not raw:
+            return None
+        return {k.decode(): json.loads(v) for k, v in raw.items()}
+
+    async def update(self, job_id: str, fields: dict):
+        await get_redis().hset(self.PREFIX + job_id, mapping=self._encode(fields))
+
+    async def expire(self, job_id: str, ttl: int):
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.expire(self.PREFIX + job_id, ttl)
+            pipe.expire(self.PREFIX + job_id + ":blob", ttl)
+            await pipe.execute()
+
+    async def enqueue(self, job_id: str, delay: float = 0):
+        if delay > 0:
+            await get_redis().zadd(self.DELAYED_KEY, {job_id: time.time() + delay})
+        else:
+            await get_redis().lpush(self.QUEUE_KEY, job_id)
+
+    async def dequeue(self, timeout: float, lease_seconds: float) -> Optional[str]:
+        """Pops the next job, already leased to the caller for `lease_seconds`."""
+        give_up_at = time.monotonic() + timeout
+        while True:
+            job_id = await get_redis().eval(
+                self.DEQUEUE_SCRIPT, 3, self.QUEUE_KEY, self.DELAYED_KEY, self.LEASES_KEY,
+                time.time(), lease_seconds,
+            )
+            if job_id is not None:
+                return job_id.decode()
+            if time.monotonic() >= give_up_at:
+                return None
+            await asyncio.sleep(min(self.POLL_INTERVAL, max(give_up_at - time.monotonic(), 0)))
+
+    async def lease(self, job_id: str, seconds: float):
+        await get_redis().zadd(self.LEASES_KEY, {job_id: time.time() + seconds})
+
+    async def release(self, job_id: str):
+        await get_redis().zrem(self.LEASES_KEY, job_id)
+
+    async def recover(self) -> int:
+        """Requeues jobs whose worker stopped heartbeating."""
+        client = get_redis()
+        recovered = 0
+        for member in await client.zrangebyscore(self.LEASES_KEY, "-inf", time.time()):
+            if await client.zrem(self.LEASES_KEY, member):
+                await client.lpush(self.QUEUE_KEY, member)
+                recovered += 1
+        if recovered:
+            logger.warning(f"♻️ Requeued {recovered} jobs from lost workers")
+        return recovered
+
+    async def set_blob(self, job_id: str, data: bytes, ttl: int):
+        await get_redis().set(self.PREFIX + job_id + ":blob", data, ex=ttl)
+
+    async def depth(self) -> int:
+        client = get_redis()
+        return await client.llen(self.QUEUE_KEY) + await client.zcard(self.DELAYED_KEY)
+
+    async def get_blob(self, job_id: str) -> Optional[bytes]:
+        return await get_redis().get(self.PREFIX + job_id + ":blob")
+
+
+# ----------------------------------------------------------------------
+# Queue + workers
+# ----------------------------------------------------------------------
+class JobQueue:
+    """
+    Background jobs for slow LLM and render work.
+    ----------------------------------------------
+    `submit` returns immediately with a job id; workers (in this process or in
+    `python -m src.worker` processes on other nodes) execute the registered
+    handler. Failed attempts are retried with exponential backoff up to
+    `max_attempts`, never past the job's deadline. An idempotency key makes a
+    resubmission return the original job instead of doing the work twice.
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_attempts: int = settings.JOB_MAX_ATTEMPTS,
+        deadline: float = settings.JOB_DEFAULT_DEADLINE,
+        result_ttl: int = settings.JOB_RESULT_TTL,
+        lease_seconds: float = settings.JOB_LEASE_SECONDS,
+    ):
+        self.backend = backend
+        self.max_attempts = max_attempts
+        self.deadline = deadline
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+
+    async def submit(
+        self,
+        kind: str,
+        payload: dict,
+        owner: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        deadline: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ) -> tuple[dict, bool]:
+        """Returns (job, created). `created` is False when the idempotency key matched."""
+        if kind not in _HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": QUEUED,
+            "owner": owner,
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "max_attempts": max_attempts or self.max_attempts,
+            "deadline": now + (deadline or self.deadline),
+            "created_at": now,
+            "updated_at": now,
+        }
+        if idempotency_key is not None:
+            # Scoped per owner so users can't collide with each other's keys
+            idempotency_key = f"{owner}:{kind}:{idempotency_key}"
+        job_id, created = await self.backend.create(job, idempotency_key, self.result_ttl)
+        if created:
+            await self.backend.enqueue(job_id)
+            logger.info(f"📥 Queued {kind} job {job_id}")
+            return job, True
+        return await self.backend.get(job_id), False
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.backend.get(job_id)
+
+    async def put_blob(self, job_id: str, data: bytes):
+        await self.backend.set_blob(job_id, data, self.result_ttl)
+
+    async def get_blob(self, job_id: str) -> Optional[bytes]:
+        return await self.backend.get_blob(job_id)
+
+    async def stats(self) -> dict:
+        """Jobs waiting to run (on Redis also retries in backoff, across all nodes) and running here."""
+        return {"queued": await self.backend.depth(), "running": len(self._running), "workers": len(self._workers)}
+
+    @staticmethod
+    def public_view(job: dict) -> dict:
+        """The job as returned to clients (the payload may hold a whole resume file)."""
+        return {k: v for k, v in job.items() if k not in ("payload", "owner")}
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+    async def _finish(self, job_id: str, fields: dict):
+        fields["updated_at"] = time.time()
+        await self.backend.update(job_id, fields)
+        await self.backend.release(job_id)
+        await self.backend.expire(job_id, self.result_ttl)
+
+    async def _heartbeat(self, job_id: str, work: asyncio.Task):
+        """Renews the lease while `work` runs; cancels it once the lease can't be renewed in time."""
+        interval = self.lease_seconds / 3
+        renewed = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.backend.lease(job_id, self.lease_seconds)
+                renewed = time.monotonic()
+            except Exception as e:
+                if time.monotonic() + interval - renewed < self.lease_seconds:
+                    logger.warning(f"💓 Heartbeat for job {job_id} failed ({e}); retrying")
+                    continue
+                # Recovery will hand the job to another worker; running on would do the work twice
+                logger.error(f"💔 Lost the lease on job {job_id} ({e}); cancelling it")
+                work.cancel()
+                return
+
+    async def execute(self, job_id: str):
+        job = await self.backend.get(job_id)
+        if job is None or job["status"] in TERMINAL:
+            await self.backend.release(job_id)
+            return
+
+        remaining = job["deadline"] - time.time()
+        if remaining <= 0:
+            logger.warning(f"⏱️ Job {job_id} expired before it ran")
+            await self._finish(job_id, {"status": FAILED, "error": "Deadline exceeded"})
+            return
+        if job["attempts"] >= job["max_attempts"]:
+            # Only reachable when workers died mid-job (lease recovery) every time
+            await self._finish(job_id, {"status": FAILED, "error": "Worker lost during every attempt"})
+            return
+
+        attempt = job["attempts"] + 1
+        await self.backend.lease(job_id, self.lease_seconds)
+        await self.backend.update(job_id, {"status": RUNNING, "attempts": attempt, "updated_at": time.time()})
+        work = asyncio.create_task(_HANDLERS[job["kind"]](job))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, work))
+        start = time.time()
+        try:
+            result = await asyncio.wait_for(work, timeout=remaining)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ Job {job_id} ran past its deadline")
+            await self._finish(job_id, {"status": FAILED, "error": "Deadline exceeded"})
+        except PermanentJobError as e:
+            await self._finish(job_id, {"status": FAILED, "error": str(e)})
+        except asyncio.CancelledError:
+            if not heartbeat.done():
+                # Worker shutting down: leave the lease to expire so another worker retries
+                raise
+            # Cancelled by the heartbeat: the job is no longer ours to finish
+        except Exception as e:
+            backoff = settings.JOB_RETRY_BACKOFF * 2 ** (attempt - 1)
+            if attempt < job["max_attempts"] and time.time() + backoff < job["deadline"]:
+                logger.warning(f"🔁 Job {job_id} attempt {attempt} failed ({e}); retrying in {backoff:.1f}s")
+                await self.backend.update(job_id, {"status": QUEUED, "error": str(e), "updated_at": time.time()})
+                # Enqueued before the lease is dropped, so a crash in between can't lose the job
+                await self.backend.enqueue(job_id, delay=backoff)
+                await self.backend.release(job_id)
+            else:
+                logger.error(f"❌ Job {job_id} failed after {attempt} attempts: {e}")
+                await self._finish(job_id, {"status": FAILED, "error": str(e)})
+        else:
+            logger.info(f"✅ Job {job_id} ({job['kind']}) finished in {time.time() - start:.2f}s")
+            await self._finish(job_id, {"status": SUCCEEDED, "result": result, "error": None})
+        finally:
+            heartbeat.cancel()
+
+    async def _worker_loop(self, index: int):
+        while not self._stopping.is_set():
+            try:
+                if index == 0:
+                    await self.backend.recover()
+                job_id = await self.backend.dequeue(timeout=1, lease_seconds=self.lease_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job queue unavailable: {e}")
+                await asyncio.sleep(1)
+                continue
+            if job_id is None:
+                continue
+            task = asyncio.create_task(self.execute(job_id))
+            self._running[job_id] = task
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Job {job_id} crashed the worker loop")
+            finally:
+                self._running.pop(job_id, None)
+
+    def start_workers(self, concurrency: int):
+        if self._workers or concurrency <= 0:
+            return
+        self._stopping.clear()
+        self._workers = [asyncio.create_task(self._worker_loop(i)) for i in range(concurrency)]
+        logger.info(f"👷 Started {concurrency} job workers ({type(self.backend).__name__})")
+
+    async def stop_workers(self, grace: float = settings.JOB_SHUTDOWN_GRACE):
+        """Stops taking jobs, gives running ones `grace` seconds, then abandons them to the lease."""
+        if not self._workers:
+            return
+        self._stopping.set()
+        running = list(self._running.values())
+        if running:
+            logger.info(f"👷 Waiting up to {grace}s for {len(running)} running jobs")
+            await asyncio.wait(running, timeout=grace)
+        for task in self._workers + list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+def build_job_queue() -> JobQueue:
+    if settings.JOB_BACKEND == "redis":
+        return JobQueue(RedisJobBackend())
+    return JobQueue(MemoryJobBackend())
+
+
+# Singleton instance
+job_queue = build_job_queue()
@@ -0,0 +1,100 @@
+import json
+import re
+from typing import Iterable, List, Optional
+
+_SIMPLE_ESCAPES = {
+    '"': '"', "\\": "\\", "/": "/",
+    "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t",
+}
+
+
+class JsonStringFieldStreamer:
+    """
+    Incrementally decodes selected string fields of a JSON object as it streams in.
+    ------------------------------------------------------------------------------
+    Feed raw model output chunk by chunk; `feed` returns the newly decoded text
+    of each watched field, so e.g. the "modified_code" value can be relayed
+    before the closing brace arrives. Escape sequences split across chunks are
+    held back until complete.
+    """
+
+    # How much unmatched tail to keep when searching for the next key
+    _KEY_LOOKBEHIND = 64
+
+    def __init__(self, fields: Iterable[str]):
+        names = "|".join(re.escape(f) for f in fields)
+        self._key_re = re.compile(r'"(' + names + r')"\s*:\s*"')
+        self._buffer = ""
+        self._pos = 0
+        self._field: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[tuple[str, str]]:
+        self._buffer += chunk
+        out: List[tuple[str, str]] = []
+
+        while True:
+            if self._field is None:
+                match = self._key_re.search(self._buffer, self._pos)
+                if match is None:
+                    self._pos = max(self._pos, len(self._buffer) - self._KEY_LOOKBEHIND)
+                    break
+                self._field = match.group(1)
+                self._pos = match.end()
+
+            text, closed = self._read_string()
+            if text:
+                out.append((self._field, text))
+            if not closed:
+                break
+            self._field = None
+
+        # Drop consumed input so the buffer doesn't grow with the whole response
+        if self._pos > 4096:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        return out
+
+    def _read_string(self) -> tuple[str, bool]:
+        """Decodes from the current position; returns (text, reached_closing_quote)."""
+        buf = self._buffer
+        i = self._pos
+        parts = []
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self._pos = i + 1
+                return "".join(parts), True
+            if ch != "\\":
+                j = i
+                while j < len(buf) and buf[j] not in '"\\':
+                    j += 1
+                parts.append(buf[i:j])
+                i = j
+                continue
+
+            # Escape sequence; wait for more input if it's incomplete
+            if i + 1 >= len(buf):
+                break
+            code = buf[i + 1]
+            if code in _SIMPLE_ESCAPES:
+                parts.append(_SIMPLE_ESCAPES[code])
+                i += 2
+            elif code == "u":
+                if i + 6 > len(buf):
+                    break
+                unit = int(buf[i + 2:i + 6], 16)
+                if 0xD800 <= unit <= 0xDBFF:
+                    # High surrogate: decode together with its low half
+                    if i + 12 > len(buf):
+                        break
+                    parts.append(json.loads(f'"{buf[i:i + 12]}"'))
+                    i += 12
+                else:
+                    parts.append(chr(unit))
+                    i += 6
+            else:
+                parts.append(code)
+                i += 2
+
+        self._pos = i
+        return "".join(parts), False
@@ -0,0 +1,66 @@
+import importlib.util
+import logging
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClientFactory:
+    """
+    Application-scoped AsyncOpenAI client.
+    ---------------------------------------
+    One httpx connection pool (keep-alive, HTTP/2 when `h2` is installed) is
+    opened at startup and shared by every agent, so requests reuse warm TLS
+    connections instead of building a new client per call.
+    """
+
+    def __init__(self):
+        self._http: Optional[httpx.AsyncClient] = None
+        self._client: Optional[AsyncOpenAI] = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            self.start()
+        return self._client
+
+    def start(self):
+        if self._client is not None:
+            return
+
+        http2 = settings.OPENAI_HTTP2 and importlib.util.find_spec("h2") is not None
+        self._http = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+            ),
+            # Per-agent read timeouts are passed on each call
+            timeout=httpx.Timeout(None, connect=settings.OPENAI_CONNECT_TIMEOUT),
+        )
+        self._client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=self._http,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+        )
+        logger.info(
+            f"🔌 OpenAI client pool ready ({self._client.base_url}, max_connections={settings.OPENAI_MAX_CONNECTIONS}, "
+            f"keepalive={settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS}, http2={http2})"
+        )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+        self._client = None
+        self._http = None
+
+
+# Singleton instance
+llm_clients = LLMClientFactory()
@@ -0,0 +1,218 @@
+import asyncio
+import csv
+import io
+import logging
+import re
+import shutil
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from xml.etree import ElementTree
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+S_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+# Refuse to inflate OOXML parts beyond this (zip bombs)
+MAX_XML_PART_BYTES = 50 * 1024 * 1024
+
+# ext -> (method name, sync parser returning text or None)
+_EXTRACTORS: Dict[str, tuple[str, Callable[[bytes], Optional[str]]]] = {}
+
+
+def register_extractor(*extensions: str, method: str):
+    """Registers a local parser for one or more file extensions."""
+    def decorator(func: Callable[[bytes], Optional[str]]):
+        for ext in extensions:
+            _EXTRACTORS[ext] = (method, func)
+        return func
+    return decorator
+
+
+def _decode_text(data: bytes) -> str:
+    for encoding in ("utf-8-sig", "cp1252"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("latin-1")
+
+
+def _read_part(archive: zipfile.ZipFile, name: str) -> ElementTree.Element:
+    if archive.getinfo(name).file_size > MAX_XML_PART_BYTES:
+        raise ValueError(f"{name} is too large to parse locally")
+    return ElementTree.fromstring(archive.read(name))
+
+
+def _numbered_parts(archive: zipfile.ZipFile, pattern: str) -> List[str]:
+    """Archive members matching `pattern` (one int group), in numeric order."""
+    regex = re.compile(pattern)
+    matches = [(int(m.group(1)), n) for n in archive.namelist() if (m := regex.fullmatch(n))]
+    return [name for _, name in sorted(matches)]
+
+
+# ----------------------------------------------------------------------
+# Plain text formats
+# ----------------------------------------------------------------------
+@register_extractor(".txt", method="local_txt")
+def extract_txt(data: bytes) -> Optional[str]:
+    return _decode_text(data)
+
+
+@register_extractor(".csv", method="local_csv")
+def extract_csv(data: bytes) -> Optional[str]:
+    rows = csv.reader(io.StringIO(_decode_text(data)))
+    return "\n".join(" | ".join(cell.strip() for cell in row if cell.strip()) for row in rows)
+
+
+# ----------------------------------------------------------------------
+# Office Open XML (parsed straight from the zip, no extra dependencies)
+# ----------------------------------------------------------------------
+def _docx_paragraph(paragraph: ElementTree.Element) -> str:
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == W_NS + "t" and node.text:
+            parts.append(node.text)
+        elif node.tag == W_NS + "tab":
+            parts.append("\t")
+        elif node.tag in (W_NS + "br", W_NS + "cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+
+def _docx_block(element: ElementTree.Element, lines: List[str]):
+    for child in element:
+        if child.tag == W_NS + "p":
+            lines.append(_docx_paragraph(child))
+        elif child.tag == W_NS + "tbl":
+            for row in child.iter(W_NS + "tr"):
+                cells = [
+                    " ".join(_docx_paragraph(p) for p in cell.iter(W_NS + "p")).strip()
+                    for cell in row.iter(W_NS + "tc")
+                ]
+                lines.append(" | ".join(c for c in cells if c))
+        elif child.tag == W_NS + "sdt":
+            content = child.find(W_NS + "sdtContent")
+            if content is not None:
+                _docx_block(content, lines)
+
+
+@register_extractor(".docx", method="local_docx")
+def extract_docx(data: bytes) -> Optional[str]:
+    lines: List[str] = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        # Resumes often keep the name/contact block in the page header
+        for name in _numbered_parts(archive, r"word/header(\d+)\.xml"):
+            _docx_block(_read_part(archive, name), lines)
+        body = _read_part(archive, "word/document.xml").find(W_NS + "body")
+        if body is not None:
+            _docx_block(body, lines)
+    return "\n".join(lines)
+
+
+@register_extractor(".pptx", method="local_pptx")
+def extract_pptx(data: bytes) -> Optional[str]:
+    lines: List[str] = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for name in _numbered_parts(archive, r"ppt/slides/slide(\d+)\.xml"):
+            for paragraph in _read_part(archive, name).iter(A_NS + "p"):
+                text = "".join(t.text or "" for t in paragraph.iter(A_NS + "t"))
+                if text.strip():
+                    lines.append(text)
+    return "\n".join(lines)
+
+
+@register_extractor(".xlsx", method="local_xlsx")
+def extract_xlsx(data: bytes) -> Optional[str]:
+    lines: List[str] = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        shared: List[str] = []
+        if "xl/sharedStrings.xml" in archive.namelist():
+            for item in _read_part(archive, "xl/sharedStrings.xml").iter(S_NS + "si"):
+                shared.append("".join(t.text or "" for t in item.iter(S_NS + "t")))
+
+        for name in _numbered_parts(archive, r"xl/worksheets/sheet(\d+)\.xml"):
+            for row in _read_part(archive, name).iter(S_NS + "row"):
+                cells = []
+                for cell in row.iter(S_NS + "c"):
+                    kind = cell.get("t")
+                    if kind == "inlineStr":
+                        value = "".join(t.text or "" for t in cell.iter(S_NS + "t"))
+                    else:
+                        v = cell.find(S_NS + "v")
+                        value = v.text if v is not None and v.text else ""
+                        if kind == "s" and value:
+                            value = shared[int(value)]
+                    if value.strip():
+                        cells.append(value.strip())
+                if cells:
+                    lines.append(" | ".join(cells))
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# PDF (text layer only, via poppler's pdftotext)
+# ----------------------------------------------------------------------
+async def extract_pdf_text(data: bytes) -> Optional[str]:
+    """
+    Returns the PDF's text layer, or None if it looks scanned/image-only
+    (too little text per page), so the caller can fall back to the LLM.
+    """
+    if shutil.which("pdftotext") is None:
+        return None
+
+    process = await asyncio.create_subprocess_exec(
+        "pdftotext", "-layout", "-enc", "UTF-8", "-", "-",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(data), timeout=30)
+    except asyncio.TimeoutError:
+        process.kill()
+        return None
+    if process.returncode != 0:
+        logger.info(f"pdftotext failed ({process.returncode}): {stderr[:200]!r}")
+        return None
+
+    text = stdout.decode("utf-8", errors="replace")
+    # pdftotext ends every page (including blank, image-only ones) with \f
+    pages = max(text.count("\f"), 1)
+    chars = len(re.sub(r"\s", "", text))
+    if chars / pages < settings.LOCAL_PDF_MIN_CHARS_PER_PAGE:
+        return None
+    return text
+
+
+# ----------------------------------------------------------------------
+# Entry point
+# ----------------------------------------------------------------------
+async def extract_locally(file_bytes: bytes, filename: str) -> Optional[tuple[str, str]]:
+    """
+    Tries to extract text without an LLM.
+    Returns (text, method) or None when the format needs the LLM path
+    (scanned PDFs, legacy .doc, images, unknown types).
+    """
+    ext = Path(filename).suffix.lower()
+
+    try:
+        if ext == ".pdf":
+            text, method = await extract_pdf_text(file_bytes), "local_pdf_text"
+        elif ext in _EXTRACTORS:
+            method, parser = _EXTRACTORS[ext]
+            # Parsing is CPU-bound; keep it off the event loop
+            text = await asyncio.to_thread(parser, file_bytes)
+        else:
+            return None
+    except Exception as e:
+        logger.warning(f"Local extraction failed for {filename}, falling back to LLM: {e}")
+        return None
+
+    if not text or not text.strip():
+        return None
+    return text.strip(), method
@@ -0,0 +1,275 @@
+import asyncio
+import functools
+import inspect
+import logging
+import math
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers everything from a cache lookup to a 120s model call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+# A gauge callback returns a number, or (labels, value) pairs for labelled gauges
+GaugeSamples = Union[float, int, None, Iterable[Tuple[Dict[str, str], Optional[float]]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [per-bucket counts, sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Gauge:
+    """
+    Read at scrape time from a callback (sync or async), so nothing has to push
+    updates. `metric_type="counter"` exposes totals another component keeps.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Union[GaugeSamples, Awaitable[GaugeSamples]]],
+        metric_type: str = "gauge",
+    ):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.metric_type = metric_type
+
+    async def render(self) -> List[str]:
+        try:
+            samples = self.callback()
+            if inspect.isawaitable(samples):
+                samples = await samples
+        except Exception as e:
+            logger.warning(f"Metric {self.name} could not be collected: {e}")
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.metric_type}"]
+        if samples is None or isinstance(samples, (int, float)):
+            samples = [({}, samples)]
+        for labels, value in samples:
+            if value is None:
+                continue
+            lines.append(f"{self.name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus text-format registry.
+    ----------------------------------------
+    Counters and histograms are updated in place; gauges are callbacks read on
+    each scrape. Values are per process (scrape every worker).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Counter, Histogram, Gauge]] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, callback: Callable, metric_type: str = "gauge") -> Gauge:
+        return self._register(Gauge(name, help, callback, metric_type))
+
+    async def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            if isinstance(metric, Gauge):
+                lines.extend(await metric.render())
+            else:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instance
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "resumegpt_stage_seconds", "Time spent in each pipeline stage", ["stage", "outcome"]
+)
+LLM_TOKENS = metrics.counter(
+    "resumegpt_llm_tokens_total", "Tokens used by model calls", ["model", "kind"]
+)
+HTTP_SECONDS = metrics.histogram(
+    "resumegpt_http_request_seconds", "HTTP request latency (until the response body is sent)",
+    ["method", "route", "status"]
+)
+
+
+class stage_timer:
+    """
+    Times a pipeline stage into resumegpt_stage_seconds{stage, outcome}.
+    Works as a context manager (`with` / `async with`) and as a decorator for
+    sync or async functions; `outcome` is "error" when an exception escapes.
+
+        with stage_timer("html_preprocess"):
+            ...
+
+        @stage_timer("sanitize")
+        def sanitize_html_merged(self, merged): ...
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._started: List[float] = []
+
+    def __enter__(self):
+        self._started.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._started.pop()
+        # Cancellation (client went away) is not a failure of the stage
+        failed = exc_type is not None and not issubclass(exc_type, asyncio.CancelledError)
+        STAGE_SECONDS.observe(elapsed, stage=self.stage, outcome="error" if failed else "ok")
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    def __call__(self, func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage_timer(self.stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(self.stage):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def observe_stage(stage: str, seconds: float, outcome: str = "ok"):
+    """Records a duration measured elsewhere (e.g. inside a render worker process)."""
+    STAGE_SECONDS.observe(seconds, stage=stage, outcome=outcome)
+
+
+def record_usage(model: str, usage) -> None:
+    """Adds a response's token usage (Chat Completions or Responses API shape) to the counters."""
+    if usage is None:
+        return
+    prompt = getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", None) or 0
+    completion = getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", None) or 0
+    LLM_TOKENS.inc(prompt, model=model, kind="prompt")
+    LLM_TOKENS.inc(completion, model=model, kind="completion")
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware: requests in flight and latency per route. Pure ASGI rather
+    than BaseHTTPMiddleware so streamed responses count until their last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = 0
+        metrics.gauge("resumegpt_http_requests_in_flight", "HTTP requests being handled", lambda: self.in_flight)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight -= 1
+            # Route templates ("/jobs/{job_id}") keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_SECONDS.observe(
+                time.perf_counter() - started, method=scope["method"], route=route, status=str(status["code"])
+            )
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from typing import List, Optional, Sequence
+
+from ..config import settings
+from .byte_stores import MemoryLRUStore, RedisLRUStore
+from .html_patch import PatchError, apply_edits
+from .modify_context import role_and_content
+
+logger = logging.getLogger(__name__)
+
+# Bump when the modifier's prompts change so old answers are not served
+MODIFY_CACHE_VERSION = "modify-1"
+
+_STYLE_BLOCK_RE = re.compile(r"<style\b[^>]*>(.*?)</style\s*>", re.IGNORECASE | re.DOTALL)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, whitespace and trailing punctuation don't change what is being asked."""
+    return _SPACE_RE.sub(" ", prompt).strip().lower().rstrip(".!?")
+
+
+def _style_blocks(html_code: str) -> List[str]:
+    return _STYLE_BLOCK_RE.findall(html_code)
+
+
+def _style_only(edits: List[dict], html_code: str) -> bool:
+    """True when every edit is a replace_text whose anchor lies inside a <style> block."""
+    if not edits:
+        return False
+    css = "\n".join(_style_blocks(html_code))
+    for edit in edits:
+        if edit.get("op") != "replace_text":
+            return False
+        find = edit.get("find") or ""
+        # The anchor must not also appear in the document body
+        if not find or find not in css or html_code.count(find) != css.count(find):
+            return False
+    return True
+
+
+class ModifyResponseCache:
+    """
+    Cache of /modify-resume answers.
+    --------------------------------
+    Two levels:
+
+    - exact: (html, normalized prompt, history, extracted data, model, mode)
+      -> the full result (minus the unchanged HTML, for advice). Any
+      difference in the inputs is a miss.
+    - edits: (the document's <style> blocks, normalized prompt, model) -> the
+      patch edits, for first-turn requests whose edits only rewrite CSS
+      ("make the font smaller", "fix overlapping text"). Other resumes on the
+      same template share those blocks, so the edits are replayed on their
+      HTML; an edit that no longer applies is simply a miss.
+
+    Entries expire after `ttl` seconds on both backends; size is bounded by
+    the byte store.
+    """
+
+    def __init__(self, backend, ttl: int = settings.MODIFY_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = {"exact": 0, "edits": 0}
+        self.misses = 0
+
+    def stats(self) -> dict:
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        return {
+            "exact_hits": self.hits["exact"],
+            "edit_hits": self.hits["edits"],
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+        }
+
+    @staticmethod
+    def exact_key(
+        html_code: str, prompt: str, history: Optional[Sequence], extracted_data: Optional[str],
+        model: str, mode: str,
+    ) -> str:
+        turns = [role_and_content(message) for message in history or []]
+        inputs = json.dumps([normalize_prompt(prompt), turns, extracted_data or ""])
+        return f"exact:{MODIFY_CACHE_VERSION}:{model}:{mode}:{_sha(html_code)}:{_sha(inputs)}"
+
+    @staticmethod
+    def edits_key(html_code: str, prompt: str, model: str) -> str:
+        styles = _sha("\n".join(_style_blocks(html_code)))
+        return f"edits:{MODIFY_CACHE_VERSION}:{model}:{styles}:{_sha(normalize_prompt(prompt))}"
+
+    async def _get(self, key: str) -> Optional[dict]:
+        try:
+            raw = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Modify cache read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        # The memory store has no TTL of its own
+        if time.time() - entry["stored_at"] > self.ttl:
+            return None
+        return entry["value"]
+
+    async def _set(self, key: str, value: dict):
+        try:
+            await self.backend.set(key, json.dumps({"stored_at": time.time(), "value": value}).encode("utf-8"))
+        except Exception as e:
+            logger.warning(f"Modify cache write failed: {e}")
+
+    async def lookup(
+        self, html_code: str, prompt: str, history: Optional[Sequence], extracted_data: Optional[str],
+        model: str, mode: str,
+    ) -> Optional[dict]:
+        """A modify_html result for this request, or None."""
+        result = await self._get(self.exact_key(html_code, prompt, history, extracted_data, model, mode))
+        if result is not None:
+            self.hits["exact"] += 1
+            # Advice entries leave the (unchanged) document out
+            return {"modified_html": html_code, **result, "cache_hit": "exact", "tokens_saved": 0}
+
+        if mode == "patch" and not history:
+            entry = await self._get(self.edits_key(html_code, prompt, model))
+            if entry is not None:
+                try:
+                    modified_html = apply_edits(html_code, entry["edits"])
+                except PatchError:
+                    modified_html = None
+                if modified_html is not None:
+                    self.hits["edits"] += 1
+                    return {
+                        "success": True,
+                        "modified_html": modified_html,
+                        "reply_text": entry["reply_text"],
+                        "edit_mode": "patch",
+                        "edits_applied": len(entry["edits"]),
+                        "tokens_saved": 0,
+                        "cache_hit": "edits",
+                    }
+
+        self.misses += 1
+        return None
+
+    async def store(
+        self, html_code: str, prompt: str, history: Optional[Sequence], extracted_data: Optional[str],
+        model: str, mode: str, result: dict,
+    ):
+        """Caches a successful modify_html result (and its edits, when they are CSS-only)."""
+        dropped = ("edits", "cache_hit", "modified_html") if mode == "advice" else ("edits", "cache_hit")
+        value = {k: v for k, v in result.items() if k not in dropped}
+        await self._set(self.exact_key(html_code, prompt, history, extracted_data, model, mode), value)
+
+        edits = result.get("edits")
+        if mode == "patch" and not history and result.get("edit_mode") == "patch" and _style_only(edits, html_code):
+            await self._set(
+                self.edits_key(html_code, prompt, model),
+                {"edits": edits, "reply_text": result["reply_text"]},
+            )
+
+
+def build_modify_cache() -> Optional[ModifyResponseCache]:
+    backend_name = settings.MODIFY_CACHE_BACKEND
+    if backend_name == "redis":
+        backend = RedisLRUStore("modify:v1", settings.MODIFY_CACHE_MAX_BYTES, settings.MODIFY_CACHE_TTL)
+    elif backend_name == "memory":
+        backend = MemoryLRUStore(settings.MODIFY_CACHE_MAX_BYTES)
+    else:
+        return None
+    logger.info(f"🗄️ Modify response cache backend: {backend_name}")
+    return ModifyResponseCache(backend)
+
+
+# Singleton instance (None when disabled)
+modify_cache = build_modify_cache()
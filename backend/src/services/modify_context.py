@@ -0,0 +1,166 @@
+import html
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from ..config import settings
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_TAG_RE = re.compile(r"<(script|style)\b.*?</\1\s*>|<[^>]+>", re.IGNORECASE | re.DOTALL)
+_SPACE_RE = re.compile(r"\s+")
+_BULLET_RE = re.compile(r"^[\W_]+")
+
+
+def _normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", text).strip().lower()
+
+
+def visible_text(html_code: str) -> str:
+    """Normalized text content of an HTML document (tags, scripts and styles removed)."""
+    return _normalize(html.unescape(_TAG_RE.sub(" ", html_code)))
+
+
+def role_and_content(message) -> tuple[str, str]:
+    # ChatMessage models from the API, or plain dicts
+    if isinstance(message, dict):
+        return message.get("role", "user"), message.get("content", "")
+    return message.role, message.content
+
+
+@dataclass
+class ModifyContext:
+    """The optional parts of a modify prompt, already cut to size."""
+    history_text: str = ""
+    extracted_text: str = ""
+    breakdown: Dict[str, int] = field(default_factory=dict)
+
+
+class ModifyContextBuilder:
+    """
+    Token-budgeted context for HtmlModifier.
+    ----------------------------------------
+    The system prompt, the HTML and the user's request are always sent; what
+    is left of `budget` is shared between:
+
+    - extracted_data, minus every line already visible in the HTML (what is
+      left is the content the template skipped), cut at a line boundary;
+    - the chat history, newest first: recent turns verbatim, older ones
+      shortened to `summary_chars`, the rest dropped.
+
+    Each gets half of the remainder, and either can use what the other leaves.
+    """
+
+    def __init__(
+        self,
+        budget: int = settings.MODIFIER_CONTEXT_BUDGET,
+        model: Optional[str] = settings.MODIFIER_MODEL,
+        summary_chars: int = settings.MODIFIER_HISTORY_SUMMARY_CHARS,
+    ):
+        self.budget = budget
+        self.model = model
+        self.summary_chars = summary_chars
+
+    def _count(self, text: str) -> int:
+        return estimate_tokens(text, self.model)
+
+    def _residual_lines(self, extracted_data: str, html_code: str) -> List[str]:
+        """Lines of the extracted text that don't already appear in the HTML."""
+        shown = visible_text(html_code)
+        lines, seen = [], set()
+        for line in extracted_data.splitlines():
+            key = _BULLET_RE.sub("", _normalize(line))
+            if not key or key in seen or key in shown:
+                continue
+            seen.add(key)
+            lines.append(line.strip())
+        return lines
+
+    def _fit_extracted(self, lines: List[str], budget: int) -> tuple[str, int]:
+        kept, used = [], 0
+        for line in lines:
+            cost = self._count(line + "\n")
+            if used + cost > budget:
+                kept.append("[...]")
+                break
+            kept.append(line)
+            used += cost
+        return "\n".join(kept), used
+
+    def _fit_history(self, history: Sequence, budget: int) -> tuple[str, int, dict]:
+        verbatim, shortened = [], []
+        used = 0
+        stats = {"history_turns": len(history), "history_verbatim": 0, "history_shortened": 0}
+        for message in reversed(history):
+            role, content = role_and_content(message)
+            line = f"[{role.upper()}]: {content}\n"
+            cost = self._count(line)
+            # Verbatim until the first turn that doesn't fit; everything older is shortened
+            if not shortened and used + cost <= budget:
+                verbatim.append(line)
+                used += cost
+                continue
+            if len(content) > self.summary_chars:
+                line = f"[{role.upper()}]: {content[:self.summary_chars].rstrip()}...\n"
+                cost = self._count(line)
+            if used + cost > budget:
+                break
+            shortened.append(line)
+            used += cost
+
+        stats["history_verbatim"] = len(verbatim)
+        stats["history_shortened"] = len(shortened)
+        if not verbatim and not shortened:
+            return "", 0, stats
+
+        text = "Here is the conversation history that provides context for the request:\n"
+        if shortened:
+            text += "(Earlier turns, shortened:)\n" + "".join(reversed(shortened))
+            if verbatim:
+                text += "(Most recent turns:)\n"
+        text += "".join(reversed(verbatim)) + "\n"
+        return text, used, stats
+
+    def build(
+        self,
+        *,
+        system_prompt: str,
+        html_code: str,
+        prompt: str,
+        history: Optional[Sequence] = None,
+        extracted_data: Optional[str] = None,
+    ) -> ModifyContext:
+        required = {
+            "system": self._count(system_prompt),
+            "html": self._count(html_code),
+            "prompt": self._count(prompt),
+        }
+        available = max(self.budget - sum(required.values()), 0)
+        if not available:
+            logger.warning(
+                f"Modify request needs {sum(required.values())} tokens before any context "
+                f"(budget {self.budget}); history and extracted data are left out"
+            )
+
+        history = list(history or [])
+        lines = self._residual_lines(extracted_data, html_code) if extracted_data else []
+        share = available // 2 if history and lines else available
+
+        # Extracted content first (capped at its share), then history gets the rest
+        extracted_text, extracted_used = self._fit_extracted(lines, share)
+        history_text, history_used, history_stats = self._fit_history(history, available - extracted_used)
+        if extracted_text.endswith("[...]") and available - extracted_used - history_used > 0:
+            # History left room: let the extracted content use it
+            extracted_text, extracted_used = self._fit_extracted(lines, available - history_used)
+
+        breakdown = {
+            **required,
+            "history": history_used,
+            "extracted": extracted_used,
+            "extracted_original": self._count(extracted_data) if extracted_data else 0,
+            **history_stats,
+        }
+        breakdown["total"] = sum(required.values()) + history_used + extracted_used
+        return ModifyContext(history_text, extracted_text, breakdown)
@@ -0,0 +1,145 @@
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from ..config import settings
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Request classes, cheapest first
+ADVICE = "advice"  # a question about the resume; nothing to change
+EDIT = "edit"  # a small, literal change ("change my phone number")
+REDESIGN = "redesign"  # layout, structure or whole-document rewrites
+
+ROUTES = metrics.counter(
+    "resumegpt_modify_routes_total", "Modify requests per routed request class", ["request_class", "model"]
+)
+
+_EDIT_VERBS = (
+    r"change|update|add|remove|delete|drop|replace|make|set|fix|move|put|insert|rename|rewrite|rephrase|"
+    r"reword|bold|italici[sz]e|underline|increase|decrease|reduce|shorten|expand|translate|use|switch|"
+    r"swap|correct|improve|enhance|polish|apply|implement|include|convert|format|highlight"
+)
+# Asking for a change, politely or not: "can you ...", "please ...", or starting with a verb
+_REQUEST_RE = re.compile(
+    rf"^\s*(?:(?:please|pls|ok(?:ay)?|yes|sure)\b[\s,]*)*"
+    rf"(?:(?:can|could|would|will)\s+you\b|(?:{_EDIT_VERBS})\b)"
+    rf"|\bplease\b|\bgo ahead\b|\bdo it\b",
+    re.IGNORECASE,
+)
+# A change tacked on to a question: "what's wrong with my summary? fix it"
+_TRAILING_REQUEST_RE = re.compile(
+    rf"(?:[,;.!?]|\b(?:and|then))\s*(?:please\s+)?(?:{_EDIT_VERBS})\b", re.IGNORECASE
+)
+_QUESTION_RE = re.compile(
+    r"\?\s*$|^\s*(?:what|which|why|how|who|when|where|should|shall|is|are|am|does|do|did|would|any)\b",
+    re.IGNORECASE,
+)
+_ADVICE_RE = re.compile(
+    r"\b(?:advice|advise|suggestions?|recommend\w*|tips?|feedback|review|critique|opinion|thoughts|"
+    r"weakness(?:es)?|strengths?|ats)\b",
+    re.IGNORECASE,
+)
+_REDESIGN_RE = re.compile(
+    r"\b(?:re-?design\w*|layout|columns?|two-column|sidebar|restructur\w*|reorgani[sz]\w*|rearrang\w*|"
+    r"reorder\w*|template|theme|colou?r scheme|modern(?:i[sz]e)?|revamp\w*|overhaul\w*|overlap\w*|"
+    r"overflow\w*|one page|single page)\b"
+    r"|\b(?:move|swap)\b[^.?!]*\bsections?\b"
+    r"|\b(?:rewrite|rephrase|reword|translate)\b[^.?!]*\b(?:all|every|whole|entire)\b",
+    re.IGNORECASE,
+)
+
+# Function words, contractions and the resume vocabulary prompts are made of
+_ENGLISH_WORD_RE = re.compile(
+    rf"(?:{_EDIT_VERBS}|a|an|the|my|me|i|you|your|it|its|this|that|these|those|to|of|in|on|at|for|with|"
+    r"from|by|and|or|but|not|no|is|are|was|be|can|could|would|will|should|please|do|does|what|which|why|"
+    r"how|all|more|less|some|each|every|only|also|just|than|so|as|into|about|up|out|new|s|t|ll|re|ve|m|d|"
+    r"resume|cv|summary|experience|education|skills?|sections?|font|page|header|heading|title|job|role|"
+    r"name|phone|number|email|address|bullets?|text|colou?r|size|lines?|words?)",
+    re.IGNORECASE,
+)
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def _looks_english(text: str) -> bool:
+    """
+    Whether enough of the prompt is English for the regexes below to read it.
+    Capitalised words after the first are left out: names and technologies
+    ("add Python, Kubernetes and AWS") say nothing about the language.
+    """
+    words = [word for i, word in enumerate(_WORD_RE.findall(text)) if i == 0 or not word[0].isupper()]
+    if not words:
+        return True
+    known = sum(1 for word in words if _ENGLISH_WORD_RE.fullmatch(word))
+    return known * 4 >= len(words)
+
+
+def classify_prompt(prompt: str) -> str:
+    """
+    ADVICE, EDIT or REDESIGN for a modify request. Requests that look like
+    both a question and a change count as a change: routing advice to an
+    edit model only costs a little more, the other way round drops the edit.
+    Prompts in other languages go to REDESIGN: the regexes can't tell what
+    they ask for, and only the large model copes with any of it.
+    """
+    text = prompt.strip()
+    if not _looks_english(text):
+        return REDESIGN
+    asks_for_change = bool(_REQUEST_RE.search(text) or _TRAILING_REQUEST_RE.search(text))
+    if not asks_for_change and (_QUESTION_RE.search(text) or _ADVICE_RE.search(text)):
+        return ADVICE
+    if _REDESIGN_RE.search(text):
+        return REDESIGN
+    return EDIT
+
+
+@dataclass(frozen=True)
+class Route:
+    request_class: str
+    model: str
+    mode: str  # "advice" (reply only), "patch" (targeted edits) or "full" (whole document)
+
+
+class ModifyRouter:
+    """
+    Picks the model and output mode for a modify request.
+    -----------------------------------------------------
+    Prompts are sorted by classify_prompt(), a handful of local regexes
+    (microseconds, no model call):
+
+    - advice:   a small model answers in plain text; the HTML is not echoed
+    - edit:     the configured mode (targeted edits by default) on a small model
+    - redesign: the whole document from the large model, skipping a patch
+                attempt that would mostly fail over to it anyway
+    """
+
+    def __init__(self, routes: Dict[str, Route]):
+        self.routes = routes
+
+    def route(self, prompt: str) -> Route:
+        start = time.perf_counter()
+        route = self.routes[classify_prompt(prompt)]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        ROUTES.inc(request_class=route.request_class, model=route.model)
+        logger.info(
+            f"🧭 Routed modify request as {route.request_class} -> {route.model} ({route.mode}) "
+            f"in {elapsed_ms:.2f}ms"
+        )
+        return route
+
+
+def build_modify_router() -> Optional[ModifyRouter]:
+    if not settings.MODIFIER_ROUTING_ENABLED:
+        return None
+    return ModifyRouter({
+        ADVICE: Route(ADVICE, settings.MODIFIER_ADVICE_MODEL, "advice"),
+        EDIT: Route(EDIT, settings.MODIFIER_EDIT_MODEL, settings.MODIFIER_MODE),
+        REDESIGN: Route(REDESIGN, settings.MODIFIER_MODEL, "full"),
+    })
+
+
+# Singleton instance (None when routing is disabled)
+modify_router = build_modify_router()
@@ -0,0 +1,115 @@
+import re
+
+# CSS declarations WeasyPrint can't render (or renders badly); they are dropped.
+# Matches up to the ';' (or the end of the block/attribute when it is the last one);
+# quoted strings in the value, e.g. url('#clip'), are skipped whole.
+# The pattern is lowercase and runs over a lowered copy: a case-sensitive scan
+# with a literal first character is several times faster than re.IGNORECASE.
+_UNSUPPORTED = r"""(?:
+      backdrop-filter\s*:
+    | clip-path\s*:
+    | mix-blend-mode\s*:
+    | transform\s*:\s*translate
+    | filter\s*:\s*blur
+)(?:"[^"]*"|'[^']*'|[^;{}"'])*;?"""
+_UNSUPPORTED_RE = re.compile(_UNSUPPORTED, re.VERBOSE)
+_UNSUPPORTED_ANYCASE_RE = re.compile(
+    r"(?<![\w-])(?:-(?:webkit|moz|ms|o)-)?" + _UNSUPPORTED, re.IGNORECASE | re.VERBOSE
+)
+_VENDOR_PREFIXES = ("-webkit-", "-moz-", "-ms-", "-o-")
+
+# Only the parts of a document that can hold CSS are rewritten: <style> blocks
+# and the value of style= attributes. Comments and scripts are matched so
+# they are skipped whole, and </head> marks where the print stylesheet goes.
+# Every alternative hangs off the leading '<' so the scan skips text quickly.
+_TOKEN_RE = re.compile(
+    r"""<(?:
+        (?P<comment>!--.*?-->)
+      | (?P<script>script\b.*?</script\s*>)
+      | (?P<style>style\b[^>]*>(?P<css>.*?)</style\s*>)
+      | (?P<head_close>/head\s*>)
+      | (?P<tag>[a-zA-Z][^>]*?\sstyle\s*=[^>]*>)
+    )""",
+    re.IGNORECASE | re.DOTALL | re.VERBOSE,
+)
+_BODY_OPEN_RE = re.compile(r"<body\b[^>]*>", re.IGNORECASE)
+# The style attribute of a tag; the value ends at its own quote
+_STYLE_ATTR_RE = re.compile(
+    r"""\sstyle\s*=\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[^\s"'>]+))""", re.IGNORECASE
+)
+
+
+def _strip_unsupported(css: str) -> str:
+    lowered = css.lower()
+    if len(lowered) != len(css):
+        # Some non-ASCII characters change length when lowered; offsets would be off
+        return _UNSUPPORTED_ANYCASE_RE.sub("", css)
+
+    parts, last = [], 0
+    for match in _UNSUPPORTED_RE.finditer(lowered):
+        start = match.start()
+        for prefix in _VENDOR_PREFIXES:
+            if lowered.endswith(prefix, 0, start):
+                start -= len(prefix)
+                break
+        before = lowered[start - 1] if start else " "
+        if before.isalnum() or before in "-_":
+            continue  # part of a longer property name
+        parts.append(css[last:start])
+        last = match.end()
+    if not parts:
+        return css
+    parts.append(css[last:])
+    return "".join(parts)
+
+
+PRINT_CSS = """
+    <style>
+        @page { size: A4; margin: 0; }
+        body { margin: 0; padding: 0; -webkit-print-color-adjust: exact; print-color-adjust: exact; }
+        * { box-sizing: border-box; }
+    </style>
+    """
+
+
+def preprocess_html_for_pdf(html_content: str) -> str:
+    """
+    Makes HTML safe for WeasyPrint in a single pass: strips unsupported CSS
+    from <style> blocks and style= attributes (never from text content) and
+    injects the print stylesheet once, before </head> (or after <body>).
+    Not memoized: inputs are user documents. Untouched templates are
+    preprocessed once by the registry (TemplateEntry.pdf_html).
+    """
+    injected = False
+
+    def rewrite(match: re.Match) -> str:
+        nonlocal injected
+        kind = match.lastgroup
+        if kind == "head_close":
+            if injected:
+                return match.group(0)
+            injected = True
+            return PRINT_CSS + match.group(0)
+        if kind == "style":
+            html = match.string
+            start, end = match.span("css")
+            css = _strip_unsupported(match.group("css"))
+            return html[match.start():start] + css + html[end:match.end()]
+        if kind == "tag":
+            tag = match.group(0)
+            attr = _STYLE_ATTR_RE.search(tag)
+            if attr is None:
+                return tag
+            group = attr.lastgroup
+            start, end = attr.span(group)
+            return tag[:start] + _strip_unsupported(attr.group(group)) + tag[end:]
+        return match.group(0)
+
+    html_content = _TOKEN_RE.sub(rewrite, html_content)
+    if injected:
+        return html_content
+
+    body = _BODY_OPEN_RE.search(html_content)
+    if body:
+        return html_content[:body.end()] + PRINT_CSS + html_content[body.end():]
+    return PRINT_CSS + html_content
@@ -0,0 +1,364 @@
+import asyncio
+import html
+import logging
+import io
+import multiprocessing
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from .metrics import observe_stage, stage_timer
+
+logger = logging.getLogger(__name__)
+
+
+class RenderQueueFullError(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class RenderTimeoutError(Exception):
+    """Raised when a render job does not finish within its time budget."""
+
+
+class RenderPoolBrokenError(RenderQueueFullError):
+    """Raised when the worker running a job died; the pool is restarted, so a retry can succeed."""
+
+
+# <link> tags; comments are matched so links inside them are skipped
+_LINK_RE = re.compile(r"<!--.*?-->|<link\b[^>]*>", re.IGNORECASE | re.DOTALL)
+_ATTR_RE = re.compile(r"""\b(rel|href)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+
+
+def _stylesheet_links(html_content: str) -> List[str]:
+    """Absolute http(s) URLs of a document's <link rel="stylesheet"> tags."""
+    urls = []
+    for match in _LINK_RE.finditer(html_content):
+        tag = match.group(0)
+        if tag.startswith("<!--"):
+            continue
+        attrs = {
+            m.group(1).lower(): html.unescape(m.group(2) or m.group(3) or m.group(4) or "")
+            for m in _ATTR_RE.finditer(tag)
+        }
+        href = attrs.get("href", "")
+        if "stylesheet" in attrs.get("rel", "").lower().split() and href.startswith(("http://", "https://")):
+            urls.append(href)
+    return urls
+
+
+def _caching_url_fetcher(context: "_RenderContext"):
+    """A WeasyPrint URL fetcher that answers repeated http(s) fetches from `context`."""
+    from weasyprint.urls import URLFetcher, URLFetcherResponse
+
+    class CachingURLFetcher(URLFetcher):
+        def fetch(self, url, headers=None):
+            if not url.startswith(("http://", "https://")):
+                return super().fetch(url, headers)
+            cached = context.resources.get(url)
+            if cached is not None:
+                context.resources.move_to_end(url)
+            else:
+                context.fetches += 1
+                response = super().fetch(url, headers)
+                try:
+                    body = response.read()
+                finally:
+                    response.close()
+                cached = (response.url, body, dict(response.headers.items()), response.status)
+                context.resources[url] = cached
+                if len(context.resources) > context.max_resources:
+                    context.resources.popitem(last=False)
+            final_url, body, response_headers, status = cached
+            return URLFetcherResponse(final_url, body, response_headers, status)
+
+    return CachingURLFetcher()
+
+
+class _RenderContext:
+    """
+    WeasyPrint state kept for the lifetime of one pool worker.
+    -----------------------------------------------------------
+    A FontConfiguration loads every installed font (the Noto CJK and emoji
+    sets are large), and each render used to build a new one and, for
+    <link> stylesheets, re-download the same template CSS and the web fonts
+    it references. Here one FontConfiguration is shared, and a caching URL
+    fetcher keeps the last `max_resources` http(s) responses by URL.
+
+    Stylesheets stay in the document, so WeasyPrint applies them as author
+    styles in document order, exactly as without the cache. Parsed CSS
+    objects are not reused: parsing a sheet registers its @page, @font-face
+    and counter-style rules into the document being rendered.
+    """
+
+    def __init__(self, max_resources: int):
+        from weasyprint.text.fonts import FontConfiguration
+
+        self.font_config = FontConfiguration()
+        self.max_resources = max_resources
+        # url -> (final url, body, headers, status)
+        self.resources: OrderedDict = OrderedDict()
+        # Network fetches so far; a render that adds none was fully warm
+        self.fetches = 0
+        self.url_fetcher = _caching_url_fetcher(self)
+
+    def warm(self, documents: List[str]):
+        """Fetches the given documents' linked stylesheets and lays out a small page so fonts are loaded."""
+        from weasyprint import HTML
+
+        for document in documents:
+            for url in _stylesheet_links(document):
+                try:
+                    self.url_fetcher.fetch(url).close()
+                except Exception as e:
+                    logger.warning(f"Could not prefetch stylesheet {url}: {e}")
+        HTML(string="<p>Warm-up</p>").write_pdf(font_config=self.font_config)
+
+
+# Set in each pool worker by _init_worker
+_context: Optional[_RenderContext] = None
+
+
+def _init_worker(max_resources: int, warm_documents: List[str]):
+    """Pool initializer: builds the worker's render context and warms it."""
+    global _context
+    _context = _RenderContext(max_resources)
+    try:
+        _context.warm(warm_documents)
+    except Exception as e:
+        # An initializer error would break the whole pool; renders warm up lazily instead
+        logger.warning(f"PDF worker warm-up failed: {e}")
+
+
+def _ping() -> None:
+    """No-op task submitted at start so worker processes (and their warm-up) start eagerly."""
+
+
+def _render_pdf(html_content: str) -> Tuple[bytes, bool, float]:
+    """
+    Runs inside a pool worker process.
+    WeasyPrint is imported here so the web process never has to load it.
+    Returns (pdf bytes, whether nothing had to be fetched, seconds).
+    """
+    from weasyprint import HTML
+
+    global _context
+    started = time.perf_counter()
+    if _context is None:
+        _context = _RenderContext(settings.PDF_STYLESHEET_CACHE_SIZE)
+
+    fetches = _context.fetches
+    pdf_bytes = HTML(string=html_content, url_fetcher=_context.url_fetcher).write_pdf(
+        font_config=_context.font_config
+    )
+    return pdf_bytes, _context.fetches == fetches, time.perf_counter() - started
+
+
+def _render_thumbnails(pdf_bytes: bytes, widths: List[int], formats: List[str]) -> Dict[str, bytes]:
+    """
+    Runs inside a pool worker process.
+    Rasterises the first page once (poppler via pdf2image) at the largest
+    width, then downsamples for the smaller ones. Keys are "<width>.<format>".
+    """
+    from pdf2image import convert_from_bytes
+    from PIL import Image
+
+    page = convert_from_bytes(
+        pdf_bytes, first_page=1, last_page=1, size=(max(widths), None), fmt="png"
+    )[0].convert("RGB")
+
+    thumbnails = {}
+    for width in sorted(widths, reverse=True):
+        height = round(page.height * width / page.width)
+        image = page if width == page.width else page.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            if fmt == "webp":
+                image.save(buffer, format="WEBP", quality=82, method=6)
+            else:
+                image.save(buffer, format=fmt.upper(), optimize=True)
+            thumbnails[f"{width}.{fmt}"] = buffer.getvalue()
+    return thumbnails
+
+
+class PdfRenderer:
+    """
+    Bounded process pool for WeasyPrint renders.
+    ---------------------------------------------
+    Keeps CPU-heavy PDF generation (and thumbnail rasterising) off the event loop. At most
+    `workers + queue_size` jobs are admitted at once; anything beyond that is
+    rejected immediately so callers can answer 503 instead of piling up.
+    Workers are recycled after `max_tasks_per_worker` renders, a job
+    that runs past `timeout` has its worker killed (see _retire_executor),
+    and a pool left broken by a dead worker is replaced. Both only ever act
+    on the pool the job was submitted to, never on its replacement.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.PDF_RENDER_WORKERS,
+        queue_size: int = settings.PDF_RENDER_QUEUE_SIZE,
+        timeout: float = settings.PDF_RENDER_TIMEOUT,
+        max_tasks_per_worker: int = settings.PDF_RENDER_MAX_TASKS_PER_WORKER,
+        stylesheet_cache_size: int = settings.PDF_STYLESHEET_CACHE_SIZE,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.stylesheet_cache_size = stylesheet_cache_size
+        self._warm_documents: List[str] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        # Render latency split by whether the worker had everything fetched already
+        self._latency = {"cold": [0, 0.0], "warm": [0, 0.0]}
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    @property
+    def pending(self) -> int:
+        """Jobs currently running or waiting for a worker."""
+        return self._pending
+
+    def stats(self) -> dict:
+        stats = {"pending": self._pending, "capacity": self.capacity}
+        for kind, (count, seconds) in self._latency.items():
+            stats[f"renders_{kind}"] = count
+            stats[f"render_{kind}_avg_ms"] = round(seconds / count * 1000, 1) if count else None
+        return stats
+
+    def start(self, warm_documents: Optional[List[str]] = None):
+        """
+        Starts the pool. Each worker shares one FontConfiguration across renders
+        and prefetches the linked stylesheets of `warm_documents` (the bundled templates).
+        """
+        if warm_documents is not None:
+            self._warm_documents = list(warm_documents)
+        if self._executor is not None:
+            return
+        # max_tasks_per_child is not supported with the 'fork' start method
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=self.max_tasks_per_worker or None,
+            initializer=_init_worker,
+            initargs=(self.stylesheet_cache_size, self._warm_documents),
+        )
+        # Workers are spawned on demand; one no-op per worker starts them (and their warm-up) now
+        for _ in range(self.workers):
+            self._executor.submit(_ping)
+        logger.info(
+            f"🖨️ PDF renderer started ({self.workers} workers, queue={self.queue_size}, "
+            f"timeout={self.timeout}s, recycle_after={self.max_tasks_per_worker})"
+        )
+
+    def shutdown(self):
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        logger.info("🖨️ PDF renderer stopped")
+
+    def _release(self):
+        self._pending -= 1
+
+    async def render(self, html_content: str) -> bytes:
+        """Renders HTML to PDF bytes in a worker process."""
+        started = time.perf_counter()
+        pdf_bytes, warm, seconds = await self._run(_render_pdf, html_content)
+        # WeasyPrint time inside the worker vs. time spent queued for one
+        observe_stage("pdf_render", seconds)
+        observe_stage("pdf_render_wait", max(time.perf_counter() - started - seconds, 0.0))
+        latency = self._latency["warm" if warm else "cold"]
+        latency[0] += 1
+        latency[1] += seconds
+        if not warm:
+            logger.info(f"🖨️ Cold PDF render took {seconds * 1000:.0f}ms ({self.stats()})")
+        return pdf_bytes
+
+    async def render_thumbnails(
+        self, pdf_bytes: bytes, widths: List[int], formats: List[str]
+    ) -> Dict[str, bytes]:
+        """Rasterises the first page of a PDF to images, keyed "<width>.<format>"."""
+        async with stage_timer("thumbnail_render"):
+            return await self._run(_render_thumbnails, pdf_bytes, widths, formats)
+
+    async def _run(self, func: Callable, *args):
+        if self._executor is None:
+            raise RuntimeError("PdfRenderer has not been started")
+
+        if self._pending >= self.capacity:
+            raise RenderQueueFullError(f"Render queue is full ({self._pending}/{self.capacity} jobs)")
+
+        executor = self._executor
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            # Broken since the last job failed; rebuild the pool and try once more
+            self._restart_broken(executor)
+            executor = self._executor
+            future = executor.submit(func, *args)
+
+        # The slot is held until the worker actually finishes, even if the
+        # caller gave up, so the admission count reflects real pool load.
+        self._pending += 1
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # A job still queued is simply dropped; a running one needs its worker stopped
+            # (a retired pool's workers are already due to be killed)
+            if not future.cancel() and executor is self._executor:
+                self._retire_executor()
+            raise RenderTimeoutError(f"PDF render exceeded {self.timeout}s")
+        except BrokenProcessPool as e:
+            self._restart_broken(executor)
+            raise RenderPoolBrokenError("A PDF render worker died; the pool has been restarted") from e
+
+    def _restart_broken(self, executor: ProcessPoolExecutor):
+        """Replaces `executor` after one of its workers died (e.g. OOM kill), unless that already happened."""
+        if executor is not self._executor:
+            return
+        logger.error("PDF render pool is broken, restarting it")
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self.start()
+
+    def _retire_executor(self):
+        """
+        Moves new work to a fresh pool after a job ran past its timeout.
+        The worker running it would otherwise keep rendering and hold a pool
+        slot indefinitely. The old pool's other jobs are left to finish; once
+        `timeout` has passed, every job it was given has been abandoned by
+        its caller, so any worker still busy is killed.
+        """
+        old = self._executor
+        if old is None:
+            return
+        logger.error("A PDF render timed out; replacing the pool and killing its workers after the grace period")
+        self._executor = None
+        self.start()
+        # ProcessPoolExecutor has no public way to stop a running task (before 3.14),
+        # and shutdown() forgets its processes, so they are collected first
+        processes = list((getattr(old, "_processes", None) or {}).values())
+        old.shutdown(wait=False, cancel_futures=False)
+        asyncio.get_running_loop().call_later(self.timeout, self._terminate_workers, processes)
+
+    @staticmethod
+    def _terminate_workers(processes: list):
+        busy = [process for process in processes if process.is_alive()]
+        for process in busy:
+            process.terminate()
+        if busy:
+            logger.info(f"🖨️ Terminated {len(busy)} workers of a retired PDF render pool")
+
+
+# Singleton instance
+pdf_renderer = PdfRenderer()
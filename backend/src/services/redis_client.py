@@ -0,0 +1,22 @@
+from typing import Optional
+
+import redis.asyncio as redis
+
+from ..config import settings
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Returns the process-wide Redis connection pool, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+async def close_redis():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,82 @@
+import asyncio
+import hashlib
+import logging
+from typing import Awaitable, Callable, Dict
+
+from ..config import settings
+from .byte_stores import MemoryLRUStore, RedisLRUStore
+
+logger = logging.getLogger(__name__)
+
+
+class PdfRenderCache:
+    """
+    Content-addressed cache of rendered PDFs.
+    ------------------------------------------
+    Keys are the SHA-256 of the preprocessed HTML, which doubles as the ETag.
+    Concurrent requests for the same digest share a single render.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def digest(processed_html: str) -> str:
+        return hashlib.sha256(processed_html.encode("utf-8")).hexdigest()
+
+    async def get_or_render(
+        self, key: str, render: Callable[[], Awaitable[bytes]]
+    ) -> tuple[bytes, bool]:
+        """Returns (pdf_bytes, was_cached)."""
+        try:
+            cached = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Render cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight), True
+
+        self.misses += 1
+        # The render is a task of its own rather than part of this request, so
+        # the requester disconnecting doesn't cancel it for everyone waiting on it
+        task = asyncio.create_task(self._render_and_store(key, render))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._finished(key, task))
+        return await asyncio.shield(task), False
+
+    async def _render_and_store(self, key: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        pdf_bytes = await render()
+        try:
+            await self.backend.set(key, pdf_bytes)
+        except Exception as e:
+            logger.warning(f"Render cache write failed: {e}")
+        return pdf_bytes
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark retrieved so a failed render whose waiters all left doesn't log noise
+        if not task.cancelled():
+            task.exception()
+
+
+def build_render_cache() -> PdfRenderCache:
+    if settings.RENDER_CACHE_BACKEND == "redis":
+        backend = RedisLRUStore("pdf:v1", settings.RENDER_CACHE_MAX_BYTES, settings.RENDER_CACHE_TTL)
+    else:
+        backend = MemoryLRUStore(settings.RENDER_CACHE_MAX_BYTES)
+    logger.info(f"🗄️ PDF render cache backend: {settings.RENDER_CACHE_BACKEND}")
+    return PdfRenderCache(backend)
+
+
+# Singleton instance
+render_cache = build_render_cache()
@@ -0,0 +1,19 @@
+import json
+from typing import Any, AsyncIterator
+
+# Disable proxy buffering (nginx) so events reach the browser as they are sent
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Formats one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(events: AsyncIterator[tuple[str, Any]]) -> AsyncIterator[str]:
+    """Adapts an agent's (event, data) iterator into an SSE body."""
+    async for event, data in events:
+        yield sse_event(event, data)
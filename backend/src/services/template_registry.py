@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..config import settings
+from .pdf_preprocess import preprocess_html_for_pdf
+
+logger = logging.getLogger(__name__)
+
+_TEMPLATE_ID_RE = re.compile(r"[\w-]+")
+_HEAD_RE = re.compile(r"<head\b[^>]*>.*?</head>", re.IGNORECASE | re.DOTALL)
+_DEFAULT_HEAD = "<head><meta charset=\"UTF-8\"></head>"
+
+# Used when a request names a template that does not exist
+DEFAULT_TEMPLATE_ID = "classic"
+
+
+class TemplateEntry:
+    __slots__ = ("id", "filename", "name", "content", "digest", "etag", "head", "pdf_html", "mtime", "size")
+
+    def __init__(self, path: Path, content: str, mtime: float, size: int):
+        self.id = path.stem
+        self.filename = path.name
+        self.name = path.stem.replace("_", " ").title()
+        self.content = content
+        self.digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        self.etag = f'"{self.digest}"'
+        match = _HEAD_RE.search(content)
+        self.head = match.group(0) if match else _DEFAULT_HEAD
+        # What /generate-pdf would render for the untouched template
+        self.pdf_html = preprocess_html_for_pdf(content)
+        self.mtime = mtime
+        self.size = size
+
+
+class TemplateRegistry:
+    """
+    All HTML templates, loaded once and held in memory.
+    ---------------------------------------------------
+    Request handlers only ever read from the in-memory snapshot; a background
+    task polls mtimes (no extra dependency for inotify) and swaps in changed
+    files, so editing a template on disk still shows up within a few seconds.
+    Jinja2 sources are polled too: any change bumps `generation`, which the
+    TemplateRenderer uses to drop its compiled templates.
+    """
+
+    def __init__(self, directory: Path, poll_interval: float = settings.TEMPLATE_POLL_INTERVAL):
+        self.directory = Path(directory)
+        self.jinja_dir = self.directory / "jinja"
+        self.poll_interval = poll_interval
+        self._entries: Dict[str, TemplateEntry] = {}
+        self._structured: frozenset = frozenset()
+        self._jinja_files: Dict[str, tuple] = {}  # name -> (mtime, size), partials included
+        self.etag = '""'
+        self.generation = 0  # bumped on every change, lets dependents drop derived caches
+        self._poller: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Loading (blocking; run off the event loop)
+    # ------------------------------------------------------------------
+    def _scan(self) -> bool:
+        """Reloads new/changed templates and drops deleted ones. Returns True if anything changed."""
+        current: Dict[str, TemplateEntry] = {}
+        changed = False
+        for path in sorted(self.directory.glob("*.html")):
+            try:
+                stat = path.stat()
+                entry = self._entries.get(path.stem)
+                if entry is not None and entry.mtime == stat.st_mtime and entry.size == stat.st_size:
+                    current[path.stem] = entry
+                    continue
+                current[path.stem] = TemplateEntry(path, path.read_text(encoding="utf-8"), stat.st_mtime, stat.st_size)
+                changed = True
+                logger.info(f"📄 Loaded template {path.name}")
+            except (FileNotFoundError, UnicodeDecodeError) as e:
+                logger.warning(f"Skipping template {path.name}: {e}")
+        if set(current) != set(self._entries):
+            changed = True
+
+        jinja_files = {}
+        for path in self.jinja_dir.glob("*.j2"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            jinja_files[path.name] = (stat.st_mtime, stat.st_size)
+        structured = frozenset(
+            name[: -len(".html.j2")] for name in jinja_files
+            if name.endswith(".html.j2") and not name.startswith("_")
+        )
+        # An edited .j2 changes no entry, but the renderer's compiled templates are stale
+        changed = changed or jinja_files != self._jinja_files
+
+        if changed:
+            listing = "\n".join(f"{e.id}:{e.digest}:{e.id in structured}" for e in current.values())
+            self.etag = f'"{hashlib.sha256(listing.encode()).hexdigest()[:32]}"'
+            # Single assignment, so readers never see a half-updated registry
+            self._entries, self._structured, self._jinja_files = current, structured, jinja_files
+            self.generation += 1
+        return changed
+
+    def load(self):
+        self._scan()
+        logger.info(f"📚 Template registry: {len(self._entries)} templates ({len(self._structured)} structured)")
+
+    async def refresh(self) -> bool:
+        return await asyncio.to_thread(self._scan)
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Template refresh failed: {e}")
+
+    async def start(self):
+        await asyncio.to_thread(self.load)
+        if self._poller is None and self.poll_interval > 0:
+            self._poller = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+
+    # ------------------------------------------------------------------
+    # Lookups (in-memory only)
+    # ------------------------------------------------------------------
+    def list(self) -> List[TemplateEntry]:
+        return list(self._entries.values())
+
+    def get(self, template_id: str) -> Optional[TemplateEntry]:
+        """Looks up a template by id ("classic") or filename ("classic.html")."""
+        template_id = template_id or ""
+        if template_id.endswith(".html"):
+            template_id = template_id[: -len(".html")]
+        if not _TEMPLATE_ID_RE.fullmatch(template_id):
+            return None
+        return self._entries.get(template_id)
+
+    def resolve(self, template_id: str) -> Optional[TemplateEntry]:
+        """Like get(), but falls back to the default template."""
+        return self.get(template_id) or self._entries.get(DEFAULT_TEMPLATE_ID)
+
+    def is_structured(self, template_id: str) -> bool:
+        return template_id in self._structured
@@ -0,0 +1,75 @@
+import html
+import logging
+import re
+from typing import List
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+
+from ..schemas.resume import ResumeData
+from .template_registry import TemplateRegistry
+
+logger = logging.getLogger(__name__)
+
+_TITLE_RE = re.compile(r"<title>.*?</title>", re.IGNORECASE | re.DOTALL)
+_SAFE_URL_RE = re.compile(r"^(https?://|mailto:|tel:|#)|^[^:]*$", re.IGNORECASE)
+
+
+def _safe_url(url: str) -> str:
+    """Extracted links end up in an href: drop javascript:/data: and friends."""
+    url = (url or "").strip()
+    return url if _SAFE_URL_RE.match(url) else "#"
+
+
+class TemplateNotFoundError(Exception):
+    """Raised when a template has no Jinja2 version."""
+
+
+class ResumeTemplateRenderer:
+    """
+    Deterministic, LLM-free template rendering.
+    ------------------------------------------
+    `templates/jinja/<id>.html.j2` holds the body markup of each template; the
+    <head> (fonts + CSS) is lifted from the static `templates/<id>.html` via the
+    registry, so the styling lives in exactly one place and the static file
+    stays the preview.
+    """
+
+    def __init__(self, registry: TemplateRegistry):
+        self.registry = registry
+        self.env = Environment(
+            loader=FileSystemLoader(registry.jinja_dir),
+            autoescape=select_autoescape(["html", "j2"]),
+            undefined=StrictUndefined,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            # The registry watches the files; don't stat them on every render
+            auto_reload=False,
+        )
+        self.env.filters["safe_url"] = _safe_url
+        self._generation = registry.generation
+
+    def warm(self):
+        """Compiles every structured template up front (blocking; call off the event loop)."""
+        for template_id in self.available():
+            self.env.get_template(f"{template_id}.html.j2")
+
+    def available(self) -> List[str]:
+        return sorted(e.id for e in self.registry.list() if self.supports(e.id))
+
+    def supports(self, template_id: str) -> bool:
+        return self.registry.is_structured(template_id) and self.registry.get(template_id) is not None
+
+    def render(self, template_id: str, resume: ResumeData) -> str:
+        if not self.supports(template_id):
+            raise TemplateNotFoundError(f"Template {template_id} has no structured version")
+
+        head = _TITLE_RE.sub(
+            lambda _: f"<title>{html.escape(resume.contact.name)} - Resume</title>",
+            self.registry.get(template_id).head,
+            count=1,
+        )
+        if self._generation != self.registry.generation:
+            self.env.cache.clear()
+            self._generation = self.registry.generation
+        template = self.env.get_template(f"{template_id}.html.j2")
+        return template.render(head=head, r=resume)
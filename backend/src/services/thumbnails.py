@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..config import settings
+from .pdf_renderer import PdfRenderer
+from .template_registry import TemplateEntry, TemplateRegistry
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_NAME = "preview.pdf"
+
+MEDIA_TYPES = {"webp": "image/webp", "png": "image/png", "pdf": "application/pdf"}
+
+
+class TemplateThumbnailStore:
+    """
+    Pre-rendered template previews.
+    -------------------------------
+    Each template is rendered once to PDF and its first page rasterised to
+    thumbnails at every configured width/format. Files live under
+    `<directory>/<template sha256>/`, so an edited template simply gets a new
+    directory and the URLs for the old content stay valid until pruned.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        widths: List[int] = settings.THUMBNAIL_WIDTHS,
+        formats: List[str] = settings.THUMBNAIL_FORMATS,
+    ):
+        self.directory = Path(directory)
+        self.widths = sorted(widths)
+        self.formats = list(formats)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._builder: Optional[asyncio.Task] = None
+
+    def _dir(self, digest: str) -> Path:
+        return self.directory / digest
+
+    def _complete(self, digest: str) -> bool:
+        # Directories are renamed into place fully written, so any file means all of them
+        return (self._dir(digest) / PREVIEW_NAME).exists()
+
+    def pick_width(self, requested: Optional[int]) -> int:
+        """Smallest rendered width that is at least `requested` (largest if none is)."""
+        if requested is None:
+            return self.widths[len(self.widths) // 2]
+        return next((w for w in self.widths if w >= requested), self.widths[-1])
+
+    # ------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------
+    def _write(self, digest: str, files: Dict[str, bytes]):
+        target = self._dir(digest)
+        tmp = self.directory / f".{digest}.{uuid.uuid4().hex[:8]}.tmp"
+        tmp.mkdir(parents=True)
+        for name, data in files.items():
+            (tmp / name).write_bytes(data)
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            # Another worker process finished the same template first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    async def ensure(self, template: TemplateEntry, renderer: PdfRenderer):
+        """Renders the template's previews unless they already exist (single-flight)."""
+        digest = template.digest
+        if await asyncio.to_thread(self._complete, digest):
+            return
+
+        inflight = self._inflight.get(digest)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[digest] = future
+        try:
+            pdf_bytes = await renderer.render(template.pdf_html)
+            files = await renderer.render_thumbnails(pdf_bytes, self.widths, self.formats)
+            files[PREVIEW_NAME] = pdf_bytes
+            await asyncio.to_thread(self._write, digest, files)
+            logger.info(f"🖼️ Rendered previews for template {template.id} ({len(files)} files)")
+            future.set_result(None)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(digest, None)
+
+    def _prune(self, keep: set):
+        for path in self.directory.iterdir():
+            # Dot-prefixed dirs are another process's in-progress writes
+            if path.is_dir() and not path.name.startswith(".") and path.name not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+    async def build(self, registry: TemplateRegistry, renderer: PdfRenderer):
+        """Renders every template that has no previews yet and drops previews of removed content."""
+        await asyncio.to_thread(self.directory.mkdir, parents=True, exist_ok=True)
+        templates = registry.list()
+        for template in templates:
+            try:
+                await self.ensure(template, renderer)
+            except Exception as e:
+                logger.warning(f"Preview rendering failed for template {template.id}: {e}")
+        await asyncio.to_thread(self._prune, {t.digest for t in templates})
+
+    def start(self, registry: TemplateRegistry, renderer: PdfRenderer):
+        """Builds missing previews in the background so startup is not delayed."""
+        if self._builder is None:
+            self._builder = asyncio.create_task(self.build(registry, renderer))
+
+    async def stop(self):
+        if self._builder is not None:
+            self._builder.cancel()
+            self._builder = None
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    async def get(
+        self, template: TemplateEntry, renderer: PdfRenderer, name: str
+    ) -> Optional[bytes]:
+        """Returns one preview file ("400.webp", "preview.pdf"), rendering on demand."""
+        path = self._dir(template.digest) / name
+        if not await asyncio.to_thread(path.exists):
+            await self.ensure(template, renderer)
+        try:
+            return await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            return None
+
+
+# Singleton instance
+thumbnail_store = TemplateThumbnailStore(Path(settings.THUMBNAIL_DIR))
@@ -0,0 +1,46 @@
+import importlib.util
+import logging
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# A dependency, but the heuristic below keeps counts working where it can't be
+# imported or its encoding file can't be fetched (see TIKTOKEN_CACHE_DIR in the Dockerfile)
+HAS_TIKTOKEN = importlib.util.find_spec("tiktoken") is not None
+
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o / gpt-4.1 family
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: Optional[str]):
+    """The tiktoken encoding for `model`, or None (cached) when it can't be loaded."""
+    if not HAS_TIKTOKEN:
+        return None
+    import tiktoken
+
+    try:
+        if model:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        # e.g. the encoding file can't be downloaded; don't fail requests over a count
+        logger.warning(f"tiktoken encoding unavailable ({e}); using the character heuristic")
+        return None
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Token count of `text` for `model`. Exact with tiktoken; if its encoding is
+    unavailable, a rough ~4 characters per token (English prose and HTML).
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        # disallowed_special=() so text that happens to contain "<|endoftext|>" still counts
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
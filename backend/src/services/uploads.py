@@ -0,0 +1,184 @@
+import hashlib
+import io
+import logging
+import struct
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from fastapi import UploadFile
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Read first to turn away unsupported files before the rest; Starlette spools uploads over 1 MB to disk
+HEAD_SIZE = 256 * 1024
+# Bytes inspected to tell text from binary
+TEXT_SNIFF_BYTES = 8192
+
+# kind -> the extension the rest of the pipeline (local parsers, OpenAI) expects
+EXTENSIONS = {
+    "pdf": ".pdf",
+    "docx": ".docx",
+    "doc": ".doc",
+    "pptx": ".pptx",
+    "xlsx": ".xlsx",
+    "txt": ".txt",
+    "csv": ".csv",
+}
+
+# The part every OOXML package of each kind contains
+_OOXML_PARTS = {
+    "word/document.xml": "docx",
+    "ppt/presentation.xml": "pptx",
+    "xl/workbook.xml": "xlsx",
+}
+
+_PDF_MAGIC = b"%PDF-"
+_ZIP_MAGIC = b"PK\x03\x04"
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # legacy Office (.doc, but also .xls, .ppt, .msg)
+# Root storage CLSIDs of Word 6/95 and Word 97-2003 documents (as stored, little-endian)
+_WORD_CLSIDS = {
+    bytes.fromhex("0009020000000000c000000000000046"),
+    bytes.fromhex("0609020000000000c000000000000046"),
+}
+_NULL_CLSID = bytes(16)
+_UTF16_BOMS = (b"\xff\xfe", b"\xfe\xff")
+
+
+class UploadError(Exception):
+    status_code = 400
+
+
+class UploadTooLargeError(UploadError):
+    status_code = 413
+
+
+class UnsupportedUploadError(UploadError):
+    status_code = 415
+
+
+def _looks_like_text(sample: bytes) -> bool:
+    if sample.startswith(_UTF16_BOMS):
+        return True
+    if b"\x00" in sample:
+        return False
+    # Control characters other than whitespace are rare in text of any 8-bit encoding
+    controls = sum(1 for byte in sample if byte < 0x20 and byte not in b"\t\n\r\f")
+    return controls <= len(sample) // 100
+
+
+def _ole_root_clsid(data: bytes) -> Optional[bytes]:
+    """The CLSID of an OLE compound file's root storage (the first directory entry), or None."""
+    try:
+        sector_shift, = struct.unpack_from("<H", data, 0x1E)
+        first_dir_sector, = struct.unpack_from("<I", data, 0x30)
+    except struct.error:
+        return None
+    if not 7 <= sector_shift <= 16:
+        return None
+    offset = ((first_dir_sector + 1) << sector_shift) + 0x50
+    clsid = data[offset:offset + 16]
+    return clsid if len(clsid) == 16 else None
+
+
+def _is_word_document(data: bytes, filename: str) -> bool:
+    """Tells .doc from the other OLE formats; the extension only decides when no CLSID was written."""
+    clsid = _ole_root_clsid(data)
+    if clsid in _WORD_CLSIDS:
+        return True
+    return clsid == _NULL_CLSID and Path(filename).suffix.lower() == ".doc"
+
+
+def _plausible_start(head: bytes) -> bool:
+    """Whether the first chunk could begin a supported file (checked before reading the rest)."""
+    return head.startswith((_PDF_MAGIC, _ZIP_MAGIC, _OLE_MAGIC)) or _looks_like_text(head[:TEXT_SNIFF_BYTES])
+
+
+def sniff(data: bytes, filename: str = "") -> str:
+    """
+    The file's real type from its leading bytes. The claimed extension only
+    decides between formats the bytes can't tell apart (.txt / .csv, or a
+    legacy Office file whose writer left the CLSID blank).
+    Raises UnsupportedUploadError.
+    """
+    if not data:
+        raise UploadError("The file is empty")
+    if data.startswith(_PDF_MAGIC):
+        return "pdf"
+    if data.startswith(_OLE_MAGIC):
+        if _is_word_document(data, filename):
+            return "doc"
+        raise UnsupportedUploadError("Legacy Office files other than .doc (e.g. .xls, .ppt) are not supported")
+    if data.startswith(_ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                names = set(archive.namelist())
+        except zipfile.BadZipFile:
+            raise UnsupportedUploadError("The file is a damaged zip archive")
+        for part, kind in _OOXML_PARTS.items():
+            if part in names:
+                return kind
+        raise UnsupportedUploadError("Zip archives other than .docx, .pptx and .xlsx are not supported")
+    if _looks_like_text(data[:TEXT_SNIFF_BYTES]):
+        return "csv" if Path(filename).suffix.lower() == ".csv" else "txt"
+    raise UnsupportedUploadError("Unsupported file format")
+
+
+@dataclass(frozen=True)
+class Upload:
+    """
+    A resume file, read once.
+    -------------------------
+    `data` is the only copy of the bytes for the whole pipeline; `digest`
+    (sha256) keys the extraction cache and the OpenAI file registry; `kind`
+    comes from the content, and `filename` carries the matching extension
+    so extension-based steps agree with it.
+    """
+    filename: str
+    data: bytes
+    digest: str
+    kind: str
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @classmethod
+    def from_bytes(cls, filename: str, data: bytes, digest: Optional[str] = None) -> "Upload":
+        kind = sniff(data, filename)
+        return cls(_filename_for(filename, kind), data, digest or hashlib.sha256(data).hexdigest(), kind)
+
+
+def _filename_for(filename: str, kind: str) -> str:
+    path = Path(filename or "upload")
+    expected = EXTENSIONS[kind]
+    if path.suffix.lower() == expected:
+        return path.name
+    if path.suffix:
+        logger.info(f"🔎 {path.name} is really a {kind} file")
+    return path.stem + expected
+
+
+async def ingest_upload(file: UploadFile, max_bytes: int = settings.UPLOAD_MAX_BYTES) -> Upload:
+    """
+    Reads an upload into the one bytes object the pipeline keeps, never more
+    than `max_bytes` + 1 of it. Raises UploadError.
+    """
+    limit_mb = f"{max_bytes / 2**20:.3g} MB"
+    # Starlette knows the size of a spooled upload without reading it
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(f"{file.filename} is larger than {limit_mb}")
+
+    head = await file.read(HEAD_SIZE)
+    if head and not _plausible_start(head):
+        raise UnsupportedUploadError("Unsupported file format")
+    # Read again from the start rather than appending to `head`: joining chunks
+    # (or converting a bytearray) would copy the whole file once more
+    await file.seek(0)
+    data = await file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise UploadTooLargeError(f"{file.filename} is larger than {limit_mb}")
+    return Upload.from_bytes(file.filename or "upload", data)
@@ -0,0 +1,43 @@
+"""
+Job worker process.
+-------------------
+Runs the application's lifespan (PDF pool, OpenAI client, agents...) without
+the HTTP server and consumes background jobs from Redis:
+
+    uv run python -m src.worker
+
+Scale by running more of these, on any node that can reach REDIS_URL.
+SIGTERM stops taking new jobs and lets running ones finish (up to
+JOB_SHUTDOWN_GRACE); anything still running after that is picked up by
+another worker once its lease expires.
+"""
+import asyncio
+import logging
+import signal
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker():
+    # The worker is the web app's lifespan with more consumers and no server
+    settings.JOB_INPROCESS_WORKERS = settings.JOB_WORKER_CONCURRENCY
+    from .main import app, lifespan
+
+    if settings.JOB_BACKEND != "redis":
+        logger.warning("⚠️ JOB_BACKEND is not 'redis': this worker will never see jobs from the web process")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with lifespan(app):
+        logger.info(f"👷 Worker ready ({settings.JOB_WORKER_CONCURRENCY} concurrent jobs)")
+        await stop.wait()
+        logger.info("👷 Shutting down worker")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
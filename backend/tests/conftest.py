@@ -0,0 +1,19 @@
+import os
+
+import pytest
+
+# Settings are read at import time; keep the tests off any local .env services
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+
+@pytest.fixture
+async def fake_redis(monkeypatch):
+    """An in-process Redis (with Lua) behind get_redis()."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from src.services import redis_client
+
+    client = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(redis_client, "_client", client)
+    yield client
+    await client.aclose()
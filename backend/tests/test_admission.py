@@ -0,0 +1,118 @@
+import pytest
+
+from src.services import admission
+from src.services.admission import (
+    AdmissionController, AdmissionRejected, ClassLimits, MemoryAdmissionBackend, RedisAdmissionBackend,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    monkeypatch.setattr(admission.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "redis":
+        request.getfixturevalue("fake_redis")
+        return RedisAdmissionBackend(lease_seconds=60)
+    return MemoryAdmissionBackend()
+
+
+def controller(backend, **limits):
+    return AdmissionController(backend, {"llm": ClassLimits(**{"rate": 0, "burst": 0, "in_flight": 0, **limits})})
+
+
+async def test_bucket_allows_the_burst_then_refills(backend, clock):
+    admissions = controller(backend, rate=0.5, burst=2)
+    for _ in range(2):
+        await admissions.release(await admissions.acquire("llm", "alice"))
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admissions.acquire("llm", "alice")
+    assert rejected.value.reason == "rate_limited_user"
+    assert rejected.value.retry_after == pytest.approx(2)
+    # Other users have their own bucket
+    await admissions.acquire("llm", "bob")
+
+    clock.now += 2
+    await admissions.acquire("llm", "alice")
+
+
+async def test_global_bucket_is_shared_by_all_users(backend, clock):
+    admissions = controller(backend, rate=10, burst=10, global_rate=1)
+    await admissions.acquire("llm", "alice")
+    await admissions.acquire("llm", "bob")
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admissions.acquire("llm", "carol")
+    assert rejected.value.reason == "rate_limited_global"
+
+
+async def test_in_flight_caps_until_released(backend, clock):
+    admissions = controller(backend, in_flight=1, global_in_flight=2)
+    first = await admissions.acquire("llm", "alice")
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admissions.acquire("llm", "alice")
+    assert rejected.value.reason == "in_flight_user"
+
+    await admissions.acquire("llm", "bob")
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admissions.acquire("llm", "carol")
+    assert rejected.value.reason == "in_flight_global"
+
+    await admissions.release(first)
+    await admissions.acquire("llm", "alice")
+    assert admissions.stats() == {"in_flight_llm": 2}
+
+
+async def test_rate_limited_request_hands_back_its_slots(backend, clock):
+    admissions = controller(backend, rate=1, burst=1, in_flight=2)
+    await admissions.acquire("llm", "alice")
+    with pytest.raises(AdmissionRejected):
+        await admissions.acquire("llm", "alice")
+    clock.now += 1
+    # One slot is still held by the first request; the rejected one gave its slot back
+    await admissions.acquire("llm", "alice")
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admissions.acquire("llm", "alice")
+    assert rejected.value.reason == "in_flight_user"
+
+
+class FailingGlobalBackend(MemoryAdmissionBackend):
+    async def acquire(self, key, limit, ticket):
+        if key.endswith(":global"):
+            raise ConnectionError("backend down")
+        return await super().acquire(key, limit, ticket)
+
+
+async def test_backend_failure_part_way_releases_the_user_slot(clock):
+    backend = FailingGlobalBackend()
+    admissions = controller(backend, in_flight=1, global_in_flight=5)
+    let_through = await admissions.acquire("llm", "alice")
+    assert let_through.keys == []
+    assert backend._in_flight == {}
+
+
+async def test_prune_keeps_buckets_that_refill_slowly(clock, monkeypatch):
+    backend = MemoryAdmissionBackend()
+    monkeypatch.setattr(backend, "PRUNE_AT", 2)
+    # Refills in 100s
+    await backend.take("render:user:alice", 0.05, 5)
+    clock.now += 10
+    # Refill in 0.2s; the third bucket triggers a prune
+    await backend.take("llm:user:bob", 10, 2)
+    await backend.take("llm:user:carol", 10, 2)
+    clock.now += 1
+    await backend.take("llm:user:dave", 10, 2)
+    assert set(backend._buckets) == {"render:user:alice", "llm:user:dave"}
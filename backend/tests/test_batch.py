@@ -0,0 +1,30 @@
+import asyncio
+
+from src import main
+from src.services.admission import LLM, AdmissionController, ClassLimits, MemoryAdmissionBackend
+
+
+async def test_batch_items_share_the_users_llm_slots(monkeypatch):
+    controller = AdmissionController(MemoryAdmissionBackend(), {LLM: ClassLimits(rate=0, burst=0, in_flight=2)})
+    monkeypatch.setattr(main, "admission", controller)
+    running, peak = 0, 0
+
+    async def fake_process_html(upload, *args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return {"success": True, "html_code": "<html></html>"}
+
+    monkeypatch.setattr(main, "run_process_html", fake_process_html)
+    for agent in ("extractor", "unified_processor", "structurer"):
+        monkeypatch.setattr(main.app.state, agent, None, raising=False)
+    runner = main.batch_runner("classic", render_pdf=False, concurrency=4, user_id="user_1")
+    items = [(f"cv{i}.txt", b"resume text") for i in range(4)]
+
+    results = [item async for item in runner.run(items)]
+    assert all(item["success"] for item in results)
+    assert peak == 2
+    assert controller.in_flight[LLM] == 0
+    runner.archive()
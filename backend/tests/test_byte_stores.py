@@ -0,0 +1,47 @@
+import time
+
+from src.services import byte_stores
+from src.services.byte_stores import DiskLRUStore, RedisLRUStore
+
+
+async def total(client, store: RedisLRUStore) -> int:
+    return int(await client.get(store.size_key) or 0)
+
+
+async def test_redis_overwrite_replaces_size(fake_redis):
+    store = RedisLRUStore("test", max_bytes=100, ttl=60)
+    for _ in range(5):
+        await store.set("a", b"x" * 40)
+    assert await total(fake_redis, store) == 40
+    assert await store.get("a") == b"x" * 40
+
+
+async def test_redis_evicts_least_recently_used(fake_redis):
+    store = RedisLRUStore("test", max_bytes=100, ttl=60)
+    await store.set("a", b"a" * 40)
+    await store.set("b", b"b" * 40)
+    await store.get("a")
+    await store.set("c", b"c" * 40)
+    assert await store.get("b") is None
+    assert await store.get("a") == b"a" * 40
+    assert await store.get("c") == b"c" * 40
+    assert await total(fake_redis, store) == 80
+
+
+async def test_redis_reconciles_expired_entries(fake_redis, monkeypatch):
+    store = RedisLRUStore("test", max_bytes=100, ttl=60)
+    await store.set("a", b"a" * 60)
+    # An hour later "a" has expired; its bytes must not push out the new entry
+    later = time.time() + 3600
+    monkeypatch.setattr(byte_stores.time, "time", lambda: later)
+    await store.set("b", b"b" * 60)
+    assert await store.get("b") == b"b" * 60
+    assert await total(fake_redis, store) == 60
+    assert await fake_redis.zcard(store.lru_key) == 1
+
+
+async def test_disk_store_round_trip(tmp_path):
+    store = DiskLRUStore(tmp_path, max_bytes=1000)
+    await store.set("k", b"value")
+    assert await store.get("k") == b"value"
+    assert await store.get("missing") is None
@@ -0,0 +1,75 @@
+import time
+from typing import Optional
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from src.services.clerk_auth import ClerkTokenVerifier
+
+JWKS_URL = "https://clerk.test/.well-known/jwks.json"
+
+
+class StubJWKS:
+    """A JWKS endpoint serving one RSA key, which can be taken down."""
+
+    def __init__(self, kid: str = "key-1"):
+        self.kid = kid
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.requests = 0
+        self.down = False
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.down:
+            return httpx.Response(503)
+        jwk = RSAAlgorithm.to_jwk(self.private_key.public_key(), as_dict=True)
+        return httpx.Response(200, json={"keys": [{**jwk, "kid": self.kid, "use": "sig", "alg": "RS256"}]})
+
+    def token(self, sub: str = "user_1", kid: Optional[str] = None) -> str:
+        claims = {"sub": sub, "exp": int(time.time()) + 300}
+        return jwt.encode(claims, self.private_key, algorithm="RS256", headers={"kid": kid or self.kid})
+
+
+@pytest.fixture
+def jwks():
+    return StubJWKS()
+
+
+@pytest.fixture
+async def verifier(jwks):
+    verifier = ClerkTokenVerifier(JWKS_URL, keys_ttl=60)
+    verifier._http = httpx.AsyncClient(transport=httpx.MockTransport(jwks.handler))
+    yield verifier
+    await verifier.stop()
+
+
+async def test_keys_and_tokens_are_cached(verifier, jwks):
+    token = jwks.token()
+    assert (await verifier.verify(token))["sub"] == "user_1"
+    assert (await verifier.verify(token))["sub"] == "user_1"
+    assert (await verifier.verify(jwks.token("user_2")))["sub"] == "user_2"
+    assert jwks.requests == 1
+
+
+async def test_stale_keys_survive_a_jwks_outage(verifier, jwks):
+    await verifier.verify(jwks.token())
+    verifier._keys_fetched_at -= verifier.keys_ttl + 1
+    jwks.down = True
+
+    assert (await verifier.verify(jwks.token("user_2")))["sub"] == "user_2"
+    # The failed refresh is not retried on every request
+    assert (await verifier.verify(jwks.token("user_3")))["sub"] == "user_3"
+    assert jwks.requests == 2
+
+
+async def test_unknown_kid_fails(verifier, jwks):
+    await verifier.verify(jwks.token())
+    with pytest.raises(jwt.InvalidTokenError):
+        await verifier.verify(jwks.token(kid="key-2"))
+    # Refetched once for the new kid, then rate limited
+    with pytest.raises(jwt.InvalidTokenError):
+        await verifier.verify(jwks.token(kid="key-3"))
+    assert jwks.requests == 2
@@ -0,0 +1,31 @@
+from src.services.continuation import MAX_OVERLAP, MIN_OVERLAP, trim_overlap
+
+PARTIAL = "".join(f"<li>Item {i}: shipped feature {i * 7}</li>\n" for i in range(40))
+
+
+def test_repeated_tail_is_trimmed():
+    repeated = PARTIAL[-60:]
+    assert trim_overlap(PARTIAL, repeated + "<li>Next</li>") == "<li>Next</li>"
+
+
+def test_overlap_below_the_minimum_is_kept():
+    # A short coincidental match is more likely new text than a repeat
+    repeated = PARTIAL[-(MIN_OVERLAP - 1):]
+    assert trim_overlap(PARTIAL, repeated + "<li>Next</li>") == repeated + "<li>Next</li>"
+    repeated = PARTIAL[-MIN_OVERLAP:]
+    assert trim_overlap(PARTIAL, repeated + "<li>Next</li>") == "<li>Next</li>"
+
+
+def test_overlap_beyond_the_maximum_is_not_searched():
+    assert trim_overlap(PARTIAL, PARTIAL[-MAX_OVERLAP:] + "<li>Next</li>") == "<li>Next</li>"
+    repeated = PARTIAL[-(MAX_OVERLAP + 50):]
+    assert len(PARTIAL) > MAX_OVERLAP + 50
+    assert trim_overlap(PARTIAL, repeated + "<li>Next</li>") == repeated + "<li>Next</li>"
+
+
+def test_leading_code_fence_is_dropped_before_matching():
+    repeated = PARTIAL[-60:]
+    assert trim_overlap(PARTIAL, "```html\n" + repeated + "</ul>") == "</ul>"
+    assert trim_overlap(PARTIAL, "  ```\n</ul>") == "</ul>"
+    # Only at the start
+    assert trim_overlap(PARTIAL, "</ul>\n```html\n") == "</ul>\n```html\n"
@@ -0,0 +1,29 @@
+import math
+from types import SimpleNamespace
+
+from src.services.file_registry import MemoryFileStore, OpenAIFileRegistry
+
+
+class StubFiles:
+    def __init__(self):
+        self.uploaded = 0
+        self.deleted = []
+
+    async def create(self, file, purpose):
+        self.uploaded += 1
+        return SimpleNamespace(id=f"file-{self.uploaded}")
+
+    async def delete(self, file_id):
+        self.deleted.append(file_id)
+
+
+async def test_reupload_in_grace_window_deletes_both_files():
+    client = SimpleNamespace(files=StubFiles())
+    registry = OpenAIFileRegistry(MemoryFileStore(), ttl=0)
+
+    # Expired at once, but not swept yet: the same bytes are uploaded again
+    assert await registry.get_or_upload(client, "cv.pdf", b"resume") == "file-1"
+    assert await registry.get_or_upload(client, "cv.pdf", b"resume") == "file-2"
+
+    assert await registry.sweep(client, before=math.inf) == 2
+    assert sorted(client.files.deleted) == ["file-1", "file-2"]
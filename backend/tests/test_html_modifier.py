@@ -0,0 +1,66 @@
+import json
+from types import SimpleNamespace
+
+from src.agents.html_modifier import HtmlModifier
+from src.services.byte_stores import MemoryLRUStore
+from src.services.modify_cache import ModifyResponseCache
+
+HTML = "<html><head></head><body><h1>Jane Doe</h1>" + "".join(
+    f"<p>Project {i}: shipped release {i}.0 to {i * 100} users</p>" for i in range(1, 11)
+) + "</body></html>"
+
+
+def chunk(content=None, finish_reason=None):
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+class StubCompletions:
+    """Streams each scripted answer as small chunks, one answer per request."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        text, finish_reason = self.answers.pop(0)
+
+        async def stream():
+            for i in range(0, len(text), 7):
+                yield chunk(text[i:i + 7])
+            yield chunk(finish_reason=finish_reason)
+            yield SimpleNamespace(choices=[], usage=None)
+        return stream()
+
+
+def stub_client(answers):
+    return SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions(answers)))
+
+
+async def test_stream_cut_off_at_token_limit_is_continued():
+    answer = json.dumps({"reply": "Updated your name.", "modified_code": HTML.replace("Jane", "Janet")})
+    cut = len(answer) // 2
+    client = stub_client([(answer[:cut], "length"), (answer[cut:], "stop")])
+    modifier = HtmlModifier(client, mode="full")
+
+    events = [event async for event in modifier.modify_html_stream(HTML, "change my name to Janet")]
+    kind, result = events[-1]
+    assert kind == "done"
+    assert result["modified_html"] == HTML.replace("Jane", "Janet")
+    assert "".join(data["html"] for kind, data in events if kind == "delta") == result["modified_html"]
+
+    continuation = client.chat.completions.requests[1]
+    assert continuation["stream"] and "response_format" not in continuation
+    assert continuation["messages"][-2] == {"role": "assistant", "content": answer[:cut]}
+
+
+async def test_patch_route_streamed_as_full_is_cached_as_full():
+    answer = json.dumps({"reply": "Updated your name.", "modified_code": HTML.replace("Jane", "Janet")})
+    cache = ModifyResponseCache(MemoryLRUStore(1 << 20), ttl=60)
+    modifier = HtmlModifier(stub_client([(answer, "stop")]), cache=cache, model_name="gpt-4.1", mode="patch")
+
+    events = [event async for event in modifier.modify_html_stream(HTML, "change my name to Janet")]
+    assert events[-1][0] == "done"
+    assert await cache.lookup(HTML, "change my name to Janet", None, None, "gpt-4.1", "patch") is None
+    assert await cache.lookup(HTML, "change my name to Janet", None, None, "gpt-4.1", "full") is not None
@@ -0,0 +1,31 @@
+from src.services.html_patch import apply_edit
+
+
+def set_attribute(source: str, name: str, value=None) -> str:
+    edit = {"op": "set_attribute", "target": {"selector": "p"}, "name": name}
+    if value is not None:
+        edit["value"] = value
+    return apply_edit(source, edit)
+
+
+def test_set_attribute_ignores_longer_attribute_names():
+    assert set_attribute('<p classname="k">x</p>', "class", "z") == '<p classname="k" class="z">x</p>'
+
+
+def test_set_attribute_ignores_names_inside_other_values():
+    assert (
+        set_attribute('<p title="a style=b" style="c">x</p>', "style", "z")
+        == '<p title="a style=b" style="z">x</p>'
+    )
+
+
+def test_set_attribute_replaces_unquoted_and_any_case():
+    assert set_attribute("<p id=a STYLE=c>x</p>", "style", "d") == '<p id=a style="d">x</p>'
+
+
+def test_set_attribute_removes_without_value():
+    assert set_attribute('<p data-x=1 class="a">x</p>', "class") == "<p data-x=1>x</p>"
+
+
+def test_set_attribute_escapes_value():
+    assert set_attribute("<p>x</p>", "title", 'say "hi"') == '<p title="say &quot;hi&quot;">x</p>'
@@ -0,0 +1,163 @@
+import asyncio
+import time
+
+import pytest
+
+from src.services.jobs import (
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    TERMINAL,
+    JobQueue,
+    MemoryJobBackend,
+    RedisJobBackend,
+    register_job_handler,
+)
+
+calls = []
+
+
+@register_job_handler("test_flaky")
+async def flaky(job: dict) -> dict:
+    """Fails `failures` times, then succeeds."""
+    calls.append(time.monotonic())
+    if len(calls) <= job["payload"]["failures"]:
+        raise RuntimeError("upstream hiccup")
+    return {"attempt": len(calls)}
+
+
+@register_job_handler("test_slow")
+async def slow(job: dict) -> dict:
+    await asyncio.sleep(5)
+    return {}
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request, monkeypatch):
+    if request.param == "memory":
+        return MemoryJobBackend()
+    request.getfixturevalue("fake_redis")
+    backend = RedisJobBackend()
+    monkeypatch.setattr(backend, "POLL_INTERVAL", 0.05)
+    return backend
+
+
+@pytest.fixture
+async def queue(backend, monkeypatch):
+    calls.clear()
+    monkeypatch.setattr("src.services.jobs.settings.JOB_RETRY_BACKOFF", 0.1)
+    queue = JobQueue(backend, max_attempts=3, deadline=10, result_ttl=60, lease_seconds=5)
+    queue.start_workers(2)
+    yield queue
+    await queue.stop_workers(grace=0)
+
+
+async def wait_done(queue: JobQueue, job_id: str, timeout: float = 5) -> dict:
+    give_up_at = time.monotonic() + timeout
+    while time.monotonic() < give_up_at:
+        job = await queue.get(job_id)
+        if job["status"] in TERMINAL:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job still {job['status']}")
+
+
+async def test_retries_with_backoff(queue):
+    job, _ = await queue.submit("test_flaky", {"failures": 2})
+    done = await wait_done(queue, job["id"])
+    assert done["status"] == SUCCEEDED
+    assert done["attempts"] == 3
+    assert done["result"] == {"attempt": 3}
+    # 0.1s then 0.2s between attempts
+    assert calls[1] - calls[0] >= 0.1
+    assert calls[2] - calls[1] >= 0.2
+
+
+async def test_gives_up_after_max_attempts(queue):
+    job, _ = await queue.submit("test_flaky", {"failures": 5}, max_attempts=2)
+    done = await wait_done(queue, job["id"])
+    assert done["status"] == FAILED
+    assert done["attempts"] == 2
+    assert done["error"] == "upstream hiccup"
+
+
+async def test_deadline_stops_a_running_job(queue):
+    job, _ = await queue.submit("test_slow", {}, deadline=0.3)
+    done = await wait_done(queue, job["id"])
+    assert done["status"] == FAILED
+    assert done["error"] == "Deadline exceeded"
+
+
+async def test_idempotency_key_is_scoped_per_owner(queue):
+    first, created = await queue.submit("test_flaky", {"failures": 0}, owner="u1", idempotency_key="k")
+    again, created_again = await queue.submit("test_flaky", {"failures": 0}, owner="u1", idempotency_key="k")
+    other, created_other = await queue.submit("test_flaky", {"failures": 0}, owner="u2", idempotency_key="k")
+    assert created and not created_again and created_other
+    assert again["id"] == first["id"]
+    assert other["id"] != first["id"]
+
+
+async def test_job_popped_by_a_dead_worker_is_recovered(fake_redis):
+    backend = RedisJobBackend()
+    queue = JobQueue(backend, lease_seconds=0.2)
+    job, _ = await queue.submit("test_flaky", {"failures": 0})
+
+    # The worker pops the job and dies before executing it
+    assert await backend.dequeue(timeout=1, lease_seconds=0.2) == job["id"]
+    assert await backend.dequeue(timeout=0, lease_seconds=0.2) is None
+    assert await fake_redis.zscore(backend.LEASES_KEY, job["id"]) is not None
+
+    await asyncio.sleep(0.3)
+    assert await backend.recover() == 1
+    assert await backend.dequeue(timeout=1, lease_seconds=0.2) == job["id"]
+    assert (await queue.get(job["id"]))["status"] == QUEUED
+
+
+async def test_memory_blobs_expire():
+    backend = MemoryJobBackend()
+    await backend.set_blob("batch:u1:a", b"zip", ttl=0.05)
+    await backend.set_blob("batch:u1:b", b"zip", ttl=0.05)
+    await backend.set_blob("batch:u1:b", b"newer zip", ttl=60)
+    await asyncio.sleep(0.1)
+    assert await backend.get_blob("batch:u1:a") is None
+    assert await backend.get_blob("batch:u1:b") == b"newer zip"
+
+
+async def test_memory_idempotency_keys_expire_with_their_job():
+    backend = MemoryJobBackend()
+    queue = JobQueue(backend, result_ttl=0.05)
+    first, _ = await queue.submit("test_flaky", {"failures": 0}, owner="u1", idempotency_key="k")
+    await queue.execute(first["id"])
+    await asyncio.sleep(0.1)
+    assert backend._idempotency == {} and backend._idempotency_keys == {}
+
+    again, created = await queue.submit("test_flaky", {"failures": 0}, owner="u1", idempotency_key="k")
+    assert created and again["id"] != first["id"]
+
+
+class LosingLeaseBackend(MemoryJobBackend):
+    """Takes the first lease, then can't renew it."""
+
+    def __init__(self):
+        super().__init__()
+        self.leases = 0
+
+    async def lease(self, job_id: str, seconds: float):
+        self.leases += 1
+        if self.leases > 1:
+            raise ConnectionError("redis unreachable")
+
+
+async def test_lost_lease_cancels_the_running_job():
+    backend = LosingLeaseBackend()
+    queue = JobQueue(backend, lease_seconds=0.3)
+    job, _ = await queue.submit("test_slow", {})
+
+    start = time.monotonic()
+    await queue.execute(job["id"])
+    # Two missed renewals, well before the handler's 5s
+    assert time.monotonic() - start < 1
+    assert backend.leases == 3
+    # Left for lease recovery rather than marked finished
+    assert (await queue.get(job["id"]))["status"] == RUNNING
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from src.services.json_stream import JsonStringFieldStreamer
+
+CODE = 'café é☃ "quoted" back\\slash\ttab\nline 😀 end \U0001f600'
+ANSWER = json.dumps({"reply": "Done \U0001f44d", "modified_code": CODE})
+
+
+def decode(chunks):
+    streamer = JsonStringFieldStreamer(["reply", "modified_code"])
+    out = {}
+    for chunk in chunks:
+        for field, text in streamer.feed(chunk):
+            out[field] = out.get(field, "") + text
+    return out
+
+
+def test_whole_answer():
+    assert decode([ANSWER]) == {"reply": "Done \U0001f44d", "modified_code": CODE}
+
+
+def test_one_character_at_a_time():
+    assert decode(list(ANSWER)) == {"reply": "Done \U0001f44d", "modified_code": CODE}
+
+
+@pytest.mark.parametrize("cut", range(1, len(ANSWER)))
+def test_split_at_every_position(cut):
+    # Covers a cut inside every \uXXXX escape, between the halves of each surrogate pair and after each backslash
+    assert "\\ud83d\\ude00" in ANSWER and '\\"' in ANSWER
+    assert decode([ANSWER[:cut], ANSWER[cut:]]) == {"reply": "Done \U0001f44d", "modified_code": CODE}
+
+
+def test_escaped_quote_at_the_end_of_a_chunk_does_not_close_the_string():
+    streamer = JsonStringFieldStreamer(["modified_code"])
+    assert streamer.feed('{"modified_code": "say \\') == [("modified_code", "say ")]
+    assert streamer.feed('"hi\\"') == [("modified_code", '"hi"')]
+    assert streamer.feed(' more"}') == [("modified_code", " more")]
+
+
+def test_unwatched_fields_are_skipped():
+    answer = json.dumps({"notes": "x" * 200, "modified_code": "<p>hi</p>"})
+    assert decode([answer[i:i + 5] for i in range(0, len(answer), 5)]) == {"modified_code": "<p>hi</p>"}
@@ -0,0 +1,95 @@
+import io
+import shutil
+import zipfile
+
+import pytest
+
+from src.services import local_extractors
+from src.services.local_extractors import extract_locally
+
+needs_pdftotext = pytest.mark.skipif(shutil.which("pdftotext") is None, reason="poppler's pdftotext is not installed")
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def make_pdf(page_lines: list[list[str]]) -> bytes:
+    """A minimal PDF, one page per entry, each line drawn as text in Helvetica."""
+    pages = len(page_lines)
+    font = 3 + 2 * pages
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (3 + 2 * i) for i in range(pages))
+        + b"] /Count %d >>" % pages,
+    ]
+    for i, lines in enumerate(page_lines):
+        ops = ["BT /F1 11 Tf 14 TL 50 780 Td"] + [f"({line}) Tj T*" for line in lines] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font, 4 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+RESUME_LINES = [f"Acme Corp {year}: led the billing platform team and shipped release {year}" for year in range(2010, 2020)]
+
+
+def make_docx() -> bytes:
+    header = f'<w:hdr {W}><w:p><w:r><w:t>Jane Doe</w:t></w:r></w:p></w:hdr>'
+    document = (
+        f'<w:document {W}><w:body>'
+        '<w:p><w:r><w:t>Experience</w:t></w:r></w:p>'
+        '<w:p><w:r><w:t>Acme Corp</w:t><w:tab/><w:t>2019</w:t></w:r></w:p>'
+        '<w:tbl><w:tr>'
+        '<w:tc><w:p><w:r><w:t>Python</w:t></w:r></w:p></w:tc>'
+        '<w:tc><w:p><w:r><w:t>Go</w:t></w:r></w:p></w:tc>'
+        '</w:tr></w:tbl>'
+        '</w:body></w:document>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/header1.xml", header)
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+async def test_docx_header_body_and_tables():
+    text, method = await extract_locally(make_docx(), "cv.docx")
+    assert method == "local_docx"
+    assert text == "Jane Doe\nExperience\nAcme Corp\t2019\nPython | Go"
+
+
+@needs_pdftotext
+async def test_text_pdf_is_extracted_locally():
+    text, method = await extract_locally(make_pdf([RESUME_LINES]), "cv.pdf")
+    assert method == "local_pdf_text"
+    assert "led the billing platform team" in text
+
+
+@needs_pdftotext
+async def test_scanned_like_pdf_falls_back_to_the_llm():
+    # A page of real text followed by two near-empty (image-only) ones: too few characters per page
+    pdf = make_pdf([RESUME_LINES[:3], [], ["p. 3"]])
+    assert await extract_locally(pdf, "cv.pdf") is None
+
+
+async def test_pdf_falls_back_to_the_llm_without_pdftotext(monkeypatch):
+    monkeypatch.setattr(local_extractors.shutil, "which", lambda name: None)
+    assert await extract_locally(make_pdf([RESUME_LINES]), "cv.pdf") is None
+
+
+async def test_legacy_doc_needs_the_llm():
+    assert await extract_locally(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "cv.doc") is None
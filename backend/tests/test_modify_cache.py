@@ -0,0 +1,71 @@
+import pytest
+
+from src.services import modify_cache
+from src.services.byte_stores import MemoryLRUStore
+from src.services.modify_cache import ModifyResponseCache
+
+STYLE = "<style>body { font-size: 12px; }</style>"
+HTML = f"<html><head>{STYLE}</head><body><p>Jane Doe</p></body></html>"
+RESULT = {"success": True, "modified_html": HTML, "reply_text": "Done.", "edit_mode": "full", "tokens_saved": 0}
+
+
+def key(**overrides):
+    args = {
+        "html_code": HTML, "prompt": "Make it bold", "history": None, "extracted_data": None,
+        "model": "gpt-4.1", "mode": "full",
+    }
+    return ModifyResponseCache.exact_key(**{**args, **overrides})
+
+
+def test_exact_key_ignores_prompt_formatting():
+    assert key(prompt="  make it   BOLD!") == key()
+
+
+@pytest.mark.parametrize("override", [
+    {"html_code": HTML.replace("Jane", "John")},
+    {"prompt": "Make it italic"},
+    {"history": [{"role": "user", "content": "hi"}]},
+    {"extracted_data": "Jane Doe, engineer"},
+    {"model": "gpt-4.1-mini"},
+    {"mode": "patch"},
+])
+def test_exact_key_covers_every_input(override):
+    assert key(**override) != key()
+
+
+async def test_entries_are_only_served_for_their_mode():
+    cache = ModifyResponseCache(MemoryLRUStore(1 << 20), ttl=60)
+    await cache.store(HTML, "Make it bold", None, None, "gpt-4.1", "full", RESULT)
+    assert await cache.lookup(HTML, "Make it bold", None, None, "gpt-4.1", "patch") is None
+    hit = await cache.lookup(HTML, "make it bold", None, None, "gpt-4.1", "full")
+    assert hit["cache_hit"] == "exact" and hit["modified_html"] == HTML
+
+
+async def test_entries_expire_after_ttl(monkeypatch):
+    cache = ModifyResponseCache(MemoryLRUStore(1 << 20), ttl=60)
+    await cache.store(HTML, "Make it bold", None, None, "gpt-4.1", "full", RESULT)
+    now = modify_cache.time.time()
+    monkeypatch.setattr(modify_cache.time, "time", lambda: now + 61)
+    assert await cache.lookup(HTML, "Make it bold", None, None, "gpt-4.1", "full") is None
+
+
+async def test_oldest_entries_are_evicted_by_size():
+    store = MemoryLRUStore(1 << 20)
+    cache = ModifyResponseCache(store, ttl=60)
+    await cache.store(HTML, "first", None, None, "gpt-4.1", "full", RESULT)
+    store.max_bytes = store.size_bytes + 10
+    await cache.store(HTML, "second", None, None, "gpt-4.1", "full", RESULT)
+    assert await cache.lookup(HTML, "first", None, None, "gpt-4.1", "full") is None
+    assert await cache.lookup(HTML, "second", None, None, "gpt-4.1", "full") is not None
+
+
+async def test_css_only_edits_are_replayed_on_other_resumes():
+    cache = ModifyResponseCache(MemoryLRUStore(1 << 20), ttl=60)
+    edits = [{"op": "replace_text", "find": "font-size: 12px", "replace": "font-size: 11px"}]
+    result = {**RESULT, "edit_mode": "patch", "edits": edits}
+    await cache.store(HTML, "Smaller font", None, None, "gpt-4.1", "patch", result)
+
+    other = HTML.replace("Jane", "John")
+    hit = await cache.lookup(other, "smaller font", None, None, "gpt-4.1", "patch")
+    assert hit["cache_hit"] == "edits"
+    assert hit["modified_html"] == other.replace("12px", "11px")
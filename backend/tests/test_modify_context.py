@@ -0,0 +1,48 @@
+from src.services.modify_context import ModifyContextBuilder
+from src.services.tokens import estimate_tokens
+
+HTML = "<html><body><h1>Jane Doe</h1><p>Software engineer at Acme</p></body></html>"
+PROMPT = "Change my title to Staff Engineer"
+SYSTEM = "You modify HTML resumes."
+
+
+def history(turns: int) -> list:
+    return [
+        {"role": "user" if i % 2 == 0 else "ai", "content": f"Turn {i}: " + "please adjust the layout " * 20}
+        for i in range(turns)
+    ]
+
+
+def build(builder: ModifyContextBuilder, **kwargs):
+    return builder.build(system_prompt=SYSTEM, html_code=HTML, prompt=PROMPT, **kwargs)
+
+
+def test_history_is_trimmed_to_the_budget():
+    required = sum(estimate_tokens(text, "gpt-4.1") for text in (SYSTEM, HTML, PROMPT))
+    builder = ModifyContextBuilder(budget=required + 300, model="gpt-4.1", summary_chars=40)
+    context = build(builder, history=history(30))
+
+    breakdown = context.breakdown
+    assert breakdown["html"] == estimate_tokens(HTML, "gpt-4.1")
+    assert breakdown["prompt"] == estimate_tokens(PROMPT, "gpt-4.1")
+    assert breakdown["total"] <= builder.budget
+    # Newest turns verbatim, older ones shortened, the oldest dropped
+    assert breakdown["history_verbatim"] >= 1
+    assert breakdown["history_shortened"] >= 1
+    assert breakdown["history_verbatim"] + breakdown["history_shortened"] < 30
+    assert "Turn 29:" in context.history_text
+    assert "Turn 0:" not in context.history_text
+
+
+def test_html_and_prompt_are_kept_when_nothing_else_fits():
+    builder = ModifyContextBuilder(budget=10, model="gpt-4.1")
+    context = build(builder, history=history(4), extracted_data="Led a team of five\nWon an award")
+    assert context.history_text == ""
+    assert context.breakdown["extracted"] == 0
+    assert context.breakdown["html"] > 0 and context.breakdown["prompt"] > 0
+
+
+def test_extracted_data_skips_lines_already_in_the_html():
+    builder = ModifyContextBuilder(budget=10_000, model="gpt-4.1")
+    context = build(builder, extracted_data="Jane Doe\n- Software engineer at Acme\nLed a team of five")
+    assert context.extracted_text == "Led a team of five"
@@ -0,0 +1,43 @@
+import pytest
+
+from src.services import modify_router
+from src.services.modify_router import ADVICE, EDIT, REDESIGN, build_modify_router, classify_prompt
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    # Questions and requests for advice
+    ("What do you think of my resume?", ADVICE),
+    ("Is my resume ATS friendly?", ADVICE),
+    ("Any tips for my experience section?", ADVICE),
+    ("Give me feedback on the summary", ADVICE),
+    # Literal edits
+    ("Change my phone number to 555-123-4567", EDIT),
+    ("Bold headings", EDIT),
+    ("please fix the typo in my email", EDIT),
+    ("Add Python, Kubernetes, Terraform, AWS, GCP, Docker", EDIT),
+    ("Update José's email to jose@example.com", EDIT),
+    # Redesigns
+    ("Make it a two-column layout", REDESIGN),
+    ("Move the education section above experience", REDESIGN),
+    ("Rewrite all bullets to be punchier", REDESIGN),
+    ("It overflows onto a second page, make it one page", REDESIGN),
+    # A question asking for a change is a change
+    ("can you change my title to Staff Engineer?", EDIT),
+    ("Could you make the headings blue?", EDIT),
+    ("What's wrong with my summary? fix it", EDIT),
+    ("can you restructure the layout?", REDESIGN),
+    # Other languages go to the large model
+    ("Cambia mi número de teléfono", REDESIGN),
+    ("Change mon numéro de téléphone", REDESIGN),
+    ("Ändere meine Telefonnummer auf 0176 1234567", REDESIGN),
+    ("把我的电话号码改成 555", REDESIGN),
+])
+def test_classify_prompt(prompt, expected):
+    assert classify_prompt(prompt) == expected
+
+
+def test_non_english_prompts_use_the_full_model(monkeypatch):
+    monkeypatch.setattr(modify_router.settings, "MODIFIER_ROUTING_ENABLED", True)
+    route = build_modify_router().route("Cambia mi número de teléfono")
+    assert route.model == modify_router.settings.MODIFIER_MODEL
+    assert route.mode == "full"
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import pytest
+
+from benchmarks.preprocess_bench import legacy_preprocess_html_for_pdf
+from src.services.pdf_preprocess import preprocess_html_for_pdf
+
+TEMPLATES = sorted((Path(__file__).resolve().parent.parent / "templates").glob("*.html"))
+
+
+@pytest.mark.parametrize("path", TEMPLATES, ids=lambda p: p.stem)
+def test_templates_match_baseline(path):
+    html = path.read_text(encoding="utf-8")
+    assert preprocess_html_for_pdf(html) == legacy_preprocess_html_for_pdf(html)
+
+
+@pytest.mark.parametrize("declaration", [
+    "clip-path: url('#c');",
+    'clip-path: url("#c");',
+    "clip-path: url('a;b');",
+    "filter: blur(2px) url('#f');",
+    "transform: translate(1px, 2px);",
+])
+def test_quoted_values_match_baseline(declaration):
+    html = (
+        f"<html><head><style>a{{{declaration} color:red}}</style></head>"
+        f"<body><div style=\"{declaration} color:red\">x</div></body></html>"
+    )
+    if '"' in declaration:
+        html = html.replace(f'style="{declaration} color:red"', f"style='{declaration} color:red'")
+    expected = legacy_preprocess_html_for_pdf(html)
+    if "a;b" in declaration:
+        # The baseline stopped at the ';' inside the string; only the new pass keeps the CSS valid
+        expected = expected.replace("b'); color:red", " color:red")
+    assert preprocess_html_for_pdf(html) == expected
+
+
+def test_other_attributes_are_left_alone():
+    html = '<html><head></head><body><div title="clip-path: x;" style="color:red">x</div></body></html>'
+    assert 'title="clip-path: x;"' in preprocess_html_for_pdf(html)
@@ -0,0 +1,58 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from src.services.pdf_renderer import PdfRenderer, RenderPoolBrokenError, RenderTimeoutError
+
+
+class StubRenderer(PdfRenderer):
+    """The real pool logic, with workers that skip the WeasyPrint set-up (builtins stand in for renders)."""
+
+    def start(self, warm_documents=None):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+
+@pytest.fixture
+async def renderer():
+    renderer = StubRenderer(workers=3, queue_size=4, timeout=1.0)
+    renderer.start()
+    # Spawn the workers before anything is timed
+    await asyncio.gather(*(renderer._run(time.sleep, 0.2) for _ in range(renderer.workers)))
+    yield renderer
+    # Until the retired pools' workers have been killed and their jobs released
+    give_up_at = time.monotonic() + 5
+    while renderer.pending and time.monotonic() < give_up_at:
+        await asyncio.sleep(0.1)
+    renderer.shutdown()
+
+
+async def test_timeout_on_a_retired_pool_keeps_the_new_one(renderer):
+    first = asyncio.create_task(renderer._run(time.sleep, 5))
+    await asyncio.sleep(0.4)
+    second = asyncio.create_task(renderer._run(time.sleep, 5))
+
+    with pytest.raises(RenderTimeoutError):
+        await first
+    replacement = renderer._executor
+    # Submitted to the replacement while `second` is still running on the retired pool
+    healthy = asyncio.create_task(renderer._run(pow, 2, 10))
+
+    with pytest.raises(RenderTimeoutError):
+        await second
+    assert renderer._executor is replacement
+    assert await healthy == 1024
+
+
+async def test_dead_worker_restarts_the_pool_and_maps_to_503(renderer):
+    broken = renderer._executor
+    with pytest.raises(RenderPoolBrokenError):
+        await renderer._run(os._exit, 1)
+    assert renderer._executor is not broken
+    assert await renderer._run(pow, 2, 10) == 1024
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from src.services.byte_stores import MemoryLRUStore
+from src.services.render_cache import PdfRenderCache
+
+
+async def test_concurrent_requests_share_one_render():
+    cache = PdfRenderCache(MemoryLRUStore(1024))
+    calls = 0
+
+    async def render():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"%PDF"
+
+    results = await asyncio.gather(*(cache.get_or_render("k", render) for _ in range(3)))
+    assert calls == 1
+    assert [pdf for pdf, _ in results] == [b"%PDF"] * 3
+    assert await cache.get_or_render("k", render) == (b"%PDF", True)
+
+
+async def test_leader_cancellation_does_not_fail_followers():
+    cache = PdfRenderCache(MemoryLRUStore(1024))
+    started = asyncio.Event()
+
+    async def render():
+        started.set()
+        await asyncio.sleep(0.05)
+        return b"%PDF"
+
+    leader = asyncio.create_task(cache.get_or_render("k", render))
+    await started.wait()
+    follower = asyncio.create_task(cache.get_or_render("k", render))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == (b"%PDF", True)
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+async def test_render_errors_reach_every_waiter():
+    cache = PdfRenderCache(MemoryLRUStore(1024))
+
+    async def render():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("bad html")
+
+    results = await asyncio.gather(
+        cache.get_or_render("k", render), cache.get_or_render("k", render), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert "k" not in cache._inflight
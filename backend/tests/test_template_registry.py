@@ -0,0 +1,24 @@
+from src.services.template_registry import TemplateRegistry
+
+
+def test_jinja_edits_bump_generation(tmp_path):
+    (tmp_path / "jinja").mkdir()
+    (tmp_path / "classic.html").write_text("<html><head></head><body></body></html>")
+    source = tmp_path / "jinja" / "classic.html.j2"
+    source.write_text("{{ r.contact.name }}")
+    partial = tmp_path / "jinja" / "_macros.html.j2"
+    partial.write_text("{% macro x() %}{% endmacro %}")
+
+    registry = TemplateRegistry(tmp_path, poll_interval=0)
+    registry.load()
+    assert registry.is_structured("classic")
+    assert not registry._scan()
+
+    source.write_text("<h1>{{ r.contact.name }}</h1>")
+    generation = registry.generation
+    assert registry._scan()
+    assert registry.generation == generation + 1
+
+    partial.write_text("{% macro x() %}x{% endmacro %}")
+    assert registry._scan()
+    assert registry.generation == generation + 2
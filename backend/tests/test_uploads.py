@@ -0,0 +1,57 @@
+import io
+import struct
+
+import pytest
+from fastapi import UploadFile
+
+from src.services.uploads import (
+    HEAD_SIZE,
+    UnsupportedUploadError,
+    UploadTooLargeError,
+    ingest_upload,
+    sniff,
+)
+
+WORD_CLSID = bytes.fromhex("0609020000000000c000000000000046")
+EXCEL_CLSID = bytes.fromhex("2008020000000000c000000000000046")
+
+
+def ole_file(clsid: bytes) -> bytes:
+    """A compound file header and a first directory sector holding the root entry."""
+    header = bytearray(512)
+    header[:8] = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+    struct.pack_into("<H", header, 0x1E, 9)  # 512-byte sectors
+    struct.pack_into("<I", header, 0x30, 0)  # directory starts at sector 0
+    directory = bytearray(512)
+    directory[0x50:0x60] = clsid
+    return bytes(header + directory)
+
+
+def test_ole_files_are_told_apart_by_clsid():
+    assert sniff(ole_file(WORD_CLSID), "resume.bin") == "doc"
+    with pytest.raises(UnsupportedUploadError):
+        sniff(ole_file(EXCEL_CLSID), "resume.doc")
+
+
+def test_ole_file_without_clsid_falls_back_to_extension():
+    assert sniff(ole_file(bytes(16)), "resume.doc") == "doc"
+    with pytest.raises(UnsupportedUploadError):
+        sniff(ole_file(bytes(16)), "budget.xls")
+
+
+async def test_ingest_enforces_limit():
+    data = b"Jane Doe\nSoftware engineer\n" * 20000
+    upload = await ingest_upload(UploadFile(io.BytesIO(data), filename="cv.txt"), max_bytes=len(data))
+    assert upload.data == data and type(upload.data) is bytes
+    assert upload.kind == "txt"
+
+    with pytest.raises(UploadTooLargeError):
+        await ingest_upload(UploadFile(io.BytesIO(data), filename="cv.txt"), max_bytes=len(data) - 1)
+
+
+async def test_ingest_turns_away_binary_before_reading_it_all():
+    data = bytes(range(32)) * 100_000
+    file = UploadFile(io.BytesIO(data), filename="cv.pdf")
+    with pytest.raises(UnsupportedUploadError):
+        await ingest_upload(file, max_bytes=len(data))
+    assert file.file.tell() == HEAD_SIZE